@@ -13,7 +13,10 @@ if "REQUESTS_CA_BUNDLE" not in os.environ:
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers.ws import router as ws_router
+from routers.audio import router as audio_router
 from services.room_service import room_service
+from services.gemini_service import gemini_service
+from services.lyria_service import lyria_service
 
 app = FastAPI(title="CrowdSynth API", version="1.0.0")
 
@@ -31,6 +34,7 @@ app.add_middleware(
 )
 
 app.include_router(ws_router)
+app.include_router(audio_router)
 
 
 @app.get("/health")
@@ -42,3 +46,9 @@ async def health():
 async def list_rooms():
     """Return active rooms for the lobby screen."""
     return {"rooms": room_service.get_rooms_list()}
+
+
+@app.get("/stats")
+async def stats():
+    """Process-wide counters: connections, outbound queues, audio buffer memory, arbitration, Lyria commands."""
+    return {**room_service.get_stats(), "arbitration": gemini_service.get_stats(), "lyria": lyria_service.get_stats()}
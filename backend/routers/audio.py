@@ -0,0 +1,46 @@
+"""
+Audio Router
+HTTP segmented audio for large passive audiences. Segments are immutable and
+sequence-numbered, so a CDN or reverse proxy in front of this serves the fan-out;
+the manifest is cacheable for about one second.
+"""
+from fastapi import APIRouter, HTTPException, Response
+
+from services.room_service import room_service
+
+router = APIRouter()
+
+MANIFEST_CACHE = "public, max-age=1"
+SEGMENT_CACHE = "public, max-age=31536000, immutable"
+
+
+@router.get("/rooms/{room_id}/audio/manifest")
+async def audio_manifest(room_id: str, response: Response):
+    """Currently available segments for a room, oldest first. Starts segmenting on first request."""
+    room_id = room_id.upper()
+    segmenter = room_service.get_segmenter(room_id)
+    if segmenter is None:
+        raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
+    room_service.note_http_audience(room_id)
+    if room_service.is_hibernating(room_id) and room_service.wake_callback is not None:
+        await room_service.wake_callback(room_id)
+    response.headers["Cache-Control"] = MANIFEST_CACHE
+    manifest = segmenter.manifest(f"/rooms/{room_id}/audio")
+    manifest["room_id"] = room_id
+    manifest["is_playing"] = room_service.rooms[room_id].is_playing
+    return manifest
+
+
+@router.get("/rooms/{room_id}/audio/{stream_id}/{seq}.wav")
+async def audio_segment(room_id: str, stream_id: str, seq: int):
+    """One immutable WAV segment. 404 once it has slid out of the window (or before it exists)."""
+    room_id = room_id.upper()
+    data = room_service.get_segment(room_id, stream_id, seq)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Segment not available", headers={"Cache-Control": "no-store"})
+    room_service.note_http_audience(room_id)
+    return Response(
+        content=data,
+        media_type="audio/wav",
+        headers={"Cache-Control": SEGMENT_CACHE, "ETag": f'"{stream_id}-{seq}"'},
+    )
@@ -4,14 +4,18 @@ The main WS endpoint. Routes messages to appropriate services.
 Wires Lyria audio broadcast → room broadcast.
 Wires Gemini tick → Lyria prompt update → state broadcast.
 """
+import asyncio
 import json
+import os
+import time
 import uuid
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from google.genai import types as genai_types
 
 from services.room_service import room_service
-from services.lyria_service import lyria_service
+from services.lyria_service import lyria_service, PRIORITY_DROP
 from services.gemini_service import gemini_service
+from services.timer_wheel import timer_wheel
 
 router = APIRouter()
 
@@ -19,8 +23,15 @@ router = APIRouter()
 # ─── Wire Lyria audio → room broadcast ───────────────────────────────────────
 
 async def _audio_broadcast_callback(room_id: str, audio_bytes: bytes):
-    """Called by LyriaService for every audio chunk. Forwards to all room clients."""
-    await room_service.broadcast_bytes(room_id, audio_bytes)
+    """
+    Called by LyriaService for every audio chunk. Coalesces it into fixed-duration
+    frames, keeps them for pre-roll and HTTP segments, and forwards them to all
+    room clients.
+    """
+    for frame in room_service.frame_audio(room_id, audio_bytes):
+        room_service.buffer_audio(room_id, frame)
+        room_service.segment_audio(room_id, frame)
+        await room_service.broadcast_audio_frame(room_id, frame)
 
 lyria_service.broadcast_callback = _audio_broadcast_callback
 
@@ -29,13 +40,17 @@ lyria_service.broadcast_callback = _audio_broadcast_callback
 
 async def _arbitration_tick(room_id: str, current_inputs, current_bpm, current_density, current_brightness):
     """
-    Called every 4 seconds by RoomService tick loop.
+    Called by the RoomService tick loop, shortly after inputs arrive or on the idle timer.
     1. Call Gemini to arbitrate inputs
     2. Update Lyria with new prompts
     3. Update room state
     4. Broadcast new state to all clients
+    Returns False if the result was not applied, so the tick loop keeps the inputs for a retry.
     """
     # 1. Gemini arbitration
+    input_time = room_service.oldest_input_time(room_id, current_inputs)
+    local_seq = _local_seq.get(room_id, 0)
+    checkpoint = gemini_service.checkpoint(room_id)
     result = await gemini_service.arbitrate(
         room_id=room_id,
         current_inputs=current_inputs,
@@ -44,13 +59,45 @@ async def _arbitration_tick(room_id: str, current_inputs, current_bpm, current_d
         current_brightness=current_brightness,
     )
 
+    # A local adjustment landed while Gemini was thinking: this refinement is already
+    # stale. Keep what is playing; these and the newer inputs are refined at the next tick.
+    if _local_seq.get(room_id, 0) != local_seq:
+        print(f"[WS] Dropping stale refinement for room {room_id} — newer local adjustment is playing")
+        gemini_service.rollback(room_id, checkpoint, playing=_local_results[room_id])
+        return False
+
     # 2. Update Lyria prompts (non-fatal — audio may continue with old prompts)
+    if not await _push_to_lyria(room_id, result):
+        # Superseded, held by a drop, or failed: the room keeps showing what is playing
+        print(f"[WS] Arbitration result for room {room_id} did not reach Lyria — retrying at the next tick")
+        gemini_service.rollback(room_id, checkpoint)
+        return False
+    if input_time is not None:
+        room_service.record_input_latency("refined", input_time)
+
+    # 3. Update room state
+    room_service.update_after_arbitration(
+        room_id=room_id,
+        prompts=result.prompts,
+        bpm=result.bpm,
+        density=result.density,
+        brightness=result.brightness,
+        reasoning=result.reasoning,
+    )
+
+    # 4. Broadcast to all clients
+    await room_service.broadcast_state(room_id)
+    return True
+
+
+async def _push_to_lyria(room_id: str, result) -> bool:
+    """Send an arbitration result to the room's Lyria session; True once applied. Non-fatal on failure."""
     try:
         lyria_prompts = [
             genai_types.WeightedPrompt(text=p.text, weight=p.weight)
             for p in result.prompts
         ]
-        await lyria_service.update_prompts(
+        return await lyria_service.update_prompts(
             room_id=room_id,
             prompts=lyria_prompts,
             bpm=result.bpm,
@@ -59,20 +106,202 @@ async def _arbitration_tick(room_id: str, current_inputs, current_bpm, current_d
         )
     except Exception as e:
         print(f"[WS] Lyria prompt update failed (non-fatal): {e}")
+        return False
 
-    # 3. Update room state
-    room_service.update_after_arbitration(
-        room_id=room_id,
-        prompts=result.prompts,
-        bpm=result.bpm,
-        density=result.density,
-        brightness=result.brightness,
-    )
 
-    # 4. Broadcast to all clients
-    state_msg = room_service.get_state_update_message(room_id)
-    state_msg["gemini_reasoning"] = result.reasoning
-    await room_service.broadcast_json(room_id, state_msg)
+# ─── Two-phase arbitration: instant local apply ──────────────────────────────
+
+# Push a local prompt adjustment to Lyria as soon as an input arrives, instead of
+# waiting for the next tick and a Gemini round trip. Gemini refines it at the tick.
+TWO_PHASE_ARBITRATION = os.getenv("TWO_PHASE_ARBITRATION", "1") == "1"
+# Minimum seconds between local Lyria updates per room; inputs in between coalesce
+LOCAL_APPLY_INTERVAL = float(os.getenv("LOCAL_APPLY_INTERVAL", "0.25"))
+# The drummer's BPM stays on the tick: every BPM change resets Lyria's context
+LOCAL_APPLY_ROLES = {"genre_dj", "vibe_setter", "instrumentalist", "energy"}
+
+# room_id → inputs waiting for the local apply task, and that task
+_local_pending: dict = {}
+_local_tasks: dict = {}
+# room_id → count of local adjustments pushed, and the latest one
+_local_seq: dict = {}
+_local_results: dict = {}
+
+
+def _queue_local_apply(room_id: str, role: str, payload: dict):
+    """Coalesce an input into the room's pending local adjustment and make sure it runs."""
+    if not TWO_PHASE_ARBITRATION or role not in LOCAL_APPLY_ROLES:
+        return
+    room = room_service.rooms.get(room_id)
+    if not room or not room.is_playing:
+        return
+    _local_pending.setdefault(room_id, {})[role] = (payload, time.time())
+    if room_id not in _local_tasks:
+        _local_tasks[room_id] = asyncio.create_task(_local_apply_loop(room_id))
+
+
+async def _local_apply_loop(room_id: str):
+    try:
+        while _local_pending.get(room_id):
+            pending = _local_pending.pop(room_id)
+            room = room_service.rooms.get(room_id)
+            if not room or not room.is_playing:
+                break
+            inputs = {role: payload for role, (payload, _) in pending.items()}
+            result = gemini_service.local_adjust(room_id, inputs, room.bpm, room.density, room.brightness)
+            _local_seq[room_id] = _local_seq.get(room_id, 0) + 1
+            _local_results[room_id] = result
+            if await _push_to_lyria(room_id, result):
+                room_service.record_input_latency("local", min(ts for _, ts in pending.values()))
+                room_service.update_after_arbitration(
+                    room_id=room_id,
+                    prompts=result.prompts,
+                    bpm=result.bpm,
+                    density=result.density,
+                    brightness=result.brightness,
+                    reasoning=result.reasoning,
+                )
+                await room_service.broadcast_state(room_id)
+            await asyncio.sleep(LOCAL_APPLY_INTERVAL)
+    finally:
+        _local_tasks.pop(room_id, None)
+
+
+def _forget_local(room_id: str):
+    _local_pending.pop(room_id, None)
+    _power_locks.pop(room_id, None)
+    _local_seq.pop(room_id, None)
+    _local_results.pop(room_id, None)
+    task = _local_tasks.pop(room_id, None)
+    if task:
+        task.cancel()
+
+
+# ─── Drop build-up and vote expiry (scheduled on the timer wheel) ────────────
+
+async def _drop_build_step(rid: str, r, step: tuple, floor_d: float, floor_b: float):
+    """One build step: always increase from the energy at vote time, never dip."""
+    overlay_w, density_t, brightness_t = step
+    if not (r and r.is_playing):
+        return
+    session_data = lyria_service._sessions.get(rid)
+    if session_data:
+        base = session_data.get("last_prompts") or [
+            genai_types.WeightedPrompt(text="ambient electronic music", weight=1.0)
+        ]
+        build_prompts = [
+            genai_types.WeightedPrompt(
+                text="rising tension, building energy, anticipation, crescendo, louder",
+                weight=overlay_w,
+            )
+        ] + base[:1]
+        try:
+            await lyria_service.update_prompts(
+                room_id=rid,
+                prompts=build_prompts,
+                bpm=session_data.get("bpm", r.bpm),
+                # max() ensures we never go below current energy
+                density=max(floor_d, density_t),
+                brightness=max(floor_b, brightness_t),
+                priority=PRIORITY_DROP,
+            )
+        except Exception as e:
+            print(f"[WS] Drop build step failed (non-fatal): {e}")
+
+
+async def _fire_drop(rid: str, r, dp):
+    """The drop — full energy (1.0/1.0), same BPM, no reset_context()."""
+    if r and r.is_playing:
+        try:
+            session_data = lyria_service._sessions.get(rid)
+            current_bpm = session_data.get("bpm", r.bpm) if session_data else r.bpm
+            await lyria_service.update_prompts(
+                room_id=rid,
+                prompts=dp,
+                bpm=current_bpm,  # same BPM — no cut, smooth morph
+                density=1.0,
+                brightness=1.0,   # full brightness — never a dip
+                priority=PRIORITY_DROP,
+            )
+        except Exception as e:
+            print(f"[WS] Drop Lyria update failed (non-fatal): {e}")
+    # Always broadcast drop_triggered so UI resets
+    await room_service.broadcast_json(rid, {
+        "type": "drop_triggered",
+        "message": "🔥 DROP!"
+    })
+
+
+async def _expire_drop(rid: str):
+    """End of the 10-second vote window: reset if the drop wasn't triggered."""
+    if room_service.get_drop_vote_count(rid) > 0:
+        room_service.reset_drop_votes(rid)
+        n = room_service.get_drop_threshold(rid)
+        await room_service.broadcast_json(rid, {
+            "type": "drop_reset",
+            "needed": n,
+            "message": "Not enough votes — try again",
+        })
+
+
+# ─── Hibernation: rooms nobody is connected to stop generating ──────────────
+
+# room_id → lock serialising hibernate and wake, so a socket arriving mid-hibernate
+# restarts the room only after its old session is gone
+_power_locks: dict = {}
+
+
+def _power_lock(room_id: str) -> asyncio.Lock:
+    return _power_locks.setdefault(room_id, asyncio.Lock())
+
+
+async def _hibernate_room(rid: str):
+    """No sockets for ROOM_HIBERNATE_GRACE: stop the tick loop and Lyria, keep the musical state."""
+    async with _power_lock(rid):
+        if not room_service.is_hibernating(rid):
+            return  # a socket came back first
+        room_service.stop_tick_loop(rid)
+        # Released rather than paused: an idle upstream session still holds capacity
+        await lyria_service.stop_session(rid)
+        room_service.release_audio_buffer(rid)
+        room_service.log_event(rid, "system", "Room hibernating — nobody connected")
+        print(f"[WS] Room {rid} hibernating — no connections")
+
+
+async def _wake_room(rid: str):
+    """A socket joined: cancel pending hibernation, or resume a hibernating room where it left off."""
+    if not room_service.cancel_hibernation(rid):
+        return
+    async with _power_lock(rid):
+        if not room_service.is_hibernating(rid):
+            return
+        room_service.mark_awake(rid)
+        room = room_service.rooms.get(rid)
+        if not room or not room.is_playing:
+            return
+        prompts = [genai_types.WeightedPrompt(text=p.text, weight=p.weight) for p in room.active_prompts]
+        try:
+            await lyria_service.start_session(
+                rid, initial_bpm=room.bpm, prompts=prompts or None,
+                density=room.density, brightness=room.brightness,
+            )
+        except Exception as e:
+            print(f"[WS] Resume failed for room {rid}: {e}")
+            room.is_playing = False
+            room_service.mark_state_dirty(rid)
+            await room_service.broadcast_json(rid, {"type": "music_stopped"})
+            return
+        room_service.start_tick_loop(rid, _arbitration_tick)
+        room_service.log_event(rid, "system", "Room resumed")
+        print(f"[WS] Room {rid} resumed from hibernation (bpm {room.bpm}, {len(prompts)} prompts)")
+
+
+def _left_room(rid: str):
+    """A socket left `rid`; hibernate the room if it was the last one."""
+    room_service.schedule_hibernation(rid, _hibernate_room)
+
+
+# HTTP audio consumers (routers/audio.py) wake rooms through the same path
+room_service.wake_callback = _wake_room
 
 
 # ─── WebSocket Endpoint ───────────────────────────────────────────────────────
@@ -83,21 +312,14 @@ async def websocket_endpoint(websocket: WebSocket):
 
     room_id = None
     user_id = None
+    # Listen-only connection: audio + state_summary, no role, ignores control messages
+    listening = False
     # Unique per-connection ID for drop vote deduplication (one vote per physical
     # browser tab/device regardless of shared localStorage user_id)
     connection_id = str(uuid.uuid4())
 
-    # WS heartbeat to keep Railway connection alive
-    import asyncio
-    async def heartbeat():
-        while True:
-            await asyncio.sleep(30)
-            try:
-                await websocket.send_json({"type": "ping"})
-            except Exception:
-                break
-
-    heartbeat_task = asyncio.create_task(heartbeat())
+    # WS heartbeat to keep Railway connection alive (jittered so sockets don't ping in lockstep)
+    heartbeat = timer_wheel.every(30, room_service.send_json, websocket, {"type": "ping"}, jitter=0.1)
 
     try:
         while True:
@@ -128,12 +350,43 @@ async def websocket_endpoint(websocket: WebSocket):
             try:
                 msg = json.loads(data["text"])
             except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON"})
+                room_service.send_json(websocket, {"type": "error", "message": "Invalid JSON"})
                 continue
 
             msg_type = msg.get("type")
             user_id = msg.get("user_id", user_id)
 
+            # ── LISTEN (spectator, no role) ──────────────────────────────────
+            if msg_type == "listen":
+                new_room_id = (msg.get("room_id") or "").upper()
+                if new_room_id not in room_service.rooms:
+                    room_service.send_json(websocket, {"type": "error", "message": f"Room {new_room_id} not found"})
+                    continue
+                if room_id and user_id and not listening:
+                    room_service.remove_connection(room_id, user_id, websocket)
+                    _left_room(room_id)
+                elif room_id and listening:
+                    room_service.remove_listener(room_id, websocket)
+                    _left_room(room_id)
+                room_id = new_room_id
+                audio_tier = msg.get("audio_tier")
+                if audio_tier and not room_service.set_audio_tier(websocket, audio_tier):
+                    room_service.send_json(websocket, {"type": "error", "message": f"Unknown audio tier: {audio_tier}"})
+                if msg.get("audio_framing"):
+                    room_service.enable_audio_framing(websocket)
+                if not room_service.add_listener(room_id, websocket):
+                    room_service.send_json(websocket, {"type": "error", "message": "Room has too many listeners"})
+                    room_id = None
+                    continue
+                listening = True
+                room_service.send_json(websocket, {"type": "listening", "room_id": room_id})
+                room_service.send_json(websocket, room_service.get_listener_summary(room_id))
+                room_service.send_preroll(room_id, websocket)
+                await _wake_room(room_id)
+                continue
+            if listening:
+                continue
+
             # On reconnect, restore room_id from the message if we lost it
             if not room_id and msg.get("room_id"):
                 room_id = msg["room_id"].upper()
@@ -141,23 +394,34 @@ async def websocket_endpoint(websocket: WebSocket):
                 if room_id in room_service.rooms and user_id:
                     room_service.connections.setdefault(room_id, set()).add(websocket)
                     room_service.user_sockets.setdefault(room_id, {})[user_id] = websocket
+                    room_service.send_preroll(room_id, websocket)
                     print(f"[WS] Reconnected user={user_id} to room={room_id}")
+                    await _wake_room(room_id)
 
             # ── CREATE ROOM ──────────────────────────────────────────────────
             if msg_type == "create_room":
                 # Clean up previous room membership before creating a new one
                 if room_id and user_id:
                     room_service.remove_connection(room_id, user_id, websocket)
+                    _left_room(room_id)
                     room_id = None
 
+                if msg.get("state_deltas"):
+                    room_service.enable_state_deltas(websocket)
+                if msg.get("audio_framing"):
+                    room_service.enable_audio_framing(websocket)
                 device_name = msg.get("device_name", "Unknown")
                 room_name = msg.get("room_name", "")
                 display_name = msg.get("display_name", "")
                 room = room_service.create_room(host_id=user_id, device_name=device_name, room_name=room_name)
                 room_id = room.room_id
+                lyria_service.note_room_created()
+                if msg.get("arbitration") or msg.get("arbitration_fallback"):
+                    if not gemini_service.set_room_backend(room_id, msg.get("arbitration"), msg.get("arbitration_fallback")):
+                        room_service.send_json(websocket, {"type": "error", "message": "Unknown arbitration backend"})
                 role = room_service.join_room(room_id, user_id, websocket, display_name=display_name)
                 join_url = f"?room_id={room_id}"
-                await websocket.send_json({
+                room_service.send_json(websocket, {
                     "type": "room_created",
                     "room_id": room_id,
                     "room_name": room_name,
@@ -166,8 +430,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 })
                 # Broadcast initial state so host sees participants immediately
                 if room_id in room_service.rooms:
-                    state_msg = room_service.get_state_update_message(room_id)
-                    await room_service.broadcast_json(room_id, state_msg)
+                    await room_service.broadcast_state(room_id)
 
             # ── JOIN ROOM ────────────────────────────────────────────────────
             elif msg_type == "join_room":
@@ -176,48 +439,59 @@ async def websocket_endpoint(websocket: WebSocket):
                 new_room_id = msg.get("room_id", "").upper()
                 if old_room_id and old_room_id != new_room_id and user_id:
                     room_service.remove_connection(old_room_id, user_id, websocket)
+                    _left_room(old_room_id)
                 room_id = new_room_id
                 display_name = msg.get("display_name", "")
                 if not room_id or room_id not in room_service.rooms:
-                    await websocket.send_json({"type": "error", "message": f"Room {room_id} not found"})
+                    room_service.send_json(websocket, {"type": "error", "message": f"Room {room_id} not found"})
                     continue
+                if msg.get("state_deltas"):
+                    room_service.enable_state_deltas(websocket)
+                if msg.get("audio_framing"):
+                    room_service.enable_audio_framing(websocket)
+                audio_tier = msg.get("audio_tier")
+                if audio_tier and not room_service.set_audio_tier(websocket, audio_tier):
+                    room_service.send_json(websocket, {"type": "error", "message": f"Unknown audio tier: {audio_tier}"})
                 role = room_service.join_room(room_id, user_id, websocket, display_name=display_name)
                 if role is None:
-                    await websocket.send_json({"type": "error", "message": "Room is full (max 10 players)"})
+                    room_service.send_json(websocket, {"type": "error", "message": "Room is full (max 10 players)"})
                     continue
-                await websocket.send_json({
+                room_service.send_json(websocket, {
                     "type": "joined",
                     "room_id": room_id,
                     "role": role.value,
                     "user_id": user_id,
                 })
+                room_service.send_preroll(room_id, websocket)
+                await _wake_room(room_id)
                 # Broadcast updated participants to all clients in the room
                 if room_id in room_service.rooms:
-                    state_msg = room_service.get_state_update_message(room_id)
-                    await room_service.broadcast_json(room_id, state_msg)
+                    await room_service.broadcast_state(room_id)
 
             # ── START MUSIC ──────────────────────────────────────────────────
             elif msg_type == "start_music":
                 if not room_id:
-                    await websocket.send_json({"type": "error", "message": "Not in a room"})
+                    room_service.send_json(websocket, {"type": "error", "message": "Not in a room"})
                     continue
                 room = room_service.rooms.get(room_id)
                 if not room:
-                    await websocket.send_json({"type": "error", "message": "Room not found"})
+                    room_service.send_json(websocket, {"type": "error", "message": "Room not found"})
                     continue
                 if room.host_id != user_id:
-                    await websocket.send_json({"type": "error", "message": "Only host can start music"})
+                    room_service.send_json(websocket, {"type": "error", "message": "Only host can start music"})
                     continue
 
                 try:
                     room.is_playing = True
+                    room_service.mark_state_dirty(room_id)
                     await lyria_service.start_session(room_id, initial_bpm=room.bpm)
                     room_service.start_tick_loop(room_id, _arbitration_tick)
                     await room_service.broadcast_json(room_id, {"type": "music_started"})
                 except Exception as e:
                     room.is_playing = False
+                    room_service.mark_state_dirty(room_id)
                     print(f"[WS] start_music failed for room {room_id}: {e}")
-                    await websocket.send_json({"type": "error", "message": f"Failed to start music: {str(e)}"})
+                    room_service.send_json(websocket, {"type": "error", "message": f"Failed to start music: {str(e)}"})
 
             # ── STOP MUSIC ───────────────────────────────────────────────────
             elif msg_type == "stop_music":
@@ -226,8 +500,10 @@ async def websocket_endpoint(websocket: WebSocket):
                 room = room_service.rooms.get(room_id)
                 if room and room.host_id == user_id:
                     room.is_playing = False
+                    room_service.mark_state_dirty(room_id)
                     room_service.stop_tick_loop(room_id)
                     await lyria_service.stop_session(room_id)
+                    room_service.release_audio_buffer(room_id)
                     await room_service.broadcast_json(room_id, {"type": "music_stopped"})
 
             # ── CLOSE ROOM (host leaves) ─────────────────────────────────────
@@ -236,7 +512,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     continue
                 room = room_service.rooms.get(room_id)
                 if not room or room.host_id != user_id:
-                    await websocket.send_json({"type": "error", "message": "Only host can close the room"})
+                    room_service.send_json(websocket, {"type": "error", "message": "Only host can close the room"})
                     continue
                 # Stop music if playing
                 if room.is_playing:
@@ -250,6 +526,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 })
                 # Destroy all room state
                 room_service.destroy_room(room_id)
+                gemini_service.forget_room(room_id)
+                _forget_local(room_id)
                 print(f"[WS] Room {room_id} closed by host {user_id}")
                 room_id = None
 
@@ -264,6 +542,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     try:
                         role = Role(role_str)
                         room_service.update_input(room_id, role, payload)
+                        _queue_local_apply(room_id, role.value, payload)
                     except ValueError:
                         pass  # Unknown role, ignore
 
@@ -314,13 +593,15 @@ async def websocket_endpoint(websocket: WebSocket):
                         "density":         new_density,
                         "brightness":      new_brightness,
                     }
+                    room_service.mark_state_dirty(room_id)
 
                     # Immediate Lyria push with zone-specific prompts so the music
                     # CHARACTER changes, not just density/brightness numbers
                     if room.is_playing:
                         session_data = lyria_service._sessions.get(room_id)
                         if session_data:
-                            base = session_data.get("last_prompts") or [
+                            # Overlay on a pending arbitration update too, not only on what was last sent
+                            base = lyria_service.current_prompts(room_id) or [
                                 genai_types.WeightedPrompt(text="ambient electronic music", weight=1.0)
                             ]
                             if zone == "HIGH":
@@ -368,7 +649,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 needed = room_service.get_drop_threshold(room_id)
 
                 if result == "already_voted":
-                    await websocket.send_json({
+                    room_service.send_json(websocket, {
                         "type": "drop_already_voted",
                         "count": room_service.get_drop_vote_count(room_id),
                         "needed": needed,
@@ -405,61 +686,12 @@ async def websocket_endpoint(websocket: WebSocket):
                     snap_density = room.density if room else 0.5
                     snap_brightness = room.brightness if room else 0.5
 
-                    async def _fire_drop(rid=room_id, r=room, dp=drop_prompts,
-                                         floor_d=snap_density, floor_b=snap_brightness):
-                        # Build steps: always increase from current state, never dip.
-                        # BPM held constant — no reset_context(), audio stays continuous.
-                        for overlay_w, density_t, brightness_t in [
-                            (0.30, 0.88, 0.88),   # t=1s: strong lift from current floor
-                            (0.55, 0.96, 0.96),   # t=2s: near-peak build
-                        ]:
-                            await asyncio.sleep(1)
-                            if not (r and r.is_playing):
-                                break
-                            session_data = lyria_service._sessions.get(rid)
-                            if session_data:
-                                base = session_data.get("last_prompts") or [
-                                    genai_types.WeightedPrompt(text="ambient electronic music", weight=1.0)
-                                ]
-                                build_prompts = [
-                                    genai_types.WeightedPrompt(
-                                        text="rising tension, building energy, anticipation, crescendo, louder",
-                                        weight=overlay_w,
-                                    )
-                                ] + base[:1]
-                                try:
-                                    await lyria_service.update_prompts(
-                                        room_id=rid,
-                                        prompts=build_prompts,
-                                        bpm=session_data.get("bpm", r.bpm),
-                                        # max() ensures we never go below current energy
-                                        density=max(floor_d, density_t),
-                                        brightness=max(floor_b, brightness_t),
-                                    )
-                                except Exception as e:
-                                    print(f"[WS] Drop build step failed (non-fatal): {e}")
-
-                        # t=3s: drop — full energy (1.0/1.0), same BPM, no reset_context()
-                        await asyncio.sleep(1)
-                        if r and r.is_playing:
-                            try:
-                                session_data = lyria_service._sessions.get(rid)
-                                current_bpm = session_data.get("bpm", r.bpm) if session_data else r.bpm
-                                await lyria_service.update_prompts(
-                                    room_id=rid,
-                                    prompts=dp,
-                                    bpm=current_bpm,  # same BPM — no cut, smooth morph
-                                    density=1.0,
-                                    brightness=1.0,   # full brightness — never a dip
-                                )
-                            except Exception as e:
-                                print(f"[WS] Drop Lyria update failed (non-fatal): {e}")
-                        # Always broadcast drop_triggered so UI resets
-                        await room_service.broadcast_json(rid, {
-                            "type": "drop_triggered",
-                            "message": "🔥 DROP!"
-                        })
-                    asyncio.create_task(_fire_drop())
+                    # Build steps at t=1s and t=2s, the drop at t=3s — on the shared timer
+                    # wheel, so destroying the room cancels whatever hasn't fired yet.
+                    # BPM held constant — no reset_context(), audio stays continuous.
+                    for delay, step in ((1, (0.30, 0.88, 0.88)), (2, (0.55, 0.96, 0.96))):
+                        timer_wheel.call_later(delay, _drop_build_step, room_id, room, step, snap_density, snap_brightness, group=room_id)
+                    timer_wheel.call_later(3, _fire_drop, room_id, room, drop_prompts, group=room_id)
 
                 elif result == "registered":
                     count = room_service.get_drop_vote_count(room_id)
@@ -470,17 +702,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     })
                     # On first vote, start 10-second expiry window
                     if count == 1:
-                        async def _expire_drop(rid=room_id):
-                            await asyncio.sleep(10.0)
-                            if room_service.get_drop_vote_count(rid) > 0:
-                                room_service.reset_drop_votes(rid)
-                                n = room_service.get_drop_threshold(rid)
-                                await room_service.broadcast_json(rid, {
-                                    "type": "drop_reset",
-                                    "needed": n,
-                                    "message": "Not enough votes — try again",
-                                })
-                        asyncio.create_task(_expire_drop())
+                        timer_wheel.call_later(10.0, _expire_drop, room_id, group=room_id)
 
             # ── CHANGE ROLE ────────────────────────────────────────────────
             elif msg_type == "change_role":
@@ -492,33 +714,36 @@ async def websocket_endpoint(websocket: WebSocket):
                             new_role = RoleEnum(role_str)
                             old_role_val = room_service.change_user_role(room_id, user_id, new_role)
                             if old_role_val:
-                                await websocket.send_json({
+                                room_service.send_json(websocket, {
                                     "type": "role_changed",
                                     "role": new_role.value,
                                     "old_role": old_role_val,
                                 })
                                 if room_id in room_service.rooms:
-                                    state_msg = room_service.get_state_update_message(room_id)
-                                    await room_service.broadcast_json(room_id, state_msg)
+                                    await room_service.broadcast_state(room_id)
                             else:
-                                await websocket.send_json({
+                                room_service.send_json(websocket, {
                                     "type": "role_taken",
                                     "role": role_str,
                                     "message": f"Role {role_str} is already taken",
                                 })
                         except ValueError:
-                            await websocket.send_json({"type": "error", "message": f"Unknown role: {role_str}"})
+                            room_service.send_json(websocket, {"type": "error", "message": f"Unknown role: {role_str}"})
 
             # ── UPDATE DISPLAY NAME ────────────────────────────────────────
             elif msg_type == "update_display_name":
                 if room_id and user_id:
                     new_name = msg.get("display_name", "")
                     if new_name:
-                        room_service.user_display_names.setdefault(room_id, {})[user_id] = new_name
+                        room_service.set_display_name(room_id, user_id, new_name)
                         # Broadcast updated state so all clients see the new name
                         if room_id in room_service.rooms:
-                            state_msg = room_service.get_state_update_message(room_id)
-                            await room_service.broadcast_json(room_id, state_msg)
+                            await room_service.broadcast_state(room_id)
+
+            # ── RESYNC STATE (delta client detected a version gap) ─────────
+            elif msg_type == "resync_state":
+                if room_id:
+                    room_service.send_state(room_id, websocket)
 
             # ── LEAVE ROOM ──────────────────────────────────────────────────
             elif msg_type == "leave_room":
@@ -526,8 +751,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     room_service.remove_user(room_id, user_id)
                     # Broadcast updated participants
                     if room_id in room_service.rooms:
-                        state_msg = room_service.get_state_update_message(room_id)
-                        await room_service.broadcast_json(room_id, state_msg)
+                        await room_service.broadcast_state(room_id)
 
             # ── END STREAM ──────────────────────────────────────────────────
             elif msg_type == "end_stream":
@@ -537,6 +761,8 @@ async def websocket_endpoint(websocket: WebSocket):
                         await room_service.broadcast_json(room_id, {"type": "room_ended"})
                         await lyria_service.stop_session(room_id)
                         room_service.destroy_room(room_id)
+                        gemini_service.forget_room(room_id)
+                        _forget_local(room_id)
 
 
     except WebSocketDisconnect:
@@ -544,6 +770,11 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         print(f"[WS] Unexpected error: {e}")
     finally:
-        heartbeat_task.cancel()
-        if room_id and user_id:
+        heartbeat.cancel()
+        if listening:
+            room_service.remove_listener(room_id, websocket)
+        elif room_id and user_id:
             room_service.remove_connection(room_id, user_id, websocket)
+        if room_id:
+            _left_room(room_id)
+        room_service.close_outbound(websocket)
@@ -0,0 +1,222 @@
+"""
+Arbitration Backends
+Pluggable engines behind GeminiService.arbitrate. The Gemini LLM path lives in
+GeminiService itself; this module defines the backend interface and ships the
+offline rule-based engine, which composes weighted prompts from vocabulary tables
+with no network access. Rooms can use it as their primary engine or as the
+fallback when Gemini fails, and load tests use it as a stand-in for the LLM.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from models.schemas import ArbitrationResult, WeightedPrompt
+
+
+class ArbitrationBackend(ABC):
+    """A named engine that turns crowd inputs into an ArbitrationResult."""
+
+    name = ""
+
+    @abstractmethod
+    async def arbitrate(
+        self,
+        room_id: str,
+        current_inputs: Dict[str, Any],
+        current_bpm: int,
+        current_density: float,
+        current_brightness: float,
+        previous: Optional[ArbitrationResult],
+    ) -> ArbitrationResult:
+        """This room's next result; `previous` is the result currently playing, if any."""
+
+    def forget_room(self, room_id: str):
+        """Drop any per-room state when a room is destroyed."""
+
+
+# Vocabulary tables — keys are the frontend's GENRES / MOODS / INSTRUMENTS,
+# lowercased with punctuation and spaces removed (see _vocab_key)
+GENRE_PHRASES = {
+    "trap": "trap beat with rolling 808s and crisp hi-hats",
+    "lofi": "lo-fi groove with dusty vinyl crackle and lazy swung drums",
+    "afrobeat": "afrobeat groove with syncopated percussion and bright guitar licks",
+    "jazz": "jazz combo with brushed drums and walking upright bass",
+    "orchestral": "orchestral score with sweeping strings and swelling brass",
+    "techno": "driving techno with a pounding four-on-the-floor kick and hypnotic synth stabs",
+    "ambient": "ambient soundscape with slowly evolving pads and distant textures",
+    "hiphop": "boom-bap hip-hop beat with punchy drums and chopped samples",
+    "funk": "funk groove with slap bass and tight syncopated drums",
+    "drumbass": "drum and bass with fast breakbeats and a deep rolling sub bass",
+    "synthwave": "synthwave with retro analog synths and gated reverb drums",
+    "reggae": "reggae groove with offbeat skank guitar and a deep dub bassline",
+    "house": "house groove with a steady four-on-the-floor kick and warm chords",
+    "classical": "classical piece with a chamber ensemble and graceful melodies",
+    "rb": "smooth R&B groove with silky chords and laid-back drums",
+}
+
+MOOD_WORDS = {
+    "dark": "dark, brooding",
+    "euphoric": "euphoric, uplifting",
+    "melancholic": "melancholic, bittersweet",
+    "tense": "tense, suspenseful",
+    "dreamy": "dreamy, hazy",
+    "energetic": "energetic, driving",
+    "chill": "chill, relaxed",
+    "mystical": "mystical, otherworldly",
+    "romantic": "romantic, tender",
+    "aggressive": "aggressive, hard-hitting",
+    "playful": "playful, bouncy",
+    "ethereal": "ethereal, floating",
+}
+
+INSTRUMENT_PHRASES = {
+    "synthbass": "a fat synth bass",
+    "piano": "expressive piano chords",
+    "electricguitar": "a gritty electric guitar",
+    "violin": "a soaring violin line",
+    "trumpet": "a bold trumpet melody",
+    "drums": "live acoustic drums",
+    "kalimba": "a twinkling kalimba",
+    "flute": "an airy flute melody",
+    "808": "booming 808 bass",
+    "rhodespiano": "warm Rhodes piano",
+    "cello": "a rich cello layer",
+    "synthpads": "lush synth pads",
+    "marimba": "a mellow marimba",
+    "harp": "shimmering harp arpeggios",
+    "trombone": "a brassy trombone",
+}
+
+BASE_GENRE = "ambient electronic music with soft synth pads"
+
+# Continuity: the new main prompt never fully replaces the previous one in a single
+# step — the previous main prompt stays in the mix at this weight (a crossfade)
+CARRY_WEIGHT = 0.35
+CUSTOM_WEIGHT = 0.2
+
+
+def _vocab_key(word: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", word.lower())
+
+
+def _text_input(inputs: Dict[str, Any], role: str, field: str) -> str:
+    """A textual input as a string ("" if absent). Payloads come straight from clients."""
+    payload = inputs.get(role)
+    value = payload.get(field) if isinstance(payload, dict) else None
+    return "" if value is None else str(value)
+
+
+def _split_moods(mood: str) -> List[str]:
+    # The frontend joins selected moods with spaces ("Dark Dreamy")
+    return [m for m in mood.split() if m]
+
+
+def _split_instruments(instrument: str) -> List[str]:
+    # The frontend joins selected instruments with " and " ("Piano and Cello")
+    return [i.strip() for i in re.split(r"\s+and\s+|,", instrument) if i.strip()]
+
+
+class RuleBasedBackend(ArbitrationBackend):
+    """
+    Deterministic, offline arbitration. Keeps a per-room scene (genre, moods,
+    instruments) updated from inputs and renders it into 2-3 weighted prompts,
+    following the continuity rules of ARBITRATION_SYSTEM_PROMPT: the previous main
+    prompt is carried at CARRY_WEIGHT when the scene changes, custom prompts are
+    woven in rather than replacing anything. Density and brightness come from the
+    room (energy inputs already applied) and the drummer's BPM wins, as on the
+    Gemini path.
+    """
+
+    name = "rules"
+
+    def __init__(self):
+        # room_id → {"genre": str, "moods": [...], "instruments": [...]}
+        self._scenes: Dict[str, Dict[str, Any]] = {}
+
+    async def arbitrate(self, room_id, current_inputs, current_bpm, current_density, current_brightness, previous):
+        return self.compose(room_id, current_inputs, current_bpm, current_density, current_brightness, previous)
+
+    def compose(
+        self,
+        room_id: str,
+        current_inputs: Dict[str, Any],
+        current_bpm: int,
+        current_density: float,
+        current_brightness: float,
+        previous: Optional[ArbitrationResult],
+    ) -> ArbitrationResult:
+        """Synchronous core of arbitrate(); runs in microseconds."""
+        scene = self._scenes.setdefault(room_id, {"genre": "", "moods": [], "instruments": []})
+        changes = []
+        genre = _text_input(current_inputs, "genre_dj", "genre")
+        if genre and genre != scene["genre"]:
+            scene["genre"] = genre
+            changes.append(f"genre → {genre}")
+        mood = _text_input(current_inputs, "vibe_setter", "mood")
+        if mood and _split_moods(mood) != scene["moods"]:
+            scene["moods"] = _split_moods(mood)
+            changes.append(f"mood → {mood}")
+        instrument = _text_input(current_inputs, "instrumentalist", "instrument")
+        if instrument and _split_instruments(instrument) != scene["instruments"]:
+            scene["instruments"] = _split_instruments(instrument)
+            changes.append(f"adding {instrument}")
+
+        main = self._render(scene, current_density, current_brightness)
+        prompts = [WeightedPrompt(text=main, weight=1.0)]
+        if previous and previous.prompts and previous.prompts[0].text != main:
+            prompts = [
+                WeightedPrompt(text=main, weight=round(1.0 - CARRY_WEIGHT, 3)),
+                WeightedPrompt(text=previous.prompts[0].text, weight=CARRY_WEIGHT),
+            ]
+
+        custom = next((_text_input(current_inputs, role, "custom_prompt") for role in current_inputs
+                       if _text_input(current_inputs, role, "custom_prompt")), None)
+        if custom:
+            scale = 1.0 - CUSTOM_WEIGHT
+            prompts = [WeightedPrompt(text=p.text, weight=round(p.weight * scale, 3)) for p in prompts]
+            prompts.append(WeightedPrompt(text=custom, weight=CUSTOM_WEIGHT))
+            changes.append(f'weaving in "{custom}"')
+        # Absorb rounding so weights sum exactly to 1.0
+        prompts[0].weight = round(1.0 - sum(p.weight for p in prompts[1:]), 3)
+
+        try:
+            bpm = int(float(_text_input(current_inputs, "drummer", "bpm") or current_bpm))
+        except (ValueError, OverflowError):
+            bpm = int(current_bpm)
+
+        return ArbitrationResult(
+            prompts=prompts,
+            bpm=max(60, min(200, bpm)),
+            density=max(0.0, min(1.0, float(current_density))),
+            brightness=max(0.0, min(1.0, float(current_brightness))),
+            reasoning=f"Rule engine: {', '.join(changes)}" if changes else "Rule engine: holding the current scene",
+        )
+
+    @staticmethod
+    def _render(scene: Dict[str, Any], density: float, brightness: float) -> str:
+        genre = scene["genre"]
+        text = GENRE_PHRASES.get(_vocab_key(genre), f"{genre.lower()} track") if genre else BASE_GENRE
+        moods = [MOOD_WORDS.get(_vocab_key(m), m.lower()) for m in scene["moods"]]
+        if moods:
+            text = f"{', '.join(moods)} {text}"
+        instruments = [INSTRUMENT_PHRASES.get(_vocab_key(i), i.lower()) for i in scene["instruments"]]
+        if instruments:
+            text += ", featuring " + " and ".join(instruments)
+        texture = []
+        if density >= 0.7:
+            texture.append("dense and layered")
+        elif density <= 0.3:
+            texture.append("sparse and minimal")
+        if brightness >= 0.7:
+            texture.append("bright and shimmering")
+        elif brightness <= 0.3:
+            texture.append("warm and muffled")
+        if texture:
+            text += ", " + ", ".join(texture)
+        return text
+
+    def forget_room(self, room_id: str):
+        self._scenes.pop(room_id, None)
+
+
+rule_backend = RuleBasedBackend()
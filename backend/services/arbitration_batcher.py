@@ -0,0 +1,142 @@
+"""
+Arbitration Batcher
+Collects Gemini arbitration jobs from different rooms that arrive within a short
+window and sends them as one multi-room request, then splits the reply back per
+room. A lone job, or any job whose part of the batch can't be used, is handed back
+to the caller (None) so it falls back to its own per-room call.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# How long the first job in a batch waits for others; 0 disables batching
+ARBITRATION_BATCH_WINDOW = float(os.getenv("ARBITRATION_BATCH_WINDOW", "0.05"))
+ARBITRATION_BATCH_MAX = int(os.getenv("ARBITRATION_BATCH_MAX", "8"))
+
+BATCH_INSTRUCTIONS = """
+BATCH MODE: this request contains several independent rooms, each under a
+"### Room <key>" heading. Arbitrate every room on its own, applying all the rules
+above per room — never mix inputs or prompts between rooms.
+Return ONLY one JSON object mapping each room key to that room's result in the
+exact single-room format:
+{
+  "rooms": {
+    "<key>": { "prompts": [...], "bpm": 100, "density": 0.5, "brightness": 0.5, "reasoning": "..." }
+  }
+}
+"""
+
+
+def batch_contents(jobs: List[Tuple[str, str]]) -> str:
+    """One request body for (key, single-room summary) pairs."""
+    return "\n\n".join(f"### Room {key}\n{summary}" for key, summary in jobs)
+
+
+class ArbitrationBatcher:
+    """
+    `send(contents, size)` performs the multi-room call and returns the parsed JSON
+    reply. Exceptions from it other than a timeout make every job in the batch fall
+    back to a per-room call; a timeout is raised to every caller, as for a single call.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, int], Awaitable[Dict[str, Any]]],
+        window: float = ARBITRATION_BATCH_WINDOW,
+        max_size: int = ARBITRATION_BATCH_MAX,
+    ):
+        self._send = send
+        self.window = window
+        self.max_size = max_size
+        self._pending: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_jobs = 0
+        self.fallbacks = 0
+        self.size_histogram: Dict[int, int] = {}
+        self.last_batch_ms = 0.0
+        self._total_batch_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_size > 1
+
+    async def submit(self, room_id: str, summary: str) -> Optional[Dict[str, Any]]:
+        """This room's slice of a batched reply, or None if the caller should make its own call."""
+        if not self.enabled or room_id in self._pending:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._pending[room_id] = (summary, future)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand everything pending to a new batch request and start collecting afresh."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if len(batch) == 1:
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_result(None)
+        elif batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: Dict[str, Tuple[str, asyncio.Future]]):
+        keys = {f"r{i}": room_id for i, room_id in enumerate(batch)}
+        start = time.perf_counter()
+        try:
+            reply = await self._send(batch_contents([(key, batch[room_id][0]) for key, room_id in keys.items()]), len(batch))
+            rooms = reply.get("rooms", {}) if isinstance(reply, dict) else {}
+        except asyncio.TimeoutError as e:
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except asyncio.CancelledError:
+            for _, future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            print(f"[Gemini] Batch of {len(batch)} failed ({e}) — falling back to per-room calls")
+            rooms = {}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._record(len(batch), elapsed_ms)
+
+        for key, room_id in keys.items():
+            future = batch[room_id][1]
+            if future.done():
+                continue
+            data = rooms.get(key)
+            if not isinstance(data, dict):
+                self.fallbacks += 1
+                data = None
+            future.set_result(data)
+
+    def _record(self, size: int, elapsed_ms: float):
+        self.batches += 1
+        self.batched_jobs += size
+        self.size_histogram[size] = self.size_histogram.get(size, 0) + 1
+        self.last_batch_ms = elapsed_ms
+        self._total_batch_ms += elapsed_ms
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window,
+            "max_size": self.max_size,
+            "batches": self.batches,
+            "batched_jobs": self.batched_jobs,
+            "avg_batch_size": round(self.batched_jobs / self.batches, 2) if self.batches else 0.0,
+            "size_histogram": dict(sorted(self.size_histogram.items())),
+            "fallbacks": self.fallbacks,
+            "last_batch_ms": round(self.last_batch_ms, 1),
+            "avg_batch_ms": round(self._total_batch_ms / self.batches, 1) if self.batches else 0.0,
+        }
@@ -0,0 +1,113 @@
+"""
+Arbitration Cache
+LRU + TTL cache of Gemini arbitration results, keyed by a canonical hash of what
+the model sees: normalized crowd inputs, rounded music state and previous prompts.
+A crowd repeating a combination it already sent skips the LLM call entirely.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.schemas import ArbitrationResult, WeightedPrompt
+
+ARBITRATION_CACHE_SIZE = int(os.getenv("ARBITRATION_CACHE_SIZE", "256"))
+ARBITRATION_CACHE_TTL = float(os.getenv("ARBITRATION_CACHE_TTL", "300"))
+
+# Decimal places kept for float state (density, brightness, weights) in the key
+KEY_PRECISION = 2
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return round(value, KEY_PRECISION)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def arbitration_key(
+    inputs: Dict[str, Any],
+    bpm: int,
+    density: float,
+    brightness: float,
+    previous: Optional[List[WeightedPrompt]],
+) -> str:
+    """Canonical hash of one arbitration request. Equal requests hash equal regardless of dict order or case."""
+    canonical = json.dumps(
+        [
+            _normalize(inputs),
+            int(round(bpm)),
+            round(density, KEY_PRECISION),
+            round(brightness, KEY_PRECISION),
+            [(_normalize(p.text), round(p.weight, KEY_PRECISION)) for p in previous or []],
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class ArbitrationCache:
+    """Bounded LRU with per-entry expiry. Not thread-safe; used from the event loop only."""
+
+    def __init__(self, maxsize: int = ARBITRATION_CACHE_SIZE, ttl: float = ARBITRATION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, ArbitrationResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[ArbitrationResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: ArbitrationResult):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
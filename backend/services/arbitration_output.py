@@ -0,0 +1,150 @@
+"""
+Arbitration Output
+Parses and validates Gemini's arbitration replies. Single-room calls are sent with
+response_schema=ArbitrationResult, so the reply normally validates in one pass
+through a precompiled pydantic TypeAdapter. Near-miss replies (markdown fences,
+prose around the JSON, trailing commas, Python-style quotes, output cut off at the
+token limit, bare-string prompts, "High"/"Low" levels) are repaired locally instead
+of re-calling the model.
+"""
+import ast
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from models.schemas import ArbitrationResult
+
+RESULT_ADAPTER = TypeAdapter(ArbitrationResult)
+JSON_ADAPTER = TypeAdapter(Any)
+
+# Words the model sometimes returns for density/brightness instead of a float
+LEVEL_WORDS = {
+    "very low": 0.1, "low": 0.25, "medium": 0.5, "mid": 0.5, "moderate": 0.5,
+    "high": 0.75, "very high": 0.9,
+}
+
+
+class ArbitrationOutputError(ValueError):
+    """A reply that could not be parsed or repaired into an ArbitrationResult."""
+
+
+def parse_result(text: str) -> Tuple[ArbitrationResult, bool]:
+    """A single-room reply as (result, repaired)."""
+    try:
+        return RESULT_ADAPTER.validate_json(text or ""), False
+    except ValidationError:
+        pass
+    data, _ = parse_json(text)
+    result, _ = validate_result(data)
+    return result, True
+
+
+def parse_json(text: str) -> Tuple[Any, bool]:
+    """Any JSON reply as (data, repaired); raises ArbitrationOutputError if unrecoverable."""
+    try:
+        return JSON_ADAPTER.validate_json(text or ""), False
+    except ValidationError:
+        pass
+    candidate = _repair_text(text or "")
+    for load in (json.loads, ast.literal_eval):
+        try:
+            return load(candidate), True
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            # literal_eval raises TypeError on e.g. unhashable keys, and the deep-nesting errors on hostile input
+            continue
+    raise ArbitrationOutputError(f"unparseable reply: {(text or '')[:80]!r}")
+
+
+def validate_result(data: Any) -> Tuple[ArbitrationResult, bool]:
+    """One room's decoded reply as (result, repaired)."""
+    try:
+        return RESULT_ADAPTER.validate_python(data), False
+    except ValidationError:
+        pass
+    if not isinstance(data, dict):
+        raise ArbitrationOutputError(f"expected an object, got {type(data).__name__}")
+    try:
+        return RESULT_ADAPTER.validate_python(_repair_fields(data)), True
+    except ValidationError as e:
+        raise ArbitrationOutputError(f"invalid result: {e.error_count()} error(s), first: {e.errors()[0]['msg']}") from e
+
+
+def _repair_text(text: str) -> str:
+    raw = text.strip()
+    fenced = re.search(r"```(?:json)?\s*([\s\S]+?)(?:```|$)", raw)
+    if fenced:
+        raw = fenced.group(1).strip()
+    start = raw.find("{")
+    if start < 0:
+        return raw
+    raw = _first_object(raw[start:])
+    return re.sub(r",\s*([}\]])", r"\1", raw)
+
+
+def _first_object(raw: str) -> str:
+    """
+    The first top-level object in `raw`, dropping anything after it; if the reply
+    was cut off mid-object, the strings and brackets left open are closed.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    for i, ch in enumerate(raw):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+            if not stack:
+                return raw[:i + 1]
+    if in_string:
+        raw += '"'
+    # Drop a dangling key or separator the cut left behind
+    raw = re.sub(r'(,\s*"[^"]*"\s*:?\s*|[,:]\s*)$', "", raw)
+    return raw + "".join(reversed(stack))
+
+
+def _level(value: Any) -> Any:
+    if isinstance(value, str):
+        word = value.strip().lower()
+        if word in LEVEL_WORDS:
+            return LEVEL_WORDS[word]
+    return value
+
+
+def _repair_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    data = dict(data)
+    prompts = data.get("prompts")
+    if isinstance(prompts, (str, dict)):
+        prompts = [prompts]
+    if isinstance(prompts, list):
+        fixed = []
+        for p in prompts:
+            if isinstance(p, str):
+                p = {"text": p}
+            if isinstance(p, dict):
+                p = dict(p)
+                p.setdefault("text", p.pop("prompt", None))
+                p.setdefault("weight", 1.0 / len(prompts))
+                fixed.append(p)
+        data["prompts"] = fixed
+    for field in ("density", "brightness"):
+        if field in data:
+            data[field] = _level(data[field])
+    if isinstance(data.get("bpm"), (float, str)):
+        try:
+            data["bpm"] = round(float(data["bpm"]))
+        except (ValueError, OverflowError):
+            pass  # nan / inf: left as-is for validation to reject
+    reasoning = data.get("reasoning")
+    data["reasoning"] = reasoning if isinstance(reasoning, str) else ""
+    return data
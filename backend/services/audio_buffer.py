@@ -0,0 +1,76 @@
+"""
+Audio Ring Buffer
+Fixed-memory buffer of the last few seconds of a room's Lyria audio frames, so late
+joiners and reconnecting clients get an immediate pre-roll instead of silence.
+"""
+import os
+from typing import List
+
+# Lyria RealTime output format: 48 kHz, stereo, 16-bit little-endian PCM
+SAMPLE_RATE = 48000
+CHANNELS = 2
+SAMPLE_BYTES = 2
+FRAME_BYTES = CHANNELS * SAMPLE_BYTES
+BYTES_PER_SECOND = SAMPLE_RATE * FRAME_BYTES
+
+# Seconds of audio kept per playing room and replayed to new sockets
+AUDIO_PREROLL_SECONDS = float(os.getenv("AUDIO_PREROLL_SECONDS", "2.0"))
+
+
+def seconds_to_bytes(seconds: float) -> int:
+    """Byte length of `seconds` of PCM, rounded down to a whole frame."""
+    return int(seconds * SAMPLE_RATE) * FRAME_BYTES
+
+
+class AudioRingBuffer:
+    """
+    Preallocated circular buffer of bytes. Memory never grows after construction.
+    Writes of fixed-size records (audio frames) stay record-aligned as long as
+    capacity is a multiple of the record size.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(self.capacity)
+        self._pos = 0
+        self._filled = 0
+
+    def write(self, data: bytes):
+        cap = self.capacity
+        if not cap or not data:
+            return
+        view = memoryview(data)
+        if len(view) > cap:
+            view = view[-cap:]
+        n = len(view)
+        end = self._pos + n
+        if end <= cap:
+            self._buf[self._pos:end] = view
+        else:
+            first = cap - self._pos
+            self._buf[self._pos:] = view[:first]
+            self._buf[:n - first] = view[first:]
+        self._pos = end % cap
+        self._filled = min(cap, self._filled + n)
+
+    def read(self) -> bytes:
+        """Everything buffered, oldest first."""
+        n = self._filled
+        start = (self._pos - n) % self.capacity if self.capacity else 0
+        if start + n <= self.capacity:
+            return bytes(self._buf[start:start + n])
+        return bytes(self._buf[start:]) + bytes(self._buf[:self._pos])
+
+    def preroll_chunks(self, chunk_bytes: int) -> List[bytes]:
+        """Everything buffered, oldest first, split into `chunk_bytes` pieces."""
+        data = self.read()
+        step = chunk_bytes or len(data)
+        return [data[i:i + step] for i in range(0, len(data), step)]
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._filled
+
+    def clear(self):
+        self._pos = 0
+        self._filled = 0
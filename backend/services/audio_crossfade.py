@@ -0,0 +1,46 @@
+"""
+Audio Crossfade
+Equal-power blends of 48 kHz stereo int16 PCM, used when a room's audio switches from
+one Lyria session to its replacement so listeners hear neither a gap nor a click.
+"""
+import os
+
+import numpy as np
+
+from services.audio_buffer import CHANNELS, FRAME_BYTES, SAMPLE_RATE
+
+LYRIA_CROSSFADE_MS = int(os.getenv("LYRIA_CROSSFADE_MS", "250"))
+
+
+def fade_frames(ms: int = LYRIA_CROSSFADE_MS) -> int:
+    return SAMPLE_RATE * ms // 1000
+
+
+def _frames(pcm: bytes, count: int) -> np.ndarray:
+    return np.frombuffer(pcm, dtype=np.int16, count=count * CHANNELS).reshape(count, CHANNELS).astype(np.float32)
+
+
+def crossfade(old: bytes, new: bytes, frames: int) -> bytes:
+    """
+    `new`, with its first `frames` frames blended over the start of `old` (the old
+    stream's audio for the same stretch of time). The rest of `old` is dropped.
+    The blend is capped at the shorter of `old` and `new`, so callers pass at least
+    `frames` frames of each for the full window.
+    """
+    count = min(frames, len(old) // FRAME_BYTES, len(new) // FRAME_BYTES)
+    if count == 0:
+        return new
+    ramp = np.linspace(0.0, np.pi / 2, count, endpoint=False)[:, None]
+    mixed = _frames(old, count) * np.cos(ramp) + _frames(new, count) * np.sin(ramp)
+    head = np.clip(mixed, -32768, 32767).astype(np.int16).tobytes()
+    return head + new[count * FRAME_BYTES:]
+
+
+def fade_in(new: bytes, frames: int) -> bytes:
+    """`new` ramped up from silence over its first `frames` frames."""
+    count = min(frames, len(new) // FRAME_BYTES)
+    if count == 0:
+        return new
+    ramp = np.sin(np.linspace(0.0, np.pi / 2, count, endpoint=False))[:, None]
+    head = (_frames(new, count) * ramp).astype(np.int16).tobytes()
+    return head + new[count * FRAME_BYTES:]
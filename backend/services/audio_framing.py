@@ -0,0 +1,70 @@
+"""
+Audio Framing
+Coalesces Lyria's variable-size PCM chunks into fixed-duration frames and prefixes
+each with a compact binary header so clients can detect loss and measure latency.
+
+Header (little-endian, 20 bytes), followed by the frame's PCM:
+  uint32   sequence       — +1 per frame, per room (wraps at 2**32)
+  uint64   sample_offset  — first sample (per channel) of the frame since the room started playing
+  float64  server_time    — Unix time in seconds when the frame was completed on the server
+"""
+import os
+import struct
+import time
+from typing import List
+from services.audio_buffer import FRAME_BYTES, seconds_to_bytes
+
+HEADER = struct.Struct("<IQd")
+HEADER_SIZE = HEADER.size
+
+# Duration of one coalesced frame
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "100"))
+FRAME_PCM_BYTES = seconds_to_bytes(AUDIO_FRAME_MS / 1000)
+FRAME_SAMPLES = FRAME_PCM_BYTES // FRAME_BYTES
+# Header + PCM — every frame produced by AudioFramer is exactly this long
+FRAMED_SIZE = HEADER_SIZE + FRAME_PCM_BYTES
+
+
+def pcm_view(frame: bytes) -> memoryview:
+    """The PCM payload of a frame, without copying it."""
+    return memoryview(frame)[HEADER_SIZE:]
+
+
+class AudioFramer:
+    """Per-room framing stage between the Lyria receive loop and the broadcast."""
+
+    def __init__(self, frame_pcm_bytes: int = FRAME_PCM_BYTES):
+        self.frame_pcm_bytes = frame_pcm_bytes
+        self.sequence = 0
+        self.sample_offset = 0
+        # Slices of incoming chunks waiting to fill the next frame (no copies yet)
+        self._pending: List[memoryview] = []
+        self._pending_bytes = 0
+        # Counters
+        self.chunks_in = 0
+        self.frames_out = 0
+
+    def push(self, chunk: bytes) -> List[bytes]:
+        """Add a Lyria chunk; return any frames it completed (header + PCM)."""
+        self.chunks_in += 1
+        frames = []
+        view = memoryview(chunk)
+        while len(view):
+            need = self.frame_pcm_bytes - self._pending_bytes
+            piece, view = view[:need], view[need:]
+            self._pending.append(piece)
+            self._pending_bytes += len(piece)
+            if self._pending_bytes == self.frame_pcm_bytes:
+                frames.append(self._emit())
+        return frames
+
+    def _emit(self) -> bytes:
+        header = HEADER.pack(self.sequence & 0xFFFFFFFF, self.sample_offset, time.time())
+        # The only copy of the PCM: pending slices go straight into the frame
+        frame = b"".join([header, *self._pending])
+        self._pending.clear()
+        self._pending_bytes = 0
+        self.sequence += 1
+        self.sample_offset += self.frame_pcm_bytes // FRAME_BYTES
+        self.frames_out += 1
+        return frame
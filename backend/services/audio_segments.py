@@ -0,0 +1,89 @@
+"""
+Audio Segments
+Cuts a room's Lyria audio into short, immutable, sequence-numbered WAV segments
+for plain HTTP delivery. Each segment is built once from the receive loop and
+never changes, so a CDN or reverse proxy can cache it and absorb the fan-out.
+"""
+import os
+import struct
+import uuid
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from services.audio_buffer import SAMPLE_RATE, CHANNELS, SAMPLE_BYTES, BYTES_PER_SECOND, seconds_to_bytes
+
+# Seconds of audio per segment, and how many finished segments each room keeps
+AUDIO_SEGMENT_SECONDS = float(os.getenv("AUDIO_SEGMENT_SECONDS", "2.0"))
+AUDIO_SEGMENT_WINDOW = int(os.getenv("AUDIO_SEGMENT_WINDOW", "6"))
+
+SEGMENT_PCM_BYTES = seconds_to_bytes(AUDIO_SEGMENT_SECONDS)
+
+
+def wav_header(pcm_bytes: int) -> bytes:
+    """44-byte RIFF/WAVE header for `pcm_bytes` of 16-bit PCM in Lyria's format."""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + pcm_bytes, b"WAVE",
+        b"fmt ", 16, 1, CHANNELS, SAMPLE_RATE, BYTES_PER_SECOND, CHANNELS * SAMPLE_BYTES, SAMPLE_BYTES * 8,
+        b"data", pcm_bytes,
+    )
+
+
+_SEGMENT_HEADER = wav_header(SEGMENT_PCM_BYTES)
+
+
+class AudioSegmenter:
+    """
+    Accumulates PCM and emits fixed-length WAV segments into a sliding window.
+    `stream_id` is random per segmenter, so segment URLs stay unique (and safe to
+    cache forever) even if a room id is reused later.
+    """
+
+    def __init__(self, window: int = AUDIO_SEGMENT_WINDOW):
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.segments: Deque[Tuple[int, bytes]] = deque(maxlen=max(1, window))
+        self.next_seq = 0
+        self._pending = bytearray()
+
+    def push(self, pcm) -> int:
+        """Append PCM; returns how many segments were completed."""
+        self._pending += pcm
+        done = 0
+        while len(self._pending) >= SEGMENT_PCM_BYTES:
+            self.segments.append((self.next_seq, _SEGMENT_HEADER + bytes(self._pending[:SEGMENT_PCM_BYTES])))
+            del self._pending[:SEGMENT_PCM_BYTES]
+            self.next_seq += 1
+            done += 1
+        return done
+
+    def get(self, seq: int) -> Optional[bytes]:
+        if not self.segments:
+            return None
+        first = self.segments[0][0]
+        if not first <= seq < self.next_seq:
+            return None
+        return self.segments[seq - first][1]
+
+    def discontinuity(self):
+        """Music stopped: drop the partial segment. Sequence numbers keep counting."""
+        self._pending.clear()
+
+    @property
+    def buffered_bytes(self) -> int:
+        return sum(len(data) for _, data in self.segments) + len(self._pending)
+
+    def manifest(self, base_url: str) -> dict:
+        """Playlist of the segments currently available, oldest first."""
+        return {
+            "stream_id": self.stream_id,
+            "format": "wav",
+            "sample_rate": SAMPLE_RATE,
+            "channels": CHANNELS,
+            "segment_seconds": AUDIO_SEGMENT_SECONDS,
+            "first_sequence": self.segments[0][0] if self.segments else self.next_seq,
+            "next_sequence": self.next_seq,
+            "segments": [
+                {"sequence": seq, "url": f"{base_url}/{self.stream_id}/{seq}.wav"}
+                for seq, _ in self.segments
+            ],
+        }
@@ -0,0 +1,77 @@
+"""
+Audio Tiers
+Lower-bitrate renditions of a room's audio for mobile listeners, rendered once per
+frame per tier (never per client) with vectorized NumPy. Clients pick a tier on join.
+
+  full     48 kHz stereo 16-bit PCM      ~1.5 Mbit/s (Lyria's native output)
+  mono24k  24 kHz mono 16-bit PCM        ~384 kbit/s
+  mulaw    24 kHz mono 8-bit G.711 μ-law ~192 kbit/s
+
+Frame headers (services/audio_framing.py) are identical across tiers; sample_offset
+stays in 48 kHz source samples.
+"""
+from typing import Dict, Tuple
+import numpy as np
+from services.audio_framing import HEADER_SIZE, pcm_view
+
+TIER_FULL = "full"
+TIER_MONO24K = "mono24k"
+TIER_MULAW = "mulaw"
+AUDIO_TIERS = (TIER_FULL, TIER_MONO24K, TIER_MULAW)
+
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 32635
+# Segment (exponent) for each value of (biased magnitude >> 7)
+_MULAW_EXP_LUT = np.array([max(0, i.bit_length() - 1) for i in range(256)], dtype=np.int32)
+
+
+def downmix_24k(pcm) -> np.ndarray:
+    """48 kHz stereo int16 → 24 kHz mono int16: average each pair of stereo frames (L+R, twice)."""
+    samples = np.frombuffer(pcm, dtype="<i2")
+    quads = samples[: len(samples) // 4 * 4].reshape(-1, 4)
+    return (quads.sum(axis=1, dtype=np.int32) >> 2).astype(np.int16)
+
+
+def mulaw_encode(samples: np.ndarray) -> np.ndarray:
+    """G.711 μ-law encode int16 samples to uint8."""
+    x = samples.astype(np.int32)
+    sign = (x < 0).astype(np.int32) << 7
+    x = np.minimum(np.abs(x), _MULAW_CLIP) + _MULAW_BIAS
+    exponent = _MULAW_EXP_LUT[x >> 7]
+    mantissa = (x >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+def transcode(tier: str, pcm) -> bytes:
+    """Render 48 kHz stereo PCM in the given (non-full) tier."""
+    mono = downmix_24k(pcm)
+    if tier == TIER_MULAW:
+        return mulaw_encode(mono).tobytes()
+    return mono.astype("<i2").tobytes()
+
+
+class FrameRenditions:
+    """
+    All the byte strings one frame is sent as, rendered lazily on first request so
+    a room only pays for the (tier, framed) combinations its clients actually use.
+    """
+
+    __slots__ = ("frame", "_cache")
+
+    def __init__(self, frame: bytes):
+        self.frame = frame
+        self._cache: Dict[Tuple[str, bool], object] = {}
+
+    def get(self, tier: str, framed: bool):
+        key = (tier, framed)
+        out = self._cache.get(key)
+        if out is None:
+            if tier == TIER_FULL:
+                # ASGI websocket.send takes bytes, not a view: copy the PCM once per frame
+                out = self.frame if framed else bytes(pcm_view(self.frame))
+            elif framed:
+                out = b"".join([memoryview(self.frame)[:HEADER_SIZE], self.get(tier, False)])
+            else:
+                out = transcode(tier, pcm_view(self.frame))
+            self._cache[key] = out
+        return out
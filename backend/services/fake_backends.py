@@ -0,0 +1,287 @@
+"""
+Fake Backends
+Local stand-ins for the Gemini and Lyria RealTime clients, so the server and load
+tests run offline with no API key. They mirror the slice of the google-genai client
+the services use: client.aio.models.generate_content and client.aio.live.music.connect.
+Select them with FAKE_BACKENDS=gemini,lyria (or "all"), or inject one directly:
+GeminiService(client=FakeGeminiClient(...)), LyriaService(client=FakeLyriaClient(...)).
+
+Fake Lyria streams 48 kHz stereo 16-bit PCM at real-time pace (a tone that follows
+the session's bpm and brightness) with configurable delivery jitter, connect latency
+and mid-stream failures. Fake Gemini answers with arbitration JSON composed by the
+rule engine from the request text, after a configurable latency.
+"""
+import ast
+import asyncio
+import json
+import os
+import random
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from models.schemas import ArbitrationResult, WeightedPrompt
+from services.arbitration_backends import RuleBasedBackend
+from services.audio_buffer import CHANNELS, SAMPLE_RATE
+
+# Comma-separated services to fake: "gemini", "lyria" or "all"
+FAKE_BACKENDS = {name.strip().lower() for name in os.getenv("FAKE_BACKENDS", "").split(",") if name.strip()}
+
+FAKE_GEMINI_LATENCY = float(os.getenv("FAKE_GEMINI_LATENCY", "0.8"))
+FAKE_GEMINI_JITTER = float(os.getenv("FAKE_GEMINI_JITTER", "0.3"))
+FAKE_GEMINI_FAILURE_RATE = float(os.getenv("FAKE_GEMINI_FAILURE_RATE", "0.0"))
+
+FAKE_LYRIA_CHUNK_SECONDS = float(os.getenv("FAKE_LYRIA_CHUNK_SECONDS", "0.5"))
+FAKE_LYRIA_JITTER = float(os.getenv("FAKE_LYRIA_JITTER", "0.05"))
+FAKE_LYRIA_CONNECT_LATENCY = float(os.getenv("FAKE_LYRIA_CONNECT_LATENCY", "0.5"))
+# Probability that any one chunk is replaced by a dropped stream
+FAKE_LYRIA_FAILURE_RATE = float(os.getenv("FAKE_LYRIA_FAILURE_RATE", "0.0"))
+
+# Bounds the real services honour; the fake keeps its answers inside the continuity rules
+MAX_BPM_STEP = 10
+MAX_LEVEL_STEP = 0.15
+
+
+def use_fake(service: str) -> bool:
+    """Whether FAKE_BACKENDS selects the fake client for `service`."""
+    return "all" in FAKE_BACKENDS or service in FAKE_BACKENDS
+
+
+def _jittered(rng: random.Random, base: float, jitter: float) -> float:
+    return max(0.0, base + rng.uniform(-jitter, jitter))
+
+
+# ── Gemini ───────────────────────────────────────────────────────────────────
+
+_STATE_RE = re.compile(r"BPM=(\d+), density=([\d.]+), brightness=([\d.]+)")
+_INPUT_RE = re.compile(r"^  - (\w+): (\{.*\})$")
+_CUSTOM_RE = re.compile(r'^  - (\w+) custom request: "(.*)"$')
+_PREVIOUS_RE = re.compile(r'^  - "(.*)" \(weight ([\d.]+)\)$')
+_ROOM_RE = re.compile(r"^### Room (\S+)$", re.MULTILINE)
+
+
+class FakeGeminiModels:
+    def __init__(self, client: "FakeGeminiClient"):
+        self._client = client
+
+    async def generate_content(self, model: str, contents: str, config: Any = None):
+        client = self._client
+        client.calls += 1
+        await asyncio.sleep(_jittered(client.rng, client.latency, client.jitter))
+        if client.rng.random() < client.failure_rate:
+            client.failures += 1
+            raise ConnectionError("fake Gemini: 503 UNAVAILABLE")
+        return SimpleNamespace(text=client.reply(contents))
+
+
+class FakeGeminiClient:
+    def __init__(
+        self,
+        latency: float = FAKE_GEMINI_LATENCY,
+        jitter: float = FAKE_GEMINI_JITTER,
+        failure_rate: float = FAKE_GEMINI_FAILURE_RATE,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.aio = SimpleNamespace(models=FakeGeminiModels(self))
+
+    def reply(self, contents: str) -> str:
+        """JSON reply text for a single-room summary or a batch of them."""
+        parts = _ROOM_RE.split(contents)
+        if len(parts) == 1:
+            return json.dumps(self._arbitrate(contents))
+        # Batch: ["", key1, summary1, key2, summary2, ...]
+        rooms = {key: self._arbitrate(summary) for key, summary in zip(parts[1::2], parts[2::2])}
+        return json.dumps({"rooms": rooms})
+
+    @staticmethod
+    def _arbitrate(summary: str) -> Dict[str, Any]:
+        bpm, density, brightness = 100, 0.5, 0.5
+        inputs: Dict[str, Dict[str, Any]] = {}
+        previous: List[WeightedPrompt] = []
+        for line in summary.splitlines():
+            state = _STATE_RE.search(line)
+            if state:
+                bpm, density, brightness = int(state.group(1)), float(state.group(2)), float(state.group(3))
+            elif _INPUT_RE.match(line):
+                role, payload = _INPUT_RE.match(line).groups()
+                try:
+                    inputs.setdefault(role, {}).update(ast.literal_eval(payload))
+                except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+                    pass
+            elif _CUSTOM_RE.match(line):
+                role, text = _CUSTOM_RE.match(line).groups()
+                inputs.setdefault(role, {})["custom_prompt"] = text
+            elif _PREVIOUS_RE.match(line):
+                text, weight = _PREVIOUS_RE.match(line).groups()
+                previous.append(WeightedPrompt(text=text, weight=float(weight)))
+
+        prior = None
+        if previous:
+            prior = ArbitrationResult(prompts=previous, bpm=bpm, density=density, brightness=brightness, reasoning="")
+        result = RuleBasedBackend().compose("fake", inputs, bpm, density, brightness, prior)
+
+        # Step toward the crowd's numbers the way the system prompt asks the model to
+        target_bpm = inputs.get("drummer", {}).get("bpm", bpm)
+        target_density = inputs.get("energy", {}).get("density", density)
+        target_brightness = inputs.get("energy", {}).get("brightness", brightness)
+        data = result.model_dump()
+        data["bpm"] = int(bpm + max(-MAX_BPM_STEP, min(MAX_BPM_STEP, int(target_bpm) - bpm)))
+        data["density"] = round(density + max(-MAX_LEVEL_STEP, min(MAX_LEVEL_STEP, float(target_density) - density)), 2)
+        data["brightness"] = round(brightness + max(-MAX_LEVEL_STEP, min(MAX_LEVEL_STEP, float(target_brightness) - brightness)), 2)
+        data["reasoning"] = data["reasoning"].replace("Rule engine", "Fake Gemini")
+        return data
+
+
+# ── Lyria ────────────────────────────────────────────────────────────────────
+
+class FakeLyriaSession:
+    """One fake Lyria RealTime stream; audio starts after play() and ends on stop()."""
+
+    def __init__(self, client: "FakeLyriaClient"):
+        self._client = client
+        self.bpm = 100
+        self.brightness = 0.5
+        self.density = 0.5
+        self.prompts: List[Any] = []
+        self.rpcs = 0
+        self.chunks_sent = 0
+        self._phase = 0.0
+        self._playing = asyncio.Event()
+        self._stopped = False
+        self._stall_for = 0.0
+        self._fail_next = False
+
+    async def _rpc(self):
+        self.rpcs += 1
+        await asyncio.sleep(_jittered(self._client.rng, self._client.rpc_latency, self._client.rpc_latency / 2))
+
+    async def set_weighted_prompts(self, prompts):
+        await self._rpc()
+        self.prompts = list(prompts)
+
+    async def set_music_generation_config(self, config):
+        await self._rpc()
+        self.bpm = config.bpm or self.bpm
+        self.density = config.density if config.density is not None else self.density
+        self.brightness = config.brightness if config.brightness is not None else self.brightness
+
+    async def reset_context(self):
+        await self._rpc()
+
+    async def play(self):
+        await self._rpc()
+        self._playing.set()
+
+    async def pause(self):
+        await self._rpc()
+        self._playing.clear()
+
+    async def stop(self):
+        self._stopped = True
+        self._playing.set()
+
+    def inject_stall(self, seconds: float):
+        """Hold back the next chunk for `seconds`; the stream then carries on from there."""
+        self._stall_for = seconds
+
+    def inject_failure(self):
+        """Drop the stream instead of sending the next chunk."""
+        self._fail_next = True
+
+    def _pcm(self, frames: int) -> bytes:
+        """A tone pitched by bpm and brightness, pulsing on the beat, as interleaved int16."""
+        freq = 110.0 * (1 + self.brightness) * self.bpm / 100
+        t = np.arange(frames) / SAMPLE_RATE
+        phase = self._phase + 2 * np.pi * freq * t
+        self._phase = float((self._phase + 2 * np.pi * freq * frames / SAMPLE_RATE) % (2 * np.pi))
+        beat = 0.6 + 0.4 * np.cos(np.pi * ((self.chunks_sent * frames + np.arange(frames)) / SAMPLE_RATE * self.bpm / 60) % 1)
+        mono = (np.sin(phase) * beat * (3000 + 6000 * self.density)).astype(np.int16)
+        return np.repeat(mono, CHANNELS).tobytes()
+
+    async def receive(self):
+        client = self._client
+        loop = asyncio.get_running_loop()
+        frames = int(client.chunk_seconds * SAMPLE_RATE)
+        await self._playing.wait()
+        start = loop.time()
+        while not self._stopped:
+            # Real-time pace against the stream clock, so jitter never accumulates as drift
+            due = start + self.chunks_sent * client.chunk_seconds + client.rng.uniform(0, client.jitter)
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            if not self._playing.is_set():
+                await self._playing.wait()
+                start = loop.time() - self.chunks_sent * client.chunk_seconds
+            if self._stall_for:
+                stall, self._stall_for = self._stall_for, 0.0
+                await asyncio.sleep(stall)
+                start += stall
+            if self._stopped:
+                break
+            if self._fail_next or client.rng.random() < client.failure_rate:
+                client.stream_failures += 1
+                raise ConnectionError("fake Lyria: stream dropped")
+            chunk = SimpleNamespace(data=self._pcm(frames))
+            self.chunks_sent += 1
+            client.chunks_sent += 1
+            yield SimpleNamespace(server_content=SimpleNamespace(audio_chunks=[chunk], filtered_prompt=None))
+
+
+class _FakeConnection:
+    def __init__(self, client: "FakeLyriaClient"):
+        self._client = client
+        self.session: Optional[FakeLyriaSession] = None
+
+    async def __aenter__(self) -> FakeLyriaSession:
+        client = self._client
+        await asyncio.sleep(_jittered(client.rng, client.connect_latency, client.connect_latency / 4))
+        if client.rng.random() < client.connect_failure_rate:
+            raise ConnectionError("fake Lyria: connect refused")
+        client.connects += 1
+        self.session = FakeLyriaSession(client)
+        return self.session
+
+    async def __aexit__(self, *exc):
+        if self.session is not None:
+            await self.session.stop()
+        self._client.closes += 1
+
+
+class FakeLyriaMusic:
+    def __init__(self, client: "FakeLyriaClient"):
+        self._client = client
+
+    def connect(self, model: str) -> _FakeConnection:
+        return _FakeConnection(self._client)
+
+
+class FakeLyriaClient:
+    def __init__(
+        self,
+        chunk_seconds: float = FAKE_LYRIA_CHUNK_SECONDS,
+        jitter: float = FAKE_LYRIA_JITTER,
+        failure_rate: float = FAKE_LYRIA_FAILURE_RATE,
+        connect_latency: float = FAKE_LYRIA_CONNECT_LATENCY,
+        connect_failure_rate: float = 0.0,
+        rpc_latency: float = 0.02,
+        seed: Optional[int] = None,
+    ):
+        self.chunk_seconds = chunk_seconds
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.connect_latency = connect_latency
+        self.connect_failure_rate = connect_failure_rate
+        self.rpc_latency = rpc_latency
+        self.rng = random.Random(seed)
+        self.connects = 0
+        self.closes = 0
+        self.chunks_sent = 0
+        self.stream_failures = 0
+        self.aio = SimpleNamespace(live=SimpleNamespace(music=FakeLyriaMusic(self)))
@@ -0,0 +1,169 @@
+"""
+Gemini Scheduler
+Process-wide gate in front of every Gemini call: a token-bucket rate limit, a cap on
+calls in flight, and a fair round-robin queue across rooms. Each room has at most one
+queued job; queueing a newer job for the same room drops the older one (StaleJobError)
+instead of spending quota on inputs that have already been superseded. Batches queue
+under their own keys, so a room retrying or a burst of batches cannot crowd out others.
+A job's timeout starts when it is dispatched, so waiting in the queue under load
+delays calls rather than turning them into timeouts.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+GEMINI_MAX_RPS = float(os.getenv("GEMINI_MAX_RPS", "10"))
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "8"))
+
+
+class StaleJobError(Exception):
+    """A newer job for the same room replaced this one before it started."""
+
+
+class _Job:
+    __slots__ = ("key", "factory", "timeout", "future", "enqueued_at", "task")
+
+    def __init__(self, key: str, factory: Callable[[], Awaitable[Any]], timeout: Optional[float], future: asyncio.Future):
+        self.key = key
+        self.factory = factory
+        self.timeout = timeout
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+
+class GeminiScheduler:
+    def __init__(
+        self,
+        rate: float = GEMINI_MAX_RPS,
+        burst: float = GEMINI_BURST,
+        max_in_flight: int = GEMINI_MAX_IN_FLIGHT,
+    ):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_in_flight = max(1, max_in_flight)
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        # key (room_id) → its one queued job; _order is the round-robin of keys
+        self._queued: Dict[str, _Job] = {}
+        self._order: Deque[str] = deque()
+        self._in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.started = 0
+        self.timed_out = 0
+        self.dropped_stale = 0
+        self.cancelled = 0
+        self._total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def submit(self, key: str, factory: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run `factory()` when the rate limit, in-flight cap and fair order allow.
+        Raises StaleJobError if a newer job for `key` replaces this one first, and
+        asyncio.TimeoutError if the call itself takes longer than `timeout` (time spent
+        queued does not count). Cancelling the caller removes or cancels the job.
+        """
+        self._ensure_dispatcher()
+        self.submitted += 1
+        old = self._queued.get(key)
+        if old is not None:
+            self.dropped_stale += 1
+            if not old.future.done():
+                old.future.set_exception(StaleJobError(f"superseded by a newer job for {key}"))
+        else:
+            self._order.append(key)
+        job = self._queued[key] = _Job(key, factory, timeout, self._loop.create_future())
+        self._changed.set()
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            if self._queued.get(key) is job:
+                del self._queued[key]
+                self._order.remove(key)
+            if job.task is not None:
+                job.task.cancel()
+            raise
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests): start from a clean queue
+            self._loop = loop
+            self._changed = asyncio.Event()
+            self._queued.clear()
+            self._order.clear()
+            self._in_flight = 0
+            self._dispatcher = None
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    async def _dispatch(self):
+        while True:
+            if not self._order or self._in_flight >= self.max_in_flight:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            key = self._order.popleft()
+            job = self._queued.pop(key)
+            self._tokens -= 1
+            self._in_flight += 1
+            self.started += 1
+            wait = time.monotonic() - job.enqueued_at
+            self._total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            job.task = self._loop.create_task(self._run(job))
+
+    async def _run(self, job: _Job):
+        try:
+            result = await asyncio.wait_for(job.factory(), timeout=job.timeout)
+            if not job.future.done():
+                job.future.set_result(result)
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+            self._changed.set()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queued)
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "max_rps": self.rate,
+            "burst": self.burst,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "tokens": round(self._tokens, 2),
+            "submitted": self.submitted,
+            "started": self.started,
+            "timed_out": self.timed_out,
+            "dropped_stale": self.dropped_stale,
+            "cancelled": self.cancelled,
+            "avg_wait_ms": round(self._total_wait / self.started * 1000, 1) if self.started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
@@ -2,13 +2,20 @@
 Gemini Service — C (Chinmay)
 Takes the current room inputs and arbitrates them into Lyria weighted prompts.
 """
-import json
+import asyncio
+import itertools
 import os
-import re
+import time
 from typing import Dict, Any, List, Optional
 from google import genai
 from google.genai import types as genai_types
 from models.schemas import WeightedPrompt, ArbitrationResult
+from services.arbitration_cache import ArbitrationCache, arbitration_key
+from services.arbitration_batcher import ArbitrationBatcher, BATCH_INSTRUCTIONS
+from services.arbitration_backends import ArbitrationBackend, rule_backend
+from services.gemini_scheduler import GeminiScheduler, StaleJobError
+from services.fake_backends import FakeGeminiClient, use_fake
+from services.arbitration_output import ArbitrationOutputError, parse_json, parse_result, validate_result
 
 ARBITRATION_SYSTEM_PROMPT = """
 You are a real-time music director for a crowd-controlled generative music system.
@@ -62,6 +69,26 @@ Bad prompts (too generic or too literal):
   - "trap" — just a genre label, no texture
 """
 
+# Hard deadline for a single Gemini call — keeps a slow call from stalling the room's tick loop
+ARBITRATION_TIMEOUT = float(os.getenv("GEMINI_ARBITRATION_TIMEOUT", "3.0"))
+
+# Per-room arbitration engines: "gemini" (the LLM path below) or a registered
+# backend such as "rules". The fallback runs when Gemini fails or times out;
+# "previous" keeps the room's last result.
+GEMINI_BACKEND = "gemini"
+PREVIOUS_FALLBACK = "previous"
+ARBITRATION_BACKEND = os.getenv("ARBITRATION_BACKEND", GEMINI_BACKEND)
+ARBITRATION_FALLBACK = os.getenv("ARBITRATION_FALLBACK", PREVIOUS_FALLBACK)
+
+# Two-phase arbitration: weight given to the locally composed element that an
+# input_update pushes to Lyria immediately, before Gemini refines it at the next tick
+LOCAL_ADJUST_WEIGHT = float(os.getenv("LOCAL_ADJUST_WEIGHT", "0.4"))
+
+# Payload fields the fast path can apply without the LLM. crowd_energy (applause)
+# payloads are all derived numbers plus their zone label. Any other field — genre,
+# mood, instrument, custom_prompt — is textual and needs arbitration when it changes.
+NUMERIC_FIELDS = frozenset({"bpm", "density", "brightness", "applause_volume", "clap_rate", "intensity", "zone"})
+
 # Fallback prompts used when Gemini fails
 DEFAULT_RESULT = ArbitrationResult(
     prompts=[WeightedPrompt(text="ambient electronic music with soft synth pads", weight=1.0)],
@@ -73,14 +100,41 @@ DEFAULT_RESULT = ArbitrationResult(
 
 
 class GeminiService:
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, client=None):
+        # Any object with the genai client's aio.models.generate_content (see fake_backends)
+        if client is None and use_fake("gemini"):
+            client = FakeGeminiClient()
+        if client is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY environment variable not set")
+            client = genai.Client(api_key=api_key)
+        self.client = client
         self.model = "gemini-2.5-flash"
         # Keep track of previous result for smooth transitions
         self._last_results: Dict[str, ArbitrationResult] = {}
+        # Results shared across rooms: the same inputs on the same prompts give the same answer
+        self.cache = ArbitrationCache()
+        # room_id → {(role, field): value} of the textual inputs the last LLM result reflects
+        self._arbitrated_text: Dict[str, Dict[tuple, Any]] = {}
+        self.fast_path_ticks = 0
+        self.llm_calls = 0
+        # Rooms whose LLM jobs land in the same short window share one request
+        self.batcher = ArbitrationBatcher(self._send_batch)
+        # Every Gemini call goes through this: rate limit, in-flight cap, fair per-room queue
+        self.scheduler = GeminiScheduler()
+        self._batch_ids = itertools.count(1)
+        # room_id → ms for the room's most recent LLM-path arbitration
+        self._latency_ms: Dict[str, float] = {}
+        # name → offline backend; room_id → (primary, fallback) for rooms not on the defaults
+        self._backends: Dict[str, ArbitrationBackend] = {rule_backend.name: rule_backend}
+        self._room_backends: Dict[str, tuple] = {}
+        self.backend_calls: Dict[str, int] = {}
+        # room_id → text of the prompt the last local adjustment added (replaced, not stacked)
+        self._local_text: Dict[str, str] = {}
+        self.local_adjusts = 0
+        # Model replies: valid as-is, repaired locally, re-requested, unusable
+        self.output_stats = {"valid": 0, "repaired": 0, "retries": 0, "failed": 0}
 
     async def arbitrate(
         self,
@@ -92,77 +146,339 @@ class GeminiService:
     ) -> ArbitrationResult:
         """
         Takes all current role inputs and returns arbitrated Lyria prompts.
-        Falls back to previous result if Gemini fails.
+        Falls back to previous result if Gemini fails or misses the deadline.
+        Uses the async client so the event loop keeps forwarding audio meanwhile.
         """
         if not current_inputs:
             return self._last_results.get(room_id, DEFAULT_RESULT)
 
+        previous = self._last_results.get(room_id)
+        text_inputs = self._text_inputs(current_inputs)
+        if not self._text_changed(room_id, text_inputs):
+            self.fast_path_ticks += 1
+            result = self._numeric_result(previous or DEFAULT_RESULT, current_inputs, current_bpm, current_density, current_brightness)
+            self._last_results[room_id] = result
+            return result
+
+        primary, fallback = self._room_backends.get(room_id, (ARBITRATION_BACKEND, ARBITRATION_FALLBACK))
+        if primary != GEMINI_BACKEND:
+            result = await self._run_backend(primary, room_id, current_inputs, current_bpm, current_density, current_brightness)
+            self._arbitrated_text.setdefault(room_id, {}).update(text_inputs)
+            return result
+
+        cache_key = arbitration_key(
+            current_inputs, current_bpm, current_density, current_brightness,
+            previous.prompts if previous else None,
+        )
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self._last_results[room_id] = cached
+            self._arbitrated_text.setdefault(room_id, {}).update(text_inputs)
+            print(f"[Gemini] Room {room_id} → cache hit")
+            self._log_reasoning(room_id, cached)
+            return cached
+
         user_input_summary = self._format_inputs(
             current_inputs, current_bpm, current_density, current_brightness,
-            previous=self._last_results.get(room_id),
+            previous=previous,
         )
 
+        started = time.perf_counter()
         for attempt in range(2):
             try:
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=user_input_summary,
-                    config=genai_types.GenerateContentConfig(
-                        system_instruction=ARBITRATION_SYSTEM_PROMPT,
-                        temperature=0.7,
-                        max_output_tokens=2000,
-                        thinking_config=genai_types.ThinkingConfig(thinking_budget=0),
-                    ),
-                )
-
-                raw_text = (response.text or "").strip()
-                # Strip markdown fences if present
-                match = re.search(r"```(?:json)?\s*([\s\S]+?)```", raw_text)
-                if match:
-                    raw_text = match.group(1).strip()
-
-                data = json.loads(raw_text)
-                prompts = [WeightedPrompt(**p) for p in data["prompts"]]
-                # Normalise weights so they always sum to exactly 1.0
-                total = sum(p.weight for p in prompts)
-                if total > 0:
-                    for p in prompts:
-                        p.weight = round(p.weight / total, 3)
-                # Clamp density and brightness to [0.0, 1.0]
-                density = max(0.0, min(1.0, float(data["density"])))
-                brightness = max(0.0, min(1.0, float(data["brightness"])))
-                result = ArbitrationResult(
-                    prompts=prompts,
-                    bpm=max(60, min(200, int(data["bpm"]))),
-                    density=density,
-                    brightness=brightness,
-                    reasoning=data.get("reasoning", ""),
-                )
-
-                # Honour drummer BPM directly — drummer input takes priority
-                drummer_input = current_inputs.get("drummer", {})
-                if "bpm" in drummer_input:
-                    result = result.model_copy(update={"bpm": int(drummer_input["bpm"])})
-                    print(f"[Gemini] BPM locked to drummer's {result.bpm}")
+                result = None
+                if attempt == 0:
+                    result = await self._batched_result(room_id, user_input_summary, current_inputs)
+                if result is None:
+                    response = await self._generate(
+                        room_id, user_input_summary,
+                        self._generate_config(ARBITRATION_SYSTEM_PROMPT, 2000, response_schema=ArbitrationResult),
+                    )
+                    parsed, repaired = parse_result(response.text)
+                    self._count_output(repaired)
+                    result = self._to_result(parsed, current_inputs)
 
                 self._last_results[room_id] = result
+                self.cache.put(cache_key, result)
+                self._arbitrated_text.setdefault(room_id, {}).update(text_inputs)
+                self._latency_ms[room_id] = (time.perf_counter() - started) * 1000
                 print(f"[Gemini] Room {room_id} → {result.reasoning}")
-                # Log Gemini reasoning to the room timeline
-                if result.reasoning:
-                    from services.room_service import room_service as _rs
-                    _rs.log_event(room_id, "gemini", result.reasoning)
+                self._log_reasoning(room_id, result)
                 return result
 
-            except json.JSONDecodeError as e:
+            except asyncio.TimeoutError:
+                print(f"[Gemini] Arbitration timed out after {ARBITRATION_TIMEOUT}s for room {room_id}, using {fallback} fallback")
+                break
+
+            except StaleJobError:
+                print(f"[Gemini] Arbitration for room {room_id} superseded by a newer job, keeping previous result")
+                return self._last_results.get(room_id, DEFAULT_RESULT)
+
+            except ArbitrationOutputError as e:
+                # Only replies the local repair pass could not fix cost another round trip
+                self.output_stats["failed"] += 1
                 if attempt == 0:
-                    print(f"[Gemini] JSON parse error on attempt 1 for room {room_id}: {e}, retrying...")
+                    self.output_stats["retries"] += 1
+                    print(f"[Gemini] Unusable reply on attempt 1 for room {room_id}: {e}, retrying...")
                     continue
-                print(f"[Gemini] JSON parse error on attempt 2 for room {room_id}: {e}, using fallback")
-                return self._last_results.get(room_id, DEFAULT_RESULT)
+                print(f"[Gemini] Unusable reply on attempt 2 for room {room_id}: {e}, using {fallback} fallback")
+                break
 
             except Exception as e:
                 print(f"[Gemini] Arbitration failed for room {room_id}: {e}")
-                return self._last_results.get(room_id, DEFAULT_RESULT)
+                break
+
+        if fallback in self._backends:
+            return await self._run_backend(fallback, room_id, current_inputs, current_bpm, current_density, current_brightness)
+        return self._last_results.get(room_id, DEFAULT_RESULT)
+
+    def local_adjust(
+        self,
+        room_id: str,
+        inputs: Dict[str, Any],
+        current_bpm: int,
+        current_density: float,
+        current_brightness: float,
+    ) -> ArbitrationResult:
+        """
+        Phase one of two-phase arbitration: an instant, offline adjustment for the
+        inputs that just arrived. Textual inputs add one rule-engine prompt at
+        LOCAL_ADJUST_WEIGHT on top of the current prompts (replacing the previous
+        local one), energy inputs apply directly. The result becomes the room's
+        previous result, so the Gemini refinement at the next tick evolves from
+        what is actually playing. Textual inputs are not marked as arbitrated, so
+        that refinement still happens.
+        """
+        self.local_adjusts += 1
+        previous = self._last_results.get(room_id, DEFAULT_RESULT)
+        energy = inputs.get("energy", {})
+        density = float(energy.get("density", current_density))
+        brightness = float(energy.get("brightness", current_brightness))
+        if not self._text_changed(room_id, self._text_inputs(inputs)):
+            result = self._numeric_result(previous, inputs, current_bpm, density, brightness)
+            self._last_results[room_id] = result
+            return result
+
+        custom = next((p["custom_prompt"] for p in inputs.values() if p.get("custom_prompt")), None)
+        element = custom or rule_backend.compose(room_id, inputs, current_bpm, density, brightness, previous).prompts[0].text
+        keep = [p for p in previous.prompts if p.text not in (self._local_text.get(room_id), element)]
+        keep = sorted(keep, key=lambda p: p.weight, reverse=True)[:2]
+        total = sum(p.weight for p in keep)
+        prompts = [WeightedPrompt(text=p.text, weight=round(p.weight / total * (1.0 - LOCAL_ADJUST_WEIGHT), 3)) for p in keep] if total > 0 else []
+        prompts.append(WeightedPrompt(text=element, weight=round(1.0 - sum(p.weight for p in prompts), 3)))
+        self._local_text[room_id] = element
+
+        result = ArbitrationResult(
+            prompts=prompts,
+            bpm=max(60, min(200, int(current_bpm))),
+            density=max(0.0, min(1.0, density)),
+            brightness=max(0.0, min(1.0, brightness)),
+            reasoning=f'Quick blend: "{element}" — refining',
+        )
+        self._last_results[room_id] = result
+        return result
+
+    def checkpoint(self, room_id: str) -> tuple:
+        """The room's last result and arbitrated text, to restore if the next result is not applied."""
+        return self._last_results.get(room_id), dict(self._arbitrated_text.get(room_id, {}))
+
+    def rollback(self, room_id: str, checkpoint: tuple, playing: Optional[ArbitrationResult] = None):
+        """
+        A result from arbitrate() never reached Lyria: go back to `checkpoint` so the next
+        call builds on what is playing (`playing`, if newer than the checkpoint) and treats
+        the text inputs it consumed as new again.
+        """
+        last, text = checkpoint
+        last = playing or last
+        if last is None:
+            self._last_results.pop(room_id, None)
+        else:
+            self._last_results[room_id] = last
+        self._arbitrated_text[room_id] = text
+
+    async def _run_backend(self, name: str, room_id: str, current_inputs, current_bpm, current_density, current_brightness) -> ArbitrationResult:
+        """Arbitrate with a registered offline backend and keep its result for continuity."""
+        result = await self._backends[name].arbitrate(
+            room_id, current_inputs, current_bpm, current_density, current_brightness,
+            previous=self._last_results.get(room_id),
+        )
+        self.backend_calls[name] = self.backend_calls.get(name, 0) + 1
+        self._last_results[room_id] = result
+        return result
+
+    def register_backend(self, backend: ArbitrationBackend):
+        self._backends[backend.name] = backend
+
+    def set_room_backend(self, room_id: str, primary: Optional[str] = None, fallback: Optional[str] = None) -> bool:
+        """
+        Choose a room's arbitration engine and what to do when Gemini fails.
+        None keeps the current choice. Returns False for an unknown name.
+        """
+        current_primary, current_fallback = self._room_backends.get(room_id, (ARBITRATION_BACKEND, ARBITRATION_FALLBACK))
+        primary = primary or current_primary
+        fallback = fallback or current_fallback
+        if primary != GEMINI_BACKEND and primary not in self._backends:
+            return False
+        if fallback != PREVIOUS_FALLBACK and fallback not in self._backends:
+            return False
+        self._room_backends[room_id] = (primary, fallback)
+        print(f"[Gemini] Room {room_id} arbitration: primary={primary}, fallback={fallback}")
+        return True
+
+    async def _batched_result(self, room_id: str, summary: str, current_inputs: Dict[str, Any]) -> Optional[ArbitrationResult]:
+        """This room's result from a cross-room batch, or None to make a per-room call instead."""
+        data = await self.batcher.submit(room_id, summary)
+        if data is None:
+            return None
+        try:
+            parsed, repaired = validate_result(data)
+        except ArbitrationOutputError as e:
+            self.output_stats["failed"] += 1
+            print(f"[Gemini] Unusable batch result for room {room_id} ({e}) — falling back to a per-room call")
+            self.batcher.fallbacks += 1
+            return None
+        self._count_output(repaired)
+        return self._to_result(parsed, current_inputs)
+
+    async def _send_batch(self, contents: str, size: int) -> Dict[str, Any]:
+        """One Gemini call arbitrating `size` rooms at once (see ArbitrationBatcher)."""
+        response = await self._generate(
+            f"batch-{next(self._batch_ids)}", contents,
+            self._generate_config(ARBITRATION_SYSTEM_PROMPT + BATCH_INSTRUCTIONS, min(2000 * size, 8192)),
+        )
+        # Room keys vary per batch, so only JSON output is requested here; each room's
+        # entry is validated against the schema on its own in _batched_result
+        data, _ = parse_json(response.text)
+        return data
+
+    async def _generate(self, key: str, contents: str, config: genai_types.GenerateContentConfig):
+        """
+        One Gemini call, queued on the global scheduler under `key` (a room_id, or a
+        batch id). ARBITRATION_TIMEOUT covers the call from when the scheduler
+        dispatches it, not the wait in its queue.
+        """
+        async def call():
+            self.llm_calls += 1
+            return await self.client.aio.models.generate_content(model=self.model, contents=contents, config=config)
+
+        return await self.scheduler.submit(key, call, timeout=ARBITRATION_TIMEOUT)
+
+    @staticmethod
+    def _log_reasoning(room_id: str, result: ArbitrationResult):
+        """Log Gemini reasoning to the room timeline (the UI's reasoning feed)."""
+        if result.reasoning:
+            from services.room_service import room_service as _rs
+            _rs.log_event(room_id, "gemini", result.reasoning)
+
+    def _count_output(self, repaired: bool):
+        self.output_stats["repaired" if repaired else "valid"] += 1
+
+    @staticmethod
+    def _generate_config(system_instruction: str, max_output_tokens: int, response_schema=None) -> genai_types.GenerateContentConfig:
+        return genai_types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            temperature=0.7,
+            max_output_tokens=max_output_tokens,
+            thinking_config=genai_types.ThinkingConfig(thinking_budget=0),
+            response_mime_type="application/json",
+            response_schema=response_schema,
+        )
+
+    @staticmethod
+    def _to_result(parsed: ArbitrationResult, current_inputs: Dict[str, Any]) -> ArbitrationResult:
+        """Apply the ranges and weight normalisation the schema can't express."""
+        prompts = [WeightedPrompt(text=p.text, weight=p.weight) for p in parsed.prompts]
+        # Normalise weights so they always sum to exactly 1.0
+        total = sum(p.weight for p in prompts)
+        if total > 0:
+            for p in prompts:
+                p.weight = round(p.weight / total, 3)
+        result = ArbitrationResult(
+            prompts=prompts,
+            bpm=max(60, min(200, parsed.bpm)),
+            # Clamp density and brightness to [0.0, 1.0]
+            density=max(0.0, min(1.0, parsed.density)),
+            brightness=max(0.0, min(1.0, parsed.brightness)),
+            reasoning=parsed.reasoning,
+        )
+
+        # Honour drummer BPM directly — drummer input takes priority
+        drummer_input = current_inputs.get("drummer", {})
+        if "bpm" in drummer_input:
+            result = result.model_copy(update={"bpm": int(drummer_input["bpm"])})
+            print(f"[Gemini] BPM locked to drummer's {result.bpm}")
+        return result
+
+    def forget_room(self, room_id: str):
+        """Drop per-room continuity state when a room is destroyed."""
+        self._last_results.pop(room_id, None)
+        self._arbitrated_text.pop(room_id, None)
+        self._latency_ms.pop(room_id, None)
+        self._room_backends.pop(room_id, None)
+        self._local_text.pop(room_id, None)
+        for backend in self._backends.values():
+            backend.forget_room(room_id)
+
+    @staticmethod
+    def _text_inputs(inputs: Dict[str, Any]) -> Dict[tuple, Any]:
+        """Every non-numeric field in the inputs, keyed by (role, field)."""
+        return {
+            (role, field): value
+            for role, payload in inputs.items()
+            for field, value in payload.items()
+            if field not in NUMERIC_FIELDS
+        }
+
+    def _text_changed(self, room_id: str, text_inputs: Dict[tuple, Any]) -> bool:
+        """True if any textual input differs from what the room's last LLM result already reflects."""
+        arbitrated = self._arbitrated_text.get(room_id, {})
+        return any(arbitrated.get(key) != value for key, value in text_inputs.items())
+
+    @staticmethod
+    def _numeric_result(
+        previous: ArbitrationResult,
+        inputs: Dict[str, Any],
+        bpm: int,
+        density: float,
+        brightness: float,
+    ) -> ArbitrationResult:
+        """
+        Fast path for ticks that only move bpm/density/brightness: keep the previous
+        prompts and apply the numbers directly. Energy and applause inputs are already
+        folded into density/brightness by the room; the drummer's BPM wins, as in the
+        LLM path.
+        """
+        drummer_bpm = inputs.get("drummer", {}).get("bpm")
+        new_bpm = int(drummer_bpm) if drummer_bpm is not None else int(bpm)
+        new_bpm = max(60, min(200, new_bpm))
+        changes = []
+        if new_bpm != previous.bpm:
+            changes.append(f"tempo {new_bpm} BPM")
+        if round(density, 2) != round(previous.density, 2):
+            changes.append(f"density {density:.2f}")
+        if round(brightness, 2) != round(previous.brightness, 2):
+            changes.append(f"brightness {brightness:.2f}")
+        return ArbitrationResult(
+            prompts=previous.prompts,
+            bpm=new_bpm,
+            density=max(0.0, min(1.0, float(density))),
+            brightness=max(0.0, min(1.0, float(brightness))),
+            reasoning=f"Holding the groove: {', '.join(changes)}" if changes else previous.reasoning,
+        )
+
+    def get_stats(self) -> dict:
+        """Counters for the /stats endpoint."""
+        return {
+            "fast_path_ticks": self.fast_path_ticks,
+            "llm_calls": self.llm_calls,
+            "backend_calls": dict(self.backend_calls),
+            "local_adjusts": self.local_adjusts,
+            "cache": self.cache.stats(),
+            "batching": self.batcher.stats(),
+            "scheduler": self.scheduler.stats(),
+            "output": dict(self.output_stats),
+            "room_latency_ms": {room_id: round(ms, 1) for room_id, ms in self._latency_ms.items()},
+        }
 
     def _format_inputs(
         self,
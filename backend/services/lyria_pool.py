@@ -0,0 +1,159 @@
+"""
+Lyria Session Pool
+Keeps a few Lyria RealTime sessions connected and idle (default prompt already set,
+not playing) so start_music and stream restarts skip the connect handshake. The
+pool is sized from the recent room-creation rate: roughly the number of rooms
+expected to start within LYRIA_POOL_HORIZON seconds, between LYRIA_POOL_MIN and
+LYRIA_POOL_MAX. Idle sessions are closed and replaced after LYRIA_POOL_IDLE_TTL
+seconds, well before the upstream drops an idle connection.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional, Set, Tuple
+
+from services.timer_wheel import Timer, timer_wheel
+
+LYRIA_POOL_MIN = int(os.getenv("LYRIA_POOL_MIN", "0"))
+LYRIA_POOL_MAX = int(os.getenv("LYRIA_POOL_MAX", "4"))
+LYRIA_POOL_IDLE_TTL = float(os.getenv("LYRIA_POOL_IDLE_TTL", "120"))
+# Room creations within this window set the rate; the pool covers HORIZON seconds of it
+LYRIA_POOL_RATE_WINDOW = float(os.getenv("LYRIA_POOL_RATE_WINDOW", "600"))
+LYRIA_POOL_HORIZON = float(os.getenv("LYRIA_POOL_HORIZON", "60"))
+LYRIA_POOL_CHECK_INTERVAL = 15.0
+
+# (session, context manager) as returned by the opener
+PooledSession = Tuple[Any, Any]
+
+
+class LyriaSessionPool:
+    def __init__(
+        self,
+        open_session: Callable[[], Awaitable[PooledSession]],
+        min_size: int = LYRIA_POOL_MIN,
+        max_size: int = LYRIA_POOL_MAX,
+        idle_ttl: float = LYRIA_POOL_IDLE_TTL,
+    ):
+        self._open_session = open_session
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        # (opened_at, session, ctx), oldest first
+        self._idle: Deque[Tuple[float, Any, Any]] = deque()
+        self._opening = 0
+        self._created: Deque[float] = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+        self._maintenance: Optional[Timer] = None
+        self.hits = 0
+        self.misses = 0
+        self.opened = 0
+        self.recycled = 0
+        self.failures = 0
+
+    def note_room_created(self):
+        """Record demand and top the pool up for the rooms likely to start soon."""
+        self._created.append(time.monotonic())
+        self._schedule_refill()
+
+    def target_size(self) -> int:
+        cutoff = time.monotonic() - LYRIA_POOL_RATE_WINDOW
+        while self._created and self._created[0] < cutoff:
+            self._created.popleft()
+        expected = math.ceil(len(self._created) / LYRIA_POOL_RATE_WINDOW * LYRIA_POOL_HORIZON)
+        return max(self.min_size, min(self.max_size, expected))
+
+    def acquire(self) -> Optional[PooledSession]:
+        """A warm session, or None if the pool is empty (the caller connects itself)."""
+        now = time.monotonic()
+        while self._idle:
+            opened_at, session, ctx = self._idle.popleft()
+            if now - opened_at < self.idle_ttl:
+                self.hits += 1
+                self._schedule_refill()
+                return session, ctx
+            self._close(session, ctx)
+            self.recycled += 1
+        self.misses += 1
+        self._schedule_refill()
+        return None
+
+    def _schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self):
+        while len(self._idle) + self._opening < self.target_size():
+            self._opening += 1
+            try:
+                session, ctx = await self._open_session()
+                self.opened += 1
+                if len(self._idle) >= self.target_size():
+                    # Demand dropped while connecting
+                    self._close(session, ctx)
+                    break
+                self._idle.append((time.monotonic(), session, ctx))
+            except Exception as e:
+                self.failures += 1
+                print(f"[LyriaPool] Failed to pre-warm a session: {e}")
+                break
+            finally:
+                self._opening -= 1
+        self._ensure_maintenance()
+
+    def _ensure_maintenance(self):
+        if self._idle and self._maintenance is None:
+            self._maintenance = timer_wheel.every(LYRIA_POOL_CHECK_INTERVAL, self._maintain, jitter=0.1)
+        elif not self._idle and self._maintenance is not None and self.target_size() == 0:
+            self._maintenance.cancel()
+            self._maintenance = None
+
+    def _maintain(self):
+        """Recycle sessions nearing the idle limit and shrink to the current target."""
+        now = time.monotonic()
+        # Replace anything that would expire before the next check
+        horizon = self.idle_ttl - LYRIA_POOL_CHECK_INTERVAL * 1.2
+        while self._idle and now - self._idle[0][0] >= horizon:
+            _, session, ctx = self._idle.popleft()
+            self._close(session, ctx)
+            self.recycled += 1
+        while len(self._idle) > self.target_size():
+            _, session, ctx = self._idle.popleft()
+            self._close(session, ctx)
+        self._schedule_refill()
+        self._ensure_maintenance()
+
+    def discard(self, session, ctx):
+        """Close a session taken from the pool that turned out to be unusable."""
+        self.failures += 1
+        self._close(session, ctx)
+
+    def _close(self, session, ctx):
+        task = asyncio.create_task(self._close_session(session, ctx))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_session(session, ctx):
+        try:
+            await ctx.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"[LyriaPool] Error closing idle session: {e}")
+
+    @property
+    def size(self) -> int:
+        return len(self._idle)
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self._idle),
+            "opening": self._opening,
+            "target": self.target_size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "opened": self.opened,
+            "recycled": self.recycled,
+            "failures": self.failures,
+        }
@@ -6,71 +6,265 @@ Also handles updating weighted prompts when Gemini arbitration fires.
 """
 import asyncio
 import os
-from typing import Optional, List, Callable
+import time
+from collections import deque
+from typing import Dict, Optional, List, Callable
 from google import genai
 from google.genai import types
+from services.audio_buffer import BYTES_PER_SECOND, FRAME_BYTES, SAMPLE_RATE
+from services.audio_crossfade import crossfade, fade_frames, fade_in
+from services.fake_backends import FakeLyriaClient, use_fake
+from services.lyria_pool import LyriaSessionPool
+from services.timer_wheel import timer_wheel
 
 # Broadcast callback type: (room_id, audio_bytes) → None
 BroadcastCallback = Callable[[str, bytes], None]
 
+# Every session starts on this prompt until the first arbitration result arrives
+INITIAL_PROMPTS = [types.WeightedPrompt(text="ambient electronic music with soft synth pads", weight=1.0)]
+
+# Command priorities for update_prompts. A pending update is only replaced by one of
+# equal or higher priority, and once a higher-priority update is sent, lower ones are
+# ignored for LYRIA_PRIORITY_HOLD seconds — so applause can't undo a drop build-up.
+PRIORITY_NORMAL = 0
+PRIORITY_DROP = 1
+LYRIA_PRIORITY_HOLD = float(os.getenv("LYRIA_PRIORITY_HOLD", "1.5"))
+
+# Failover: a stream that errors, or sends nothing for LYRIA_STALL_GRACE seconds after
+# its audio so far has run out, is replaced by a new session primed with the room's
+# current prompts and config. The old stream keeps playing until the replacement has
+# audio, which is crossfaded in before the old session is closed.
+LYRIA_STALL_GRACE = float(os.getenv("LYRIA_STALL_GRACE", "0.5"))
+LYRIA_FAILOVER_ATTEMPTS = 3
+# A replacement with no audio after this many seconds is dropped for the next attempt
+LYRIA_HANDOFF_TIMEOUT = float(os.getenv("LYRIA_HANDOFF_TIMEOUT", "5.0"))
+
+# An update only re-sends the config or the prompt set if it differs from what the
+# session last applied by more than these (density/brightness, prompt weights)
+LYRIA_CONFIG_EPSILON = float(os.getenv("LYRIA_CONFIG_EPSILON", "0.01"))
+LYRIA_WEIGHT_EPSILON = float(os.getenv("LYRIA_WEIGHT_EPSILON", "0.01"))
+
+
+def _config_changed(last: Optional[tuple], bpm: int, density: float, brightness: float) -> bool:
+    if last is None:
+        return True
+    last_bpm, last_density, last_brightness = last
+    return (
+        bpm != last_bpm
+        or abs(density - last_density) > LYRIA_CONFIG_EPSILON
+        or abs(brightness - last_brightness) > LYRIA_CONFIG_EPSILON
+    )
+
+
+def _prompts_changed(last: Optional[List[types.WeightedPrompt]], prompts: List[types.WeightedPrompt]) -> bool:
+    if not last or len(last) != len(prompts):
+        return True
+    return any(
+        a.text != b.text or abs((a.weight or 0.0) - (b.weight or 0.0)) > LYRIA_WEIGHT_EPSILON
+        for a, b in zip(last, prompts)
+    )
+
+
+class _RoomCommands:
+    """A room's Lyria command actor: at most one update pending, one in flight."""
+
+    __slots__ = ("pending", "priority", "waiters", "task", "hold_priority", "hold_until")
 
-class LyriaService:
     def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-        self.client = genai.Client(api_key=api_key, http_options={"api_version": "v1alpha"})
+        # (prompts, bpm, density, brightness) of the newest update not yet sent
+        self.pending: Optional[tuple] = None
+        self.priority = PRIORITY_NORMAL
+        # Callers whose update is pending
+        self.waiters: List[asyncio.Future] = []
+        self.task: Optional[asyncio.Task] = None
+        self.hold_priority = PRIORITY_NORMAL
+        self.hold_until = 0.0
+
+
+class _Handoff:
+    """A room's switch from a failing Lyria session to its replacement."""
+
+    def __init__(self, old, old_ctx, old_alive: bool, reason: str):
+        self.old = old
+        self.old_ctx = old_ctx
+        # False once the old stream has errored; a stalled stream may still recover
+        self.old_alive = old_alive
+        # The old stream sent audio after the handoff began, so there is audio to crossfade from
+        self.old_recovered = False
+        self.reason = reason
+        self.new = None
+        self.new_ctx = None
+        self.new_task: Optional[asyncio.Task] = None
+        # (prompts, bpm, density, brightness) the replacement was started with
+        self.primed: Optional[tuple] = None
+        # Replacement audio held back until the old stream has sent enough to blend with
+        self.pending: List[bytes] = []
+        # Old-stream audio for the same stretch of time, collected up to the crossfade window
+        self.old_tail: List[bytes] = []
+        self.wait_timer = None
+        self.switched: Optional[asyncio.Future] = None
+        self.runner: Optional[asyncio.Task] = None
+
+
+class LyriaService:
+    def __init__(self, client=None):
+        # Any object with the genai client's aio.live.music.connect (see fake_backends)
+        if client is None and use_fake("lyria"):
+            client = FakeLyriaClient()
+        if client is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY environment variable not set")
+            client = genai.Client(api_key=api_key, http_options={"api_version": "v1alpha"})
+        self.client = client
         # room_id → active session
         self._sessions: dict = {}
         # room_id → receive task
         self._receive_tasks: dict = {}
         # Injected from ws.py so Lyria can broadcast audio bytes to clients
         self.broadcast_callback: Optional[BroadcastCallback] = None
-
-    async def start_session(self, room_id: str, initial_bpm: int = 100):
+        # room_id → command actor serialising update_prompts calls
+        self._commands: dict = {}
+        self.commands_received = 0
+        self.commands_coalesced = 0
+        self.commands_dropped = 0
+        self.updates_sent = 0
+        self.rpcs_sent = 0
+        # set_music_generation_config / set_weighted_prompts calls skipped as unchanged
+        self.rpcs_saved = 0
+        # Pre-connected idle sessions for start_session and restarts
+        self.pool = LyriaSessionPool(self._open_session)
+        # "warm" | "cold" → [count, total ms] from start_session to play()
+        self._start_ms: dict = {}
+        # room_id → session failover in progress / stall watchdog timer
+        self._handoffs: Dict[str, _Handoff] = {}
+        self._watchdogs: dict = {}
+        # room_id → monotonic time at which the audio broadcast so far runs out for a
+        # listener playing it in real time
+        self._audio_until: Dict[str, float] = {}
+        self._background: set = set()
+        self.failovers_started = 0
+        self.failovers_completed = 0
+        self.failovers_crossfaded = 0
+        self.last_crossfade_ms = 0.0
+        self.failovers_failed = 0
+        # Listener-side silence (ms) of recent completed failovers
+        self._failover_silence_ms: deque = deque(maxlen=100)
+
+    async def start_session(
+        self,
+        room_id: str,
+        initial_bpm: int = 100,
+        prompts: Optional[List[types.WeightedPrompt]] = None,
+        density: Optional[float] = None,
+        brightness: Optional[float] = None,
+    ):
         """
         Opens a Lyria RealTime session for a room and starts streaming audio.
-        Call this when host presses Play.
+        Call this when host presses Play. Uses a pre-warmed session from the pool
+        when one is available, so only the config and play() are sent here.
+        Pass `prompts`, `density` and `brightness` to resume a room's music where it
+        left off (waking from hibernation) instead of from INITIAL_PROMPTS.
         """
         if room_id in self._sessions:
             print(f"[Lyria] Session already exists for room {room_id}")
             return
 
         print(f"[Lyria] Starting session for room {room_id}")
+        started = time.perf_counter()
+        resume = (prompts, density, brightness)
 
         try:
-            session_ctx = self.client.aio.live.music.connect(model="models/lyria-realtime-exp")
-            session = await session_ctx.__aenter__()
-            self._sessions[room_id] = {"session": session, "ctx": session_ctx, "bpm": initial_bpm}
-
-            # Set initial config
-            await session.set_music_generation_config(
-                config=types.LiveMusicGenerationConfig(
-                    bpm=initial_bpm,
-                    temperature=1.0,
-                )
-            )
+            warm = self.pool.acquire()
+            if warm is not None:
+                try:
+                    await self._play(room_id, *warm, initial_bpm, *resume)
+                except Exception as e:
+                    print(f"[Lyria] Pooled session for room {room_id} unusable ({e}), connecting a new one")
+                    self._sessions.pop(room_id, None)
+                    self.pool.discard(*warm)
+                    warm = None
+            if warm is None:
+                session, session_ctx = await self._open_session()
+                await self._play(room_id, session, session_ctx, initial_bpm, *resume)
+
+            path = "warm" if warm is not None else "cold"
+            entry = self._start_ms.setdefault(path, [0, 0.0])
+            entry[0] += 1
+            entry[1] += (time.perf_counter() - started) * 1000
+            print(f"[Lyria] Session started for room {room_id} ({path})")
 
-            # Set default starting prompt
-            await session.set_weighted_prompts(
-                prompts=[types.WeightedPrompt(text="ambient electronic music with soft synth pads", weight=1.0)]
-            )
+        except Exception as e:
+            print(f"[Lyria] Failed to start session for room {room_id}: {e}")
+            raise
 
-            # Start playback
-            await session.play()
+    async def _open_session(self):
+        """Connect a new Lyria session with the default prompt set, ready to play."""
+        session_ctx = self.client.aio.live.music.connect(model="models/lyria-realtime-exp")
+        session = await session_ctx.__aenter__()
+        try:
+            await session.set_weighted_prompts(prompts=INITIAL_PROMPTS)
+        except Exception:
+            await session_ctx.__aexit__(None, None, None)
+            raise
+        return session, session_ctx
 
-            # Kick off receive loop in background
-            task = asyncio.create_task(self._receive_audio_loop(room_id, session))
-            self._receive_tasks[room_id] = task
+    async def _play(
+        self,
+        room_id: str,
+        session,
+        session_ctx,
+        initial_bpm: int,
+        prompts: Optional[List[types.WeightedPrompt]] = None,
+        density: Optional[float] = None,
+        brightness: Optional[float] = None,
+    ):
+        """Bind a connected session to a room, set its prompts and config and start streaming."""
+        prompts = prompts or INITIAL_PROMPTS
+        self._sessions[room_id] = {
+            "session": session, "ctx": session_ctx, "bpm": initial_bpm, "last_prompts": prompts,
+        }
+
+        # Pooled and fresh sessions already carry INITIAL_PROMPTS
+        if _prompts_changed(INITIAL_PROMPTS, prompts):
+            await session.set_weighted_prompts(prompts=prompts)
 
-            print(f"[Lyria] Session started for room {room_id}")
+        # Set initial config
+        await session.set_music_generation_config(
+            config=types.LiveMusicGenerationConfig(
+                bpm=initial_bpm,
+                density=density,
+                brightness=brightness,
+                temperature=1.0,
+            )
+        )
+        if density is not None and brightness is not None:
+            self._sessions[room_id]["last_config"] = (initial_bpm, density, brightness)
 
-        except Exception as e:
-            print(f"[Lyria] Failed to start session for room {room_id}: {e}")
-            raise
+        # Start playback
+        await session.play()
+
+        # Kick off receive loop in background
+        task = asyncio.create_task(self._receive_audio_loop(room_id, session))
+        self._receive_tasks[room_id] = task
+        self._arm_watchdog(room_id, session, LYRIA_HANDOFF_TIMEOUT)
+
+    def note_room_created(self):
+        """A room was created: keep enough warm sessions for the rooms likely to start soon."""
+        self.pool.note_room_created()
 
     async def stop_session(self, room_id: str):
         """Stop Lyria session for a room."""
+        self._forget_commands(room_id)
+        handoff = self._handoffs.pop(room_id, None)
+        if handoff is not None:
+            if handoff.runner is not None:
+                handoff.runner.cancel()
+            await self._drop_replacement(handoff)
+        watchdog = self._watchdogs.pop(room_id, None)
+        if watchdog is not None:
+            watchdog.cancel()
+        self._audio_until.pop(room_id, None)
         task = self._receive_tasks.pop(room_id, None)
         if task:
             task.cancel()
@@ -94,18 +288,113 @@ class LyriaService:
         bpm: int,
         density: float,
         brightness: float,
-    ):
+        priority: int = PRIORITY_NORMAL,
+    ) -> bool:
+        """
+        Queue a prompt/config update on the room's command actor and wait until it
+        is sent. Updates are applied one at a time per room; an update still pending
+        when a newer one arrives is replaced by it (last write wins), so a burst of
+        callers costs one set of Lyria RPCs. Returns False if the update never
+        reached Lyria (no session, a higher-priority update holds the room, or a
+        newer update replaced it). Raises if the Lyria call fails.
+        """
+        if room_id not in self._sessions:
+            print(f"[Lyria] No session found for room {room_id}, skipping prompt update")
+            return False
+        self.commands_received += 1
+        actor = self._commands.get(room_id)
+        if actor is None:
+            actor = self._commands[room_id] = _RoomCommands()
+        held = priority < actor.hold_priority and time.monotonic() < actor.hold_until
+        if held or (actor.pending is not None and priority < actor.priority):
+            self.commands_dropped += 1
+            return False
+        if actor.pending is not None:
+            self.commands_coalesced += 1
+            for waiter in actor.waiters:
+                if not waiter.done():
+                    waiter.set_result(False)
+            actor.waiters = []
+        actor.pending = (prompts, bpm, density, brightness)
+        actor.priority = priority
+        future = asyncio.get_running_loop().create_future()
+        actor.waiters.append(future)
+        if actor.task is None:
+            actor.task = asyncio.create_task(self._run_commands(room_id, actor))
+        return await future
+
+    def current_prompts(self, room_id: str) -> Optional[List[types.WeightedPrompt]]:
+        """The prompts Lyria is about to play: the pending update's, else the last ones sent."""
+        actor = self._commands.get(room_id)
+        if actor is not None and actor.pending is not None:
+            return actor.pending[0]
+        session_data = self._sessions.get(room_id)
+        return session_data.get("last_prompts") if session_data else None
+
+    async def _run_commands(self, room_id: str, actor: _RoomCommands):
+        """Send the room's pending update, then any that arrived meanwhile, until none is left."""
+        try:
+            while actor.pending is not None:
+                update, priority, waiters = actor.pending, actor.priority, actor.waiters
+                actor.pending, actor.priority, actor.waiters = None, PRIORITY_NORMAL, []
+                if priority > PRIORITY_NORMAL:
+                    actor.hold_priority = priority
+                    actor.hold_until = time.monotonic() + LYRIA_PRIORITY_HOLD
+                try:
+                    applied = await self._apply_update(room_id, *update)
+                except asyncio.CancelledError:
+                    # Session stopped mid-update
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(False)
+                    raise
+                except Exception as e:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                    continue
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(applied)
+        finally:
+            actor.task = None
+            for waiter in actor.waiters:
+                if not waiter.done():
+                    waiter.cancel()
+
+    def _forget_commands(self, room_id: str):
+        actor = self._commands.pop(room_id, None)
+        if actor is None:
+            return
+        actor.pending = None
+        for waiter in actor.waiters:
+            if not waiter.done():
+                waiter.set_result(False)
+        actor.waiters = []
+        if actor.task is not None:
+            actor.task.cancel()
+
+    async def _apply_update(
+        self,
+        room_id: str,
+        prompts: List[types.WeightedPrompt],
+        bpm: int,
+        density: float,
+        brightness: float,
+    ) -> bool:
         """
-        Called by the arbitration tick to update Lyria with new prompts.
-        This is the key method that makes the music change.
-        BPM is clamped to ±5 per tick for smooth transitions.
+        Send one update to Lyria. Only the room's command actor calls this, so
+        session_data["bpm"] is never read and written by two updates at once.
+        BPM is clamped to ±MAX_BPM_DELTA per update for smooth transitions.
         """
         session_data = self._sessions.get(room_id)
         if not session_data:
             print(f"[Lyria] No session found for room {room_id}, skipping prompt update")
-            return
+            return False
 
         session = session_data["session"]
+        # Latest requested state, replayed onto a replacement session after a failover
+        session_data["wanted"] = (prompts, bpm, density, brightness)
         try:
             # Store Gemini's desired BPM as the target
             session_data["target_bpm"] = bpm
@@ -116,26 +405,44 @@ class LyriaService:
             if abs(delta) > self.MAX_BPM_DELTA:
                 bpm = last_bpm + self.MAX_BPM_DELTA * (1 if delta > 0 else -1)
 
-            # BPM changes require reset_context() per skill.md
-            if bpm != last_bpm:
-                print(f"[Lyria] BPM {last_bpm} → {bpm} (target {session_data['target_bpm']}) for room {room_id} — resetting context")
-                await session.reset_context()
-
-            await session.set_music_generation_config(
-                config=types.LiveMusicGenerationConfig(
-                    bpm=bpm,
-                    density=density,
-                    brightness=brightness,
-                    temperature=1.0,
+            self.updates_sent += 1
+            # Only send what changed since the session's last applied config/prompts —
+            # idle ticks repeat the previous arbitration result unchanged
+            send_config = _config_changed(session_data.get("last_config"), bpm, density, brightness)
+            send_prompts = _prompts_changed(session_data.get("last_prompts"), prompts)
+            self.rpcs_saved += (not send_config) + (not send_prompts)
+            if not (send_config or send_prompts):
+                return True
+
+            if send_config:
+                # BPM changes require reset_context() per skill.md
+                if bpm != last_bpm:
+                    print(f"[Lyria] BPM {last_bpm} → {bpm} (target {session_data['target_bpm']}) for room {room_id} — resetting context")
+                    self.rpcs_sent += 1
+                    await session.reset_context()
+
+                self.rpcs_sent += 1
+                await session.set_music_generation_config(
+                    config=types.LiveMusicGenerationConfig(
+                        bpm=bpm,
+                        density=density,
+                        brightness=brightness,
+                        temperature=1.0,
+                    )
                 )
-            )
-            session_data["bpm"] = bpm
-
-            # Update weighted prompts — this is what makes the music morph
-            await session.set_weighted_prompts(prompts=prompts)
-            session_data["last_prompts"] = prompts  # cached for immediate applause replay
-
-            print(f"[Lyria] Updated prompts for room {room_id}: {[p.text for p in prompts]}")
+                # A failover may have swapped the session while this was in flight
+                if session_data["session"] is session:
+                    session_data["bpm"] = bpm
+                    session_data["last_config"] = (bpm, density, brightness)
+
+            if send_prompts:
+                # Update weighted prompts — this is what makes the music morph
+                self.rpcs_sent += 1
+                await session.set_weighted_prompts(prompts=prompts)
+                if session_data["session"] is session:
+                    session_data["last_prompts"] = prompts  # cached for immediate applause replay
+                print(f"[Lyria] Updated prompts for room {room_id}: {[p.text for p in prompts]}")
+            return True
 
         except Exception as e:
             print(f"[Lyria] Failed to update prompts for room {room_id}: {e}")
@@ -149,11 +456,45 @@ class LyriaService:
                     self._sessions.pop(room_id, None)
             raise  # Let tick loop handle the error
 
+    def get_stats(self) -> dict:
+        """Counters for the /stats endpoint."""
+        return {
+            "sessions": len(self._sessions),
+            "pool": self.pool.stats(),
+            "start_ms": {path: round(total / count, 1) for path, (count, total) in self._start_ms.items()},
+            "failover": {
+                "started": self.failovers_started,
+                "completed": self.failovers_completed,
+                "crossfaded": self.failovers_crossfaded,
+                "last_crossfade_ms": round(self.last_crossfade_ms, 1),
+                "failed": self.failovers_failed,
+                "silence_ms": self._silence_summary(),
+            },
+            "commands": {
+                "received": self.commands_received,
+                "coalesced": self.commands_coalesced,
+                "dropped_by_priority": self.commands_dropped,
+                "updates_sent": self.updates_sent,
+                "rpcs_sent": self.rpcs_sent,
+                "rpcs_saved": self.rpcs_saved,
+            },
+        }
+
+    def _silence_summary(self) -> dict:
+        samples = self._failover_silence_ms
+        if not samples:
+            return {}
+        return {
+            "last": round(samples[-1], 1),
+            "max": round(max(samples), 1),
+            "avg": round(sum(samples) / len(samples), 1),
+        }
+
     async def _receive_audio_loop(self, room_id: str, session):
         """
         Continuously receives audio chunks from Lyria and broadcasts to room clients.
         Runs as a background task for the lifetime of the session.
-        On error, attempts to restart the session up to 3 times.
+        On error, fails over to a replacement session (see _failover).
         """
         print(f"[Lyria] Audio receive loop started for room {room_id}")
         try:
@@ -164,8 +505,8 @@ class LyriaService:
                 # Extract audio data from chunks
                 if hasattr(message.server_content, "audio_chunks") and message.server_content.audio_chunks:
                     for chunk in message.server_content.audio_chunks:
-                        if chunk.data and self.broadcast_callback:
-                            await self.broadcast_callback(room_id, chunk.data)
+                        if chunk.data and not await self._forward(room_id, session, chunk.data):
+                            return
 
                 # Handle filtered prompts (safety filter triggered)
                 if hasattr(message.server_content, "filtered_prompt") and message.server_content.filtered_prompt:
@@ -175,45 +516,240 @@ class LyriaService:
             print(f"[Lyria] Receive loop cancelled for room {room_id}")
         except Exception as e:
             print(f"[Lyria] Receive loop error for room {room_id}: {e}")
-            # Clean up dead session
-            self._sessions.pop(room_id, None)
-            self._receive_tasks.pop(room_id, None)
-            # Attempt to restart the session
-            await self._attempt_restart(room_id)
+            self._stream_failed(room_id, session, e)
+
+    async def _forward(self, room_id: str, session, data: bytes) -> bool:
+        """Route one chunk from `session`. Returns False once that stream is no longer wanted."""
+        handoff = self._handoffs.get(room_id)
+        if handoff is not None and session is handoff.new:
+            handoff.pending.append(data)
+            if handoff.wait_timer is not None:
+                return True
+            if handoff.old_recovered and handoff.old_alive:
+                # Both streams are live: switch once the old stream sends its tail, blending the two
+                wait = max(0.0, self._audio_until.get(room_id, 0.0) - time.monotonic()) + LYRIA_STALL_GRACE
+                handoff.wait_timer = timer_wheel.call_later(wait, self._switch, room_id, handoff, group=room_id)
+                return True
+            await self._switch(room_id, handoff)
+            return True
 
-    async def _attempt_restart(self, room_id: str, max_retries: int = 3):
-        """Try to restart a Lyria session after a stream failure."""
-        from services.room_service import room_service as _rs
+        session_data = self._sessions.get(room_id)
+        if session_data is None or session_data["session"] is not session:
+            return False
+        if handoff is not None:
+            handoff.old_recovered = True
+            if handoff.pending:
+                # Collect a full crossfade window of the old stream before switching,
+                # as long as the audio already sent keeps listeners playing meanwhile
+                handoff.old_tail.append(data)
+                missing = fade_frames() * FRAME_BYTES - sum(map(len, handoff.old_tail))
+                if missing > 0 and self._audio_until.get(room_id, 0.0) - time.monotonic() > missing / BYTES_PER_SECOND:
+                    return True
+                await self._switch(room_id, handoff)
+                return False
+            await self._broadcast(room_id, data)
+            return True
+        await self._broadcast(room_id, data)
+        self._arm_watchdog(room_id, session)
+        return True
+
+    async def _broadcast(self, room_id: str, data: bytes):
+        now = time.monotonic()
+        self._audio_until[room_id] = max(self._audio_until.get(room_id, now), now) + len(data) / BYTES_PER_SECOND
+        if self.broadcast_callback:
+            await self.broadcast_callback(room_id, data)
+
+    def _arm_watchdog(self, room_id: str, session, delay: Optional[float] = None):
+        """(Re)start the stall timer: fires if `session` sends nothing before its audio runs out."""
+        timer = self._watchdogs.get(room_id)
+        if timer is not None:
+            timer.cancel()
+        if delay is None:
+            delay = max(0.0, self._audio_until.get(room_id, 0.0) - time.monotonic()) + LYRIA_STALL_GRACE
+        self._watchdogs[room_id] = timer_wheel.call_later(delay, self._on_stall, room_id, session, group=room_id)
+
+    def _on_stall(self, room_id: str, session):
+        session_data = self._sessions.get(room_id)
+        if session_data is None or session_data["session"] is not session or room_id in self._handoffs:
+            return
+        print(f"[Lyria] Stream for room {room_id} stalled, failing over")
+        self._start_failover(room_id, old_alive=True, reason="stalled")
+
+    def _stream_failed(self, room_id: str, session, error: Exception):
+        handoff = self._handoffs.get(room_id)
+        if handoff is not None:
+            if session is handoff.old:
+                handoff.old_alive = False
+                if handoff.pending:
+                    self._spawn(self._switch(room_id, handoff))
+            elif session is handoff.new and handoff.switched is not None and not handoff.switched.done():
+                handoff.switched.set_exception(error)
+            return
+        session_data = self._sessions.get(room_id)
+        if session_data is not None and session_data["session"] is session:
+            self._start_failover(room_id, old_alive=False, reason=str(error))
 
-        for attempt in range(1, max_retries + 1):
-            # Only restart if room still exists and is playing
-            room = _rs.rooms.get(room_id)
-            if not room or not room.is_playing:
-                print(f"[Lyria] Room {room_id} no longer active, skipping restart")
-                return
+    def _start_failover(self, room_id: str, old_alive: bool, reason: str):
+        session_data = self._sessions[room_id]
+        handoff = _Handoff(session_data["session"], session_data["ctx"], old_alive, reason)
+        self._handoffs[room_id] = handoff
+        self.failovers_started += 1
+        handoff.runner = asyncio.create_task(self._failover(room_id, handoff))
 
-            wait = 2 * attempt
-            print(f"[Lyria] Restart attempt {attempt}/{max_retries} for room {room_id} in {wait}s...")
-            await asyncio.sleep(wait)
+    async def _failover(self, room_id: str, handoff: _Handoff):
+        """
+        Bring up a replacement session while the old one (if still alive) keeps
+        playing; _forward/_switch hand the room over once the replacement has audio.
+        """
+        from services.room_service import room_service as _rs
 
-            try:
-                await self.start_session(room_id, initial_bpm=room.bpm)
-                print(f"[Lyria] Restart succeeded for room {room_id}")
+        try:
+            for attempt in range(1, LYRIA_FAILOVER_ATTEMPTS + 1):
+                # Only fail over if room still exists and is playing
+                room = _rs.rooms.get(room_id)
+                if not room or not room.is_playing or room_id not in self._sessions:
+                    print(f"[Lyria] Room {room_id} no longer active, skipping failover")
+                    return
+                if attempt > 1:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 2))
+                try:
+                    await self._open_replacement(room_id, handoff)
+                    await asyncio.wait_for(asyncio.shield(handoff.switched), LYRIA_HANDOFF_TIMEOUT)
+                except Exception as e:
+                    print(f"[Lyria] Failover attempt {attempt}/{LYRIA_FAILOVER_ATTEMPTS} failed for room {room_id}: {e!r}")
+                    await self._drop_replacement(handoff)
+                    continue
+
+                print(f"[Lyria] Failover complete for room {room_id} ({handoff.reason}), silence {self._failover_silence_ms[-1]:.0f} ms")
                 _rs.log_event(room_id, "system", "Audio stream recovered")
                 await _rs.broadcast_json(room_id, {
                     "type": "stream_recovered",
                     "message": "Audio stream reconnected",
                 })
                 return
-            except Exception as e2:
-                print(f"[Lyria] Restart attempt {attempt} failed for room {room_id}: {e2}")
-
-        # All retries exhausted — notify frontend
-        print(f"[Lyria] All restart attempts failed for room {room_id}")
-        await _rs.broadcast_json(room_id, {
-            "type": "stream_error",
-            "message": "Audio stream lost. Please restart the session.",
-        })
+
+            self.failovers_failed += 1
+            if handoff.old_alive:
+                print(f"[Lyria] No replacement for room {room_id}, staying on the current stream")
+                self._arm_watchdog(room_id, handoff.old)
+                return
+            # All attempts exhausted and the old stream is dead — notify frontend
+            print(f"[Lyria] All failover attempts failed for room {room_id}")
+            self._sessions.pop(room_id, None)
+            self._receive_tasks.pop(room_id, None)
+            self._close_later(handoff.old, handoff.old_ctx)
+            await _rs.broadcast_json(room_id, {
+                "type": "stream_error",
+                "message": "Audio stream lost. Please restart the session.",
+            })
+        finally:
+            if self._handoffs.get(room_id) is handoff:
+                del self._handoffs[room_id]
+
+    async def _open_replacement(self, room_id: str, handoff: _Handoff):
+        """Connect (or take from the pool) a session and start it on the room's current state."""
+        session_data = self._sessions[room_id]
+        prompts = session_data.get("last_prompts") or INITIAL_PROMPTS
+        bpm, density, brightness = session_data.get("last_config") or (session_data.get("bpm", 100), None, None)
+        handoff.switched = asyncio.get_running_loop().create_future()
+        handoff.new, handoff.new_ctx = self.pool.acquire() or await self._open_session()
+        # Pooled and fresh sessions already carry INITIAL_PROMPTS
+        if _prompts_changed(INITIAL_PROMPTS, prompts):
+            await handoff.new.set_weighted_prompts(prompts=prompts)
+        await handoff.new.set_music_generation_config(
+            config=types.LiveMusicGenerationConfig(bpm=bpm, density=density, brightness=brightness, temperature=1.0)
+        )
+        await handoff.new.play()
+        handoff.primed = (prompts, bpm, density, brightness)
+        handoff.new_task = asyncio.create_task(self._receive_audio_loop(room_id, handoff.new))
+
+    async def _drop_replacement(self, handoff: _Handoff):
+        if handoff.wait_timer is not None:
+            handoff.wait_timer.cancel()
+            handoff.wait_timer = None
+        if handoff.new_task is not None:
+            handoff.new_task.cancel()
+        if handoff.switched is not None and not handoff.switched.done():
+            handoff.switched.cancel()
+        if handoff.new_ctx is not None:
+            await self._close_stream(handoff.new, handoff.new_ctx)
+        handoff.new = handoff.new_ctx = handoff.new_task = None
+        handoff.pending = []
+        handoff.old_tail = []
+
+    async def _switch(self, room_id: str, handoff: _Handoff):
+        """
+        Make the replacement the room's stream. Its held-back audio is crossfaded over
+        the old stream's tail (the old audio for the same stretch of time) or, with no
+        old audio to blend, faded in from silence. Then the old session is closed.
+        The blend covers LYRIA_CROSSFADE_MS unless less of either stream was available:
+        the old tail is only held back while listeners still have audio queued.
+        """
+        session_data = self._sessions.get(room_id)
+        if self._handoffs.get(room_id) is not handoff or session_data is None or not handoff.pending:
+            return
+        del self._handoffs[room_id]
+        if handoff.wait_timer is not None:
+            handoff.wait_timer.cancel()
+        audio, handoff.pending = b"".join(handoff.pending), []
+        old_tail, handoff.old_tail = b"".join(handoff.old_tail), []
+        if old_tail:
+            blended = min(fade_frames(), len(old_tail) // FRAME_BYTES, len(audio) // FRAME_BYTES)
+            audio = crossfade(old_tail, audio, fade_frames())
+            self.failovers_crossfaded += 1
+            self.last_crossfade_ms = blended / SAMPLE_RATE * 1000
+        else:
+            audio = fade_in(audio, fade_frames())
+
+        now = time.monotonic()
+        silence = max(0.0, now - self._audio_until.get(room_id, now))
+        self._failover_silence_ms.append(silence * 1000)
+        self.failovers_completed += 1
+
+        old_task = self._receive_tasks.get(room_id)
+        prompts, bpm, density, brightness = handoff.primed
+        session_data["session"], session_data["ctx"] = handoff.new, handoff.new_ctx
+        session_data["bpm"] = bpm
+        session_data["last_prompts"] = prompts
+        if density is not None:
+            session_data["last_config"] = (bpm, density, brightness)
+        self._receive_tasks[room_id] = handoff.new_task
+        if not handoff.switched.done():
+            handoff.switched.set_result(True)
+
+        await self._broadcast(room_id, audio)
+        self._arm_watchdog(room_id, handoff.new)
+
+        if old_task is not None and old_task is not asyncio.current_task():
+            old_task.cancel()
+        self._close_later(handoff.old, handoff.old_ctx)
+
+        # Updates that failed against the old stream while the replacement came up
+        wanted = session_data.get("wanted")
+        if wanted and (_prompts_changed(prompts, wanted[0]) or _config_changed(session_data.get("last_config"), *wanted[1:])):
+            self._spawn(self._resend(room_id, wanted))
+
+    async def _resend(self, room_id: str, wanted: tuple):
+        try:
+            await self.update_prompts(room_id, *wanted)
+        except Exception as e:
+            print(f"[Lyria] Failed to restore prompts on replacement session for room {room_id}: {e}")
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _close_later(self, session, ctx):
+        self._spawn(self._close_stream(session, ctx))
+
+    @staticmethod
+    async def _close_stream(session, ctx):
+        try:
+            await session.stop()
+            await ctx.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"[Lyria] Error closing replaced session: {e}")
 
     def is_playing(self, room_id: str) -> bool:
         return room_id in self._sessions
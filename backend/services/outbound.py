@@ -0,0 +1,223 @@
+"""
+Outbound Queues
+Per-connection bounded send lanes drained by a dedicated writer task, so one slow
+client can never stall the Lyria receive loop or the rest of the room.
+Control messages (pre-encoded JSON text) and audio (bytes) travel in separate lanes;
+control always drains first.
+Audio broadcast as a SharedFrame is encoded into a WebSocket frame once and written
+straight to each connection's transport when the server allows it.
+"""
+import asyncio
+import json
+import os
+import struct
+from collections import deque
+from fastapi import WebSocket
+
+# Max audio chunks buffered per client before the overflow policy kicks in
+OUTBOUND_AUDIO_QUEUE = int(os.getenv("OUTBOUND_AUDIO_QUEUE", "32"))
+# Max control messages buffered per client — overflowing this always disconnects
+OUTBOUND_CONTROL_QUEUE = int(os.getenv("OUTBOUND_CONTROL_QUEUE", "256"))
+# "drop_oldest": drop the oldest audio chunk, disconnect after OUTBOUND_MAX_AUDIO_DROPS
+#                consecutive drops without a successful send
+# "disconnect":  disconnect on the first audio overflow
+OUTBOUND_OVERFLOW_POLICY = os.getenv("OUTBOUND_OVERFLOW_POLICY", "drop_oldest")
+OUTBOUND_MAX_AUDIO_DROPS = int(os.getenv("OUTBOUND_MAX_AUDIO_DROPS", "64"))
+
+# Write pre-encoded audio frames directly to the transport when possible
+OUTBOUND_DIRECT_WRITES = os.getenv("OUTBOUND_DIRECT_WRITES", "1") == "1"
+
+# Close code sent to clients disconnected for falling too far behind
+CLOSE_TOO_SLOW = 1013  # "Try Again Later"
+
+
+def encode_json(message: dict) -> str:
+    """Encode a message exactly like WebSocket.send_json does, so it can be encoded once and sent many times."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_binary_frame(payload) -> bytes:
+    """RFC 6455 server→client binary frame: FIN + opcode 0x2, unmasked."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x82, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x82, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x82, 127, n)
+    return b"".join([header, payload])
+
+
+class SharedFrame:
+    """
+    An audio payload sent to many clients. Server→client frames are unmasked, so
+    the encoded WebSocket frame is identical for every recipient and built once.
+    """
+
+    __slots__ = ("payload", "_wire")
+
+    def __init__(self, payload):
+        self.payload = payload
+        self._wire = None
+
+    @property
+    def wire(self) -> bytes:
+        if self._wire is None:
+            self._wire = encode_binary_frame(self.payload)
+        return self._wire
+
+
+def find_raw_protocol(ws: WebSocket):
+    """
+    Find the websockets protocol object (uvicorn's default WebSocket implementation)
+    behind a Starlette WebSocket by unwrapping its ASGI send callable through any
+    middleware closures. Returns None when there is no such protocol (wsproto,
+    other servers, test doubles) so callers fall back to ws.send_bytes.
+    """
+    stack = [getattr(ws, "_send", None)]
+    seen = set()
+    while stack and len(seen) < 16:
+        fn = stack.pop()
+        if fn is None or id(fn) in seen:
+            continue
+        seen.add(id(fn))
+        owner = getattr(fn, "__self__", None)
+        if owner is not None and all(hasattr(owner, a) for a in ("transport", "ensure_open", "drain")):
+            return owner
+        for cell in getattr(fn, "__closure__", None) or ():
+            try:
+                content = cell.cell_contents
+            except ValueError:
+                continue
+            if callable(content):
+                stack.append(content)
+    return None
+
+
+class OutboundQueue:
+    """Bounded two-lane send queue for one WebSocket, drained by its own writer task."""
+
+    # Thousands of these exist in rooms with many listeners — keep them small
+    __slots__ = (
+        "ws", "_audio", "_control", "_audio_maxlen", "_control_maxlen", "_overflow_policy",
+        "_max_audio_drops", "_wakeup", "closed", "audio_sent", "audio_dropped", "control_sent",
+        "direct_writes", "_consecutive_drops", "_protocol", "_task",
+    )
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        audio_maxlen: int = OUTBOUND_AUDIO_QUEUE,
+        control_maxlen: int = OUTBOUND_CONTROL_QUEUE,
+        overflow_policy: str = OUTBOUND_OVERFLOW_POLICY,
+        max_audio_drops: int = OUTBOUND_MAX_AUDIO_DROPS,
+    ):
+        self.ws = ws
+        self._audio: deque = deque()
+        self._control: deque = deque()
+        self._audio_maxlen = audio_maxlen
+        self._control_maxlen = control_maxlen
+        self._overflow_policy = overflow_policy
+        self._max_audio_drops = max_audio_drops
+        self._wakeup = asyncio.Event()
+        self.closed = False
+        # Counters
+        self.audio_sent = 0
+        self.audio_dropped = 0
+        self.control_sent = 0
+        self.direct_writes = 0
+        self._consecutive_drops = 0
+        self._protocol = find_raw_protocol(ws) if OUTBOUND_DIRECT_WRITES else None
+        self._task = asyncio.create_task(self._writer())
+
+    # ── Producers (never await) ──────────────────────────────────────────────
+
+    def put_audio(self, data):
+        """Queue audio: bytes-like, or a SharedFrame for broadcasts."""
+        if self.closed:
+            return
+        if len(self._audio) >= self._audio_maxlen:
+            if self._overflow_policy == "disconnect":
+                self._disconnect("audio queue overflow")
+                return
+            self._audio.popleft()
+            self.audio_dropped += 1
+            self._consecutive_drops += 1
+            if self._consecutive_drops >= self._max_audio_drops:
+                self._disconnect("too many consecutive audio drops")
+                return
+        self._audio.append(data)
+        self._wakeup.set()
+
+    def put_text(self, text: str):
+        """Queue an already-encoded JSON message on the control lane."""
+        if self.closed:
+            return
+        if len(self._control) >= self._control_maxlen:
+            self._disconnect("control queue overflow")
+            return
+        self._control.append(text)
+        self._wakeup.set()
+
+    def put_json(self, message: dict):
+        self.put_text(encode_json(message))
+
+    def depth(self) -> int:
+        return len(self._audio) + len(self._control)
+
+    # ── Writer ───────────────────────────────────────────────────────────────
+
+    async def _writer(self):
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._control or self._audio:
+                    if self._control:
+                        await self.ws.send_text(self._control.popleft())
+                        self.control_sent += 1
+                    else:
+                        await self._send_audio(self._audio.popleft())
+                        self.audio_sent += 1
+                        self._consecutive_drops = 0
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[Outbound] Send failed, closing queue: {e}")
+            self._mark_closed()
+
+    async def _send_audio(self, item):
+        if not isinstance(item, SharedFrame):
+            await self.ws.send_bytes(item)
+        elif self._protocol is not None:
+            # Same checks and flow control as websockets' own send(), minus the framing
+            await self._protocol.ensure_open()
+            self._protocol.transport.write(item.wire)
+            await self._protocol.drain()
+            self.direct_writes += 1
+        else:
+            await self.ws.send_bytes(item.payload)
+
+    def _disconnect(self, reason: str):
+        print(f"[Outbound] Disconnecting slow client ({reason}, {self.audio_dropped} chunks dropped total)")
+        self.close()
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await asyncio.wait_for(self.ws.close(code=CLOSE_TOO_SLOW), timeout=2.0)
+        except Exception:
+            pass
+
+    def _mark_closed(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._audio.clear()
+        self._control.clear()
+
+    def close(self):
+        """Stop the writer task and discard anything still queued."""
+        self._mark_closed()
+        if not self._task.done():
+            self._task.cancel()
@@ -1,24 +1,61 @@
 """
 Room Service — C (Chinmay)
-Manages room state, input collection, and the 4-second arbitration tick loop.
+Manages room state, input collection, and the adaptive arbitration tick loop.
 """
 import asyncio
+import itertools
+import os
 import uuid
-import json
 import time
-from typing import Dict, Set, Optional, Any
+from typing import Dict, Set, Optional, Any, Iterator, Tuple
 from fastapi import WebSocket
 from models.schemas import RoomState, WeightedPrompt, Role
+from services.outbound import OutboundQueue, SharedFrame, encode_json
+from services.audio_buffer import AudioRingBuffer, AUDIO_PREROLL_SECONDS
+from services.audio_framing import AudioFramer, AUDIO_FRAME_MS, FRAMED_SIZE, pcm_view
+from services.audio_segments import AudioSegmenter
+from services.audio_tiers import FrameRenditions, AUDIO_TIERS, TIER_FULL
+from services.timer_wheel import Timer, timer_wheel
+
+# Adaptive tick: an input fires arbitration after TICK_DEBOUNCE (so a burst of inputs
+# shares one tick), never sooner than TICK_MIN_INTERVAL after the room's previous tick.
+# With no inputs the loop still ticks, first after TICK_IDLE_INTERVAL, then backing off
+# exponentially up to TICK_IDLE_MAX.
+TICK_DEBOUNCE = float(os.getenv("TICK_DEBOUNCE", "0.25"))
+TICK_MIN_INTERVAL = float(os.getenv("TICK_MIN_INTERVAL", "1.0"))
+TICK_IDLE_INTERVAL = float(os.getenv("TICK_IDLE_INTERVAL", "4.0"))
+TICK_IDLE_MAX = float(os.getenv("TICK_IDLE_MAX", "60.0"))
+# Idle ticks are spread ± this fraction so rooms started together don't tick together
+TICK_JITTER = float(os.getenv("TICK_JITTER", "0.1"))
+# A playing room with no sockets (players or listeners) for this long hibernates: its
+# tick loop and Lyria session stop, its musical state stays for the first socket back
+ROOM_HIBERNATE_GRACE = float(os.getenv("ROOM_HIBERNATE_GRACE", "30"))
 
 
 class RoomService:
     MAX_USERS_PER_ROOM = 10
+    # Listen-only connections (audio + throttled summary, no role) are capped separately
+    MAX_LISTENERS_PER_ROOM = 5000
+    # Minimum seconds between state_summary messages to listeners
+    LISTENER_SUMMARY_INTERVAL = 5.0
+    # broadcast_json messages listeners get too: play state and room lifecycle
+    LISTENER_MESSAGE_TYPES = {
+        "music_started", "music_stopped", "room_closed", "room_ended", "stream_error", "stream_recovered",
+    }
 
     def __init__(self):
         # room_id → RoomState
         self.rooms: Dict[str, RoomState] = {}
         # room_id → set of WebSocket connections
         self.connections: Dict[str, Set[WebSocket]] = {}
+        # room_id → set of listen-only WebSocket connections (no role, no state_update)
+        self.listeners: Dict[str, Set[WebSocket]] = {}
+        # room_id → (monotonic time, is_playing) of the last state_summary sent to listeners
+        self._listener_summary_at: Dict[str, Tuple[float, bool]] = {}
+        # room_id → timer sending the state_summary held back by LISTENER_SUMMARY_INTERVAL
+        self._listener_summary_timers: Dict[str, Timer] = {}
+        # Rooms whose listeners were already sent room_closed / room_ended
+        self._listeners_closed: Set[str] = set()
         # room_id → user_id → WebSocket
         self.user_sockets: Dict[str, Dict[str, WebSocket]] = {}
         # room_id → user_id → Role
@@ -27,8 +64,10 @@ class RoomService:
         self._role_queue = [Role.DRUMMER, Role.VIBE_SETTER, Role.GENRE_DJ, Role.INSTRUMENTALIST]
         # room_id → host device name (for lobby room listing)
         self._host_devices: Dict[str, str] = {}
-        # room_id → asyncio task for tick loop
-        self._tick_tasks: Dict[str, asyncio.Task] = {}
+        # room_id → arbitration tick state (timers live on the shared timer wheel)
+        self._tickers: Dict[str, _Ticker] = {}
+        # tick cause ("input" | "idle") → ticks fired
+        self._tick_counts: Dict[str, int] = {"input": 0, "idle": 0}
         # room_id → { user_id: timestamp } for the current drop vote window
         self._drop_votes: Dict[str, Dict[str, float]] = {}
         # room_id → timestamp when the current drop window started (None if no active window)
@@ -41,6 +80,42 @@ class RoomService:
         self._timeline: Dict[str, list] = {}
         # room_id → role → last input timestamp (for recency-based influence)
         self._input_timestamps: Dict[str, Dict[str, float]] = {}
+        # WebSocket → bounded outbound queue + writer task (one per connection)
+        self._outbound: Dict[WebSocket, OutboundQueue] = {}
+        # room_id → last Gemini reasoning (shown alongside the state)
+        self._gemini_reasoning: Dict[str, str] = {}
+        # room_id → encoded state_update JSON; missing means dirty (rebuilt on next send)
+        self._state_cache: Dict[str, str] = {}
+        # room_id → state version, bumped each time a changed snapshot is built
+        self._state_version: Dict[str, int] = {}
+        # room_id → (last built snapshot, timeline seq at that point) for computing deltas
+        self._last_state: Dict[str, tuple] = {}
+        # room_id → encoded state_delta from the previous version (None if not available)
+        self._delta_cache: Dict[str, Optional[str]] = {}
+        # room_id → number of timeline events ever logged
+        self._timeline_seq: Dict[str, int] = {}
+        # WebSocket → (room_id, last version sent) for clients that opted into state_delta
+        self._delta_clients: Dict[WebSocket, tuple] = {}
+        # room_id → ring buffer of recent PCM for late-join / reconnect pre-roll
+        self._audio_buffers: Dict[str, AudioRingBuffer] = {}
+        # room_id → framing stage (coalescing + sequence/timestamp headers)
+        self._framers: Dict[str, AudioFramer] = {}
+        # phase ("local" | "refined") → [count, total ms, max ms] from input_update to Lyria update
+        self._input_latency: Dict[str, list] = {}
+        # room_id → HTTP audio segments, created on the first manifest request
+        self._segmenters: Dict[str, AudioSegmenter] = {}
+        # Connections that asked for framed audio (header + PCM) instead of bare PCM
+        self._framed_clients: Set[WebSocket] = set()
+        # WebSocket → audio tier (connections not listed get TIER_FULL)
+        self._audio_tiers: Dict[WebSocket, str] = {}
+        # room_id → pending hibernation timer (armed when the last socket left)
+        self._idle_timers: Dict[str, Timer] = {}
+        # Rooms still is_playing but with generation stopped until a socket returns
+        self._hibernating: Set[str] = set()
+        # room_id → monotonic time an HTTP audio manifest or segment was last served
+        self._http_served: Dict[str, float] = {}
+        # async wake(room_id), set by routers/ws.py: resumes a hibernating room
+        self.wake_callback = None
 
     def create_room(self, host_id: str, device_name: str = "Unknown", room_name: str = "") -> RoomState:
         room_id = str(uuid.uuid4())[:6].upper()
@@ -56,6 +131,7 @@ class RoomService:
         )
         self.rooms[room_id] = room
         self.connections[room_id] = set()
+        self.listeners[room_id] = set()
         self.user_sockets[room_id] = {}
         self.user_roles[room_id] = {}
         self._host_devices[room_id] = device_name
@@ -77,6 +153,7 @@ class RoomService:
                 "room_id": room_id,
                 "room_name": self._room_names.get(room_id, ""),
                 "member_count": len(room_roles),
+                "listener_count": len(self.listeners.get(room_id, ())),
                 "is_playing": room.is_playing,
                 "host_device": self._host_devices.get(room_id, "Unknown"),
                 "roles_taken": [role.value for role in room_roles.values()],
@@ -100,6 +177,7 @@ class RoomService:
         # Store display name (update on every join/reconnect if provided)
         if display_name:
             self.user_display_names.setdefault(room_id, {})[user_id] = display_name
+            self.mark_state_dirty(room_id)
 
         room_roles = self.user_roles.get(room_id, {})
 
@@ -125,6 +203,10 @@ class RoomService:
         print(f"[Room] Assigned {assigned_role.value} to {name_label} in room {room_id}")
         return assigned_role
 
+    def set_display_name(self, room_id: str, user_id: str, display_name: str):
+        self.user_display_names.setdefault(room_id, {})[user_id] = display_name
+        self.mark_state_dirty(room_id)
+
     def change_user_role(self, room_id: str, user_id: str, new_role: Role) -> Optional[str]:
         """Change a user's role. Returns old role value on success, None on failure.
         Returns None if the role is already taken by another user."""
@@ -151,6 +233,118 @@ class RoomService:
         if room_id in self.user_sockets:
             self.user_sockets[room_id].pop(user_id, None)
 
+    def add_listener(self, room_id: str, ws: WebSocket) -> bool:
+        """Register a listen-only connection. Skips role assignment and all per-user bookkeeping."""
+        listeners = self.listeners.get(room_id)
+        if listeners is None:
+            return False
+        if len(listeners) >= self.MAX_LISTENERS_PER_ROOM:
+            print(f"[Room] Room {room_id} has {self.MAX_LISTENERS_PER_ROOM} listeners — rejecting listener")
+            return False
+        listeners.add(ws)
+        return True
+
+    def remove_listener(self, room_id: str, ws: WebSocket):
+        if room_id in self.listeners:
+            self.listeners[room_id].discard(ws)
+
+    def has_audience(self, room_id: str) -> bool:
+        """Sockets in the room, or HTTP segment consumers seen within ROOM_HIBERNATE_GRACE."""
+        return self._has_sockets(room_id) or self._http_served_ago(room_id) < ROOM_HIBERNATE_GRACE
+
+    def _has_sockets(self, room_id: str) -> bool:
+        return bool(self.connections.get(room_id)) or bool(self.listeners.get(room_id))
+
+    def _http_served_ago(self, room_id: str) -> float:
+        return time.monotonic() - self._http_served.get(room_id, float("-inf"))
+
+    def note_http_audience(self, room_id: str):
+        """An HTTP audio manifest or segment was served: the room has an audience."""
+        if room_id in self.rooms:
+            self._http_served[room_id] = time.monotonic()
+
+    def schedule_hibernation(self, room_id: str, callback):
+        """The last socket may have left: call `callback(room_id)` once nobody has listened for ROOM_HIBERNATE_GRACE."""
+        room = self.rooms.get(room_id)
+        if (not room or not room.is_playing or self._has_sockets(room_id)
+                or room_id in self._hibernating or room_id in self._idle_timers):
+            return
+        self._idle_timers[room_id] = timer_wheel.call_later(
+            ROOM_HIBERNATE_GRACE, self._hibernation_due, room_id, callback, group=room_id
+        )
+
+    def _hibernation_due(self, room_id: str, callback):
+        self._idle_timers.pop(room_id, None)
+        room = self.rooms.get(room_id)
+        if not room or not room.is_playing or self._has_sockets(room_id):
+            return
+        served_ago = self._http_served_ago(room_id)
+        if served_ago < ROOM_HIBERNATE_GRACE:
+            # HTTP consumers are still polling; look again once they may have stopped
+            self._idle_timers[room_id] = timer_wheel.call_later(
+                ROOM_HIBERNATE_GRACE - served_ago, self._hibernation_due, room_id, callback, group=room_id
+            )
+            return
+        self._hibernating.add(room_id)
+        return callback(room_id)
+
+    def cancel_hibernation(self, room_id: str) -> bool:
+        """A socket arrived: drop any pending hibernation. True if the room is hibernating and needs waking."""
+        timer = self._idle_timers.pop(room_id, None)
+        if timer is not None:
+            timer.cancel()
+        return room_id in self._hibernating
+
+    def is_hibernating(self, room_id: str) -> bool:
+        return room_id in self._hibernating
+
+    def mark_awake(self, room_id: str):
+        self._hibernating.discard(room_id)
+
+    def get_listener_summary(self, room_id: str) -> dict:
+        """The small state message listeners get instead of the full state_update."""
+        room = self.rooms[room_id]
+        return {
+            "type": "state_summary",
+            "room_name": self._room_names.get(room_id, ""),
+            "is_playing": room.is_playing,
+            "active_prompts": [p.model_dump() for p in room.active_prompts],
+            "bpm": room.bpm,
+            "density": room.density,
+            "brightness": room.brightness,
+            "participant_count": len(self.user_roles.get(room_id, {})),
+            "listener_count": len(self.listeners.get(room_id, ())),
+        }
+
+    def _maybe_send_listener_summary(self, room_id: str):
+        """
+        Send listeners a state_summary at most every LISTENER_SUMMARY_INTERVAL, or at once
+        if play state changed. A change inside the interval goes out when it ends.
+        """
+        if not self.listeners.get(room_id):
+            return
+        last_at, last_playing = self._listener_summary_at.get(room_id, (0.0, None))
+        wait = last_at + self.LISTENER_SUMMARY_INTERVAL - time.monotonic()
+        if wait > 0 and self.rooms[room_id].is_playing == last_playing:
+            if room_id not in self._listener_summary_timers:
+                self._listener_summary_timers[room_id] = timer_wheel.call_later(
+                    wait, self._send_listener_summary, room_id, group=room_id
+                )
+            return
+        self._send_listener_summary(room_id)
+
+    def _send_listener_summary(self, room_id: str):
+        timer = self._listener_summary_timers.pop(room_id, None)
+        if timer is not None:
+            timer.cancel()
+        listeners = self.listeners.get(room_id)
+        if not listeners or room_id not in self.rooms:
+            return
+        self._listener_summary_at[room_id] = (time.monotonic(), self.rooms[room_id].is_playing)
+        text = encode_json(self.get_listener_summary(room_id))
+        for _, queue in self._open_queues(listeners):
+            queue.put_text(text)
+
     def remove_user(self, room_id: str, user_id: str):
         """Permenantly remove a user and their role (e.g. on explicit Leave Room)."""
         if room_id in self.user_roles:
@@ -160,6 +354,7 @@ class RoomService:
                 self.log_event(room_id, "leave", f"{display_name} left the room")
         if room_id in self.user_display_names:
             self.user_display_names[room_id].pop(user_id, None)
+        self.mark_state_dirty(room_id)
 
     def get_drop_threshold(self, room_id: str) -> int:
         """Required votes = ceil(participants / 2), minimum 1."""
@@ -168,8 +363,17 @@ class RoomService:
         return max(1, math.ceil(total / 2))
 
     def destroy_room(self, room_id: str):
-        """Fully destroy a room — stop tick loop, purge all state."""
+        """Fully destroy a room — stop tick loop, cancel its timers, purge all state."""
         self.stop_tick_loop(room_id)
+        timer_wheel.cancel_group(room_id)
+        listeners = self.listeners.pop(room_id, set())
+        if room_id not in self._listeners_closed:
+            closed = encode_json({"type": "room_closed", "message": "Room closed"})
+            for _, queue in self._open_queues(listeners):
+                queue.put_text(closed)
+        self._listeners_closed.discard(room_id)
+        self._listener_summary_at.pop(room_id, None)
+        self._listener_summary_timers.pop(room_id, None)
         self.rooms.pop(room_id, None)
         self.connections.pop(room_id, None)
         self.user_sockets.pop(room_id, None)
@@ -180,6 +384,18 @@ class RoomService:
         self._timeline.pop(room_id, None)
         self._drop_votes.pop(room_id, None)
         self._drop_window_start.pop(room_id, None)
+        self._gemini_reasoning.pop(room_id, None)
+        self._state_cache.pop(room_id, None)
+        self._state_version.pop(room_id, None)
+        self._last_state.pop(room_id, None)
+        self._delta_cache.pop(room_id, None)
+        self._timeline_seq.pop(room_id, None)
+        self._audio_buffers.pop(room_id, None)
+        self._framers.pop(room_id, None)
+        self._segmenters.pop(room_id, None)
+        self._idle_timers.pop(room_id, None)
+        self._hibernating.discard(room_id)
+        self._http_served.pop(room_id, None)
         print(f"[Room] Destroyed room {room_id}")
 
     def record_drop(self, room_id: str, connection_id: str, user_id: str = None) -> str:
@@ -247,9 +463,11 @@ class RoomService:
             self._timeline[room_id] = []
         event = {"time": time.time(), "source": event_type, "text": description}
         self._timeline[room_id].append(event)
+        self._timeline_seq[room_id] = self._timeline_seq.get(room_id, 0) + 1
         # Keep only the last 50 events
         if len(self._timeline[room_id]) > 50:
             self._timeline[room_id] = self._timeline[room_id][-50:]
+        self.mark_state_dirty(room_id)
 
     def _recalculate_influence(self, room_id: str):
         """Recency-weighted influence: recent inputs get more weight."""
@@ -277,6 +495,8 @@ class RoomService:
             self._input_timestamps[room_id] = {}
         self._input_timestamps[room_id][role.value] = time.time()
         self._recalculate_influence(room_id)
+        self.mark_state_dirty(room_id)
+        self._wake_tick(room_id)
         # Log notable inputs to the timeline
         summary_parts = []
         for k, v in payload.items():
@@ -288,7 +508,23 @@ class RoomService:
             self.log_event(room_id, "input", f"{role.value} → {', '.join(summary_parts)}")
         print(f"[Room] Input from {role.value}: {payload}")
 
-    def update_after_arbitration(self, room_id: str, prompts, bpm: int, density: float, brightness: float):
+    def oldest_input_time(self, room_id: str, roles) -> Optional[float]:
+        """time.time() of the earliest input among `roles`, for input → Lyria latency."""
+        timestamps = self._input_timestamps.get(room_id, {})
+        times = [timestamps[r] for r in roles if r in timestamps]
+        return min(times) if times else None
+
+    def record_input_latency(self, phase: str, since: float):
+        """Record how long an input took to reach Lyria on the given phase."""
+        ms = (time.time() - since) * 1000
+        entry = self._input_latency.setdefault(phase, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += ms
+        entry[2] = max(entry[2], ms)
+
+    def update_after_arbitration(
+        self, room_id: str, prompts, bpm: int, density: float, brightness: float, reasoning: str = "",
+    ):
         """Called by the tick loop after Gemini returns arbitration results."""
         if room_id not in self.rooms:
             return
@@ -297,9 +533,16 @@ class RoomService:
         room.bpm = bpm
         room.density = density
         room.brightness = brightness
+        self._gemini_reasoning[room_id] = reasoning
 
         # Recalculate influence weights based on input recency
         self._recalculate_influence(room_id)
+        self.mark_state_dirty(room_id)
+
+    def mark_state_dirty(self, room_id: str):
+        """Drop the cached state_update so the next broadcast rebuilds it.
+        Call after mutating anything that appears in get_state_update_message."""
+        self._state_cache.pop(room_id, None)
 
     def get_state_update_message(self, room_id: str) -> dict:
         room = self.rooms[room_id]
@@ -323,80 +566,421 @@ class RoomService:
             "bpm": room.bpm,
             "density": room.density,
             "brightness": room.brightness,
-            "current_inputs": room.current_inputs,
-            "influence_weights": room.influence_weights,
+            # Copies, so later in-place input updates show up as changes in the next delta
+            "current_inputs": dict(room.current_inputs),
+            "influence_weights": dict(room.influence_weights),
             "participants": participants,
             "timeline": timeline,
+            "gemini_reasoning": self._gemini_reasoning.get(room_id, ""),
         }
 
-    async def broadcast_json(self, room_id: str, message: dict):
-        """Send JSON message to all clients in a room."""
+    def get_state_update_text(self, room_id: str) -> str:
+        """Encoded state_update, rebuilt only when the room has been marked dirty."""
+        text = self._state_cache.get(room_id)
+        if text is None:
+            text = self._rebuild_state(room_id)
+        return text
+
+    def _rebuild_state(self, room_id: str) -> str:
+        """
+        Rebuild the snapshot and, if anything changed, bump the version and encode
+        the state_delta (changed keys + appended timeline entries) from the previous one.
+        """
+        message = self.get_state_update_message(room_id)
+        seq = self._timeline_seq.get(room_id, 0)
+        version = self._state_version.get(room_id, 0)
+        previous = self._last_state.get(room_id)
+
+        if previous is None:
+            version += 1
+            self._delta_cache[room_id] = None
+        else:
+            prev_message, prev_seq = previous
+            changes = {
+                k: v for k, v in message.items()
+                if k not in ("type", "timeline") and prev_message.get(k) != v
+            }
+            appended = min(seq - prev_seq, len(message["timeline"]))
+            if changes or appended:
+                version += 1
+                self._delta_cache[room_id] = encode_json({
+                    "type": "state_delta",
+                    "version": version,
+                    "changes": changes,
+                    "timeline_append": message["timeline"][-appended:] if appended else [],
+                })
+
+        self._state_version[room_id] = version
+        self._last_state[room_id] = (message, seq)
+        text = encode_json({**message, "version": version})
+        self._state_cache[room_id] = text
+        return text
+
+    def enable_state_deltas(self, ws: WebSocket):
+        """Opt a connection into state_delta messages. It gets a full snapshot first."""
+        self._delta_clients.setdefault(ws, (None, 0))
+
+    def send_state(self, room_id: str, ws: WebSocket):
+        """Queue a full state_update for one client (join, resume or resync)."""
+        if room_id not in self.rooms:
+            return
+        self._outbound_for(ws).put_text(self.get_state_update_text(room_id))
+        if ws in self._delta_clients:
+            self._delta_clients[ws] = (room_id, self._state_version[room_id])
+
+    def _outbound_for(self, ws: WebSocket) -> OutboundQueue:
+        queue = self._outbound.get(ws)
+        if queue is None:
+            queue = OutboundQueue(ws)
+            self._outbound[ws] = queue
+        return queue
+
+    def close_outbound(self, ws: WebSocket):
+        """Stop a connection's writer task. Call once the socket is gone for good."""
+        queue = self._outbound.pop(ws, None)
+        if queue:
+            queue.close()
+        self._delta_clients.pop(ws, None)
+        self._framed_clients.discard(ws)
+        self._audio_tiers.pop(ws, None)
+
+    def send_json(self, ws: WebSocket, message: dict):
+        """Queue a JSON message for a single client on its control lane."""
+        self._outbound_for(ws).put_json(message)
+
+    def _open_queues(self, sockets: Set[WebSocket]) -> Iterator[Tuple[WebSocket, OutboundQueue]]:
+        """Yield (ws, queue) for each open connection; prunes closed ones from `sockets` afterwards."""
+        dead = []
+        for ws in sockets:
+            queue = self._outbound_for(ws)
+            if queue.closed:
+                dead.append(ws)
+                continue
+            yield ws, queue
+        sockets.difference_update(dead)
+
+    def _audio_queues(self, room_id: str) -> Iterator[Tuple[WebSocket, OutboundQueue]]:
+        """Open queues of everyone who hears the room's audio: players and listeners."""
+        return itertools.chain(
+            self._open_queues(self.connections.get(room_id, set())),
+            self._open_queues(self.listeners.get(room_id, set())),
+        )
+
+    def _broadcast_text(self, room_id: str, text: str):
         if room_id not in self.connections:
             return
-        dead = set()
-        for ws in self.connections[room_id]:
-            try:
-                await ws.send_json(message)
-            except Exception:
-                dead.add(ws)
-        self.connections[room_id] -= dead
+        for _, queue in self._open_queues(self.connections[room_id]):
+            queue.put_text(text)
+
+    async def broadcast_json(self, room_id: str, message: dict):
+        """
+        Queue JSON message for all clients in a room, encoded once for everyone.
+        Play-state and lifecycle messages (LISTENER_MESSAGE_TYPES) reach listeners
+        too, followed by a fresh state_summary.
+        """
+        text = encode_json(message)
+        self._broadcast_text(room_id, text)
+        kind = message.get("type")
+        if kind not in self.LISTENER_MESSAGE_TYPES or not self.listeners.get(room_id):
+            return
+        for _, queue in self._open_queues(self.listeners[room_id]):
+            queue.put_text(text)
+        if kind in ("room_closed", "room_ended"):
+            self._listeners_closed.add(room_id)
+        elif room_id in self.rooms:
+            self._maybe_send_listener_summary(room_id)
+
+    async def broadcast_state(self, room_id: str):
+        """
+        Queue the (cached) state_update for all clients in a room.
+        Clients that opted into deltas get the state_delta when they hold the
+        previous version, nothing when they are already current, and the full
+        snapshot otherwise. Everyone else gets the full snapshot as before.
+        """
+        if room_id not in self.rooms or room_id not in self.connections:
+            return
+        full_text = self.get_state_update_text(room_id)
+        version = self._state_version[room_id]
+        delta_text = self._delta_cache.get(room_id)
+        for ws, queue in self._open_queues(self.connections[room_id]):
+            subscription = self._delta_clients.get(ws)
+            if subscription is None:
+                queue.put_text(full_text)
+                continue
+            if subscription == (room_id, version):
+                continue
+            if subscription == (room_id, version - 1) and delta_text:
+                queue.put_text(delta_text)
+            else:
+                queue.put_text(full_text)
+            self._delta_clients[ws] = (room_id, version)
+        self._maybe_send_listener_summary(room_id)
 
     async def broadcast_bytes(self, room_id: str, data: bytes):
-        """Send raw audio bytes to all clients in a room."""
-        if room_id not in self.connections:
+        """Queue raw audio bytes for all clients in a room. Never waits on a slow socket."""
+        shared = SharedFrame(data)
+        for _, queue in self._audio_queues(room_id):
+            queue.put_audio(shared)
+
+    def enable_audio_framing(self, ws: WebSocket):
+        """Send this connection framed audio (see services/audio_framing.py) instead of bare PCM."""
+        self._framed_clients.add(ws)
+
+    def set_audio_tier(self, ws: WebSocket, tier: str) -> bool:
+        """Pick the audio tier for a connection (see services/audio_tiers.py). False if unknown."""
+        if tier not in AUDIO_TIERS:
+            return False
+        if tier == TIER_FULL:
+            self._audio_tiers.pop(ws, None)
+        else:
+            self._audio_tiers[ws] = tier
+        return True
+
+    def frame_audio(self, room_id: str, chunk: bytes) -> list:
+        """Feed a Lyria chunk through the room's framer; returns the completed frames."""
+        framer = self._framers.get(room_id)
+        if framer is None:
+            if room_id not in self.rooms:
+                return []
+            framer = self._framers[room_id] = AudioFramer()
+        return framer.push(chunk)
+
+    def buffer_audio(self, room_id: str, frame: bytes):
+        """Keep the last few seconds of a room's audio frames for pre-roll."""
+        buffer = self._audio_buffers.get(room_id)
+        if buffer is None:
+            if room_id not in self.rooms:
+                return
+            frames = max(1, round(AUDIO_PREROLL_SECONDS * 1000 / AUDIO_FRAME_MS))
+            buffer = self._audio_buffers[room_id] = AudioRingBuffer(frames * FRAMED_SIZE)
+        buffer.write(frame)
+
+    def get_segmenter(self, room_id: str) -> Optional[AudioSegmenter]:
+        """The room's HTTP segment stream, started on first use. None if the room doesn't exist."""
+        segmenter = self._segmenters.get(room_id)
+        if segmenter is None and room_id in self.rooms:
+            segmenter = self._segmenters[room_id] = AudioSegmenter()
+            print(f"[Room] Started HTTP audio segments for room {room_id} (stream={segmenter.stream_id})")
+        return segmenter
+
+    def get_segment(self, room_id: str, stream_id: str, seq: int) -> Optional[bytes]:
+        segmenter = self._segmenters.get(room_id)
+        if segmenter is None or segmenter.stream_id != stream_id:
+            return None
+        return segmenter.get(seq)
+
+    def segment_audio(self, room_id: str, frame: bytes):
+        """Append one audio frame to the room's HTTP segments, if anyone asked for them."""
+        segmenter = self._segmenters.get(room_id)
+        if segmenter is not None:
+            segmenter.push(pcm_view(frame))
+
+    async def broadcast_audio_frame(self, room_id: str, frame: bytes):
+        """
+        Queue one audio frame for all clients and listeners, in each client's tier.
+        Framed clients get the header, the rest bare audio. Each rendition is
+        produced once per frame.
+        """
+        renditions = FrameRenditions(frame)
+        shared: Dict[tuple, SharedFrame] = {}
+        for ws, queue in self._audio_queues(room_id):
+            key = (self._audio_tiers.get(ws, TIER_FULL), ws in self._framed_clients)
+            item = shared.get(key)
+            if item is None:
+                item = shared[key] = SharedFrame(renditions.get(*key))
+            queue.put_audio(item)
+
+    def send_preroll(self, room_id: str, ws: WebSocket):
+        """Queue the buffered audio for a newly joined or reconnected client."""
+        buffer = self._audio_buffers.get(room_id)
+        if not buffer or not buffer.buffered_bytes:
             return
-        dead = set()
-        for ws in self.connections[room_id]:
-            try:
-                await ws.send_bytes(data)
-            except Exception:
-                dead.add(ws)
-        self.connections[room_id] -= dead
+        queue = self._outbound_for(ws)
+        tier = self._audio_tiers.get(ws, TIER_FULL)
+        framed = ws in self._framed_clients
+        for frame in buffer.preroll_chunks(FRAMED_SIZE):
+            queue.put_audio(FrameRenditions(frame).get(tier, framed))
+
+    def release_audio_buffer(self, room_id: str):
+        """Free a room's pre-roll buffer and framing state (music stopped)."""
+        self._audio_buffers.pop(room_id, None)
+        self._framers.pop(room_id, None)
+        segmenter = self._segmenters.get(room_id)
+        if segmenter is not None:
+            segmenter.discontinuity()
+
+    def get_stats(self) -> dict:
+        """Process-wide counters for the /stats endpoint."""
+        queues = list(self._outbound.values())
+        return {
+            "rooms": len(self.rooms),
+            "connections": sum(len(c) for c in self.connections.values()),
+            "listeners": sum(len(c) for c in self.listeners.values()),
+            "hibernating": len(self._hibernating),
+            "outbound": {
+                "queues": len(queues),
+                "queued_messages": sum(q.depth() for q in queues),
+                "audio_sent": sum(q.audio_sent for q in queues),
+                "audio_dropped": sum(q.audio_dropped for q in queues),
+                "direct_writes": sum(q.direct_writes for q in queues),
+            },
+            "framing": {
+                "chunks_in": sum(f.chunks_in for f in self._framers.values()),
+                "frames_out": sum(f.frames_out for f in self._framers.values()),
+            },
+            "audio_buffers": {
+                "total_bytes": sum(b.capacity for b in self._audio_buffers.values()),
+                "rooms": {
+                    room_id: {
+                        "capacity_bytes": b.capacity,
+                        "buffered_bytes": b.buffered_bytes,
+                        "buffered_seconds": round(b.buffered_bytes / FRAMED_SIZE * AUDIO_FRAME_MS / 1000, 2),
+                    }
+                    for room_id, b in self._audio_buffers.items()
+                },
+            },
+            "input_to_lyria_ms": {
+                phase: {"count": count, "avg": round(total / count, 1), "max": round(peak, 1)}
+                for phase, (count, total, peak) in self._input_latency.items()
+            },
+            "ticks": dict(self._tick_counts),
+            "timers": timer_wheel.stats(),
+            "segments": {
+                "total_bytes": sum(s.buffered_bytes for s in self._segmenters.values()),
+                "rooms": {
+                    room_id: {"stream_id": s.stream_id, "next_sequence": s.next_seq, "segments": len(s.segments)}
+                    for room_id, s in self._segmenters.items()
+                },
+            },
+        }
 
     def start_tick_loop(self, room_id: str, callback):
-        """Start the 4-second Gemini arbitration tick for a room."""
-        task = asyncio.create_task(self._tick_loop(room_id, callback))
-        self._tick_tasks[room_id] = task
+        """
+        Start the Gemini arbitration tick for a room. If the callback returns False its
+        result was not applied, and the inputs it was given are kept for the next tick.
+        """
+        self.stop_tick_loop(room_id)
+        ticker = self._tickers[room_id] = _Ticker(callback)
+        self._arm_tick(room_id, ticker)
 
     def stop_tick_loop(self, room_id: str):
-        task = self._tick_tasks.pop(room_id, None)
-        if task:
-            task.cancel()
-
-    async def _tick_loop(self, room_id: str, callback):
-        """Fires callback every 4 seconds with current room state."""
-        consecutive_errors = 0
-        while True:
-            await asyncio.sleep(4)
-            if room_id not in self.rooms:
-                break
-            room = self.rooms[room_id]
-            if not room.is_playing:
-                continue
+        ticker = self._tickers.pop(room_id, None)
+        if ticker is None:
+            return
+        if ticker.timer is not None:
+            ticker.timer.cancel()
+        if ticker.task is not None:
+            ticker.task.cancel()
+
+    def _wake_tick(self, room_id: str):
+        """An input arrived: tick soon, unless a tick for it is already due or running."""
+        ticker = self._tickers.get(room_id)
+        if ticker is None or ticker.input_pending:
+            return
+        ticker.input_pending = True
+        if ticker.task is None:
+            self._arm_tick(room_id, ticker)
+
+    def _arm_tick(self, room_id: str, ticker: "_Ticker"):
+        """
+        Put the room's next tick on the timer wheel: shortly after inputs arrive
+        (debounced, rate-limited per room), or on an exponentially backed-off,
+        jittered timer while idle.
+        """
+        if ticker.timer is not None:
+            ticker.timer.cancel()
+        if ticker.input_pending:
+            # Let the rest of a burst land, and hold the room to its max tick rate
+            delay = max(TICK_DEBOUNCE, ticker.last_tick + TICK_MIN_INTERVAL - time.monotonic())
+            ticker.timer = timer_wheel.call_later(delay, self._fire_tick, room_id, ticker, "input", group=room_id)
+        else:
+            ticker.timer = timer_wheel.call_later(
+                ticker.idle_wait, self._fire_tick, room_id, ticker, "idle", group=room_id, jitter=TICK_JITTER,
+            )
+
+    def _fire_tick(self, room_id: str, ticker: "_Ticker", cause: str):
+        ticker.timer = None
+        if cause == "input":
+            ticker.input_pending = False
+            ticker.idle_wait = TICK_IDLE_INTERVAL
+        else:
+            ticker.idle_wait = min(ticker.idle_wait * 2, TICK_IDLE_MAX)
+        ticker.task = asyncio.create_task(self._run_tick(room_id, ticker, cause))
+
+    async def _run_tick(self, room_id: str, ticker: "_Ticker", cause: str):
+        """Fires the room's callback with current room state, then arms the next tick."""
+        try:
+            await self._tick(room_id, ticker, cause)
+        finally:
+            ticker.task = None
+            if self._tickers.get(room_id) is ticker:
+                if room_id in self.rooms:
+                    self._arm_tick(room_id, ticker)
+                else:
+                    del self._tickers[room_id]
+
+    async def _tick(self, room_id: str, ticker: "_Ticker", cause: str):
+        room = self.rooms.get(room_id)
+        if room is None or not room.is_playing:
+            return
+
+        # Apply energy controller inputs directly to room state
+        energy_input = room.current_inputs.get("energy", {})
+        if "density" in energy_input:
+            room.density = float(energy_input["density"])
+        if "brightness" in energy_input:
+            room.brightness = float(energy_input["brightness"])
+        if energy_input:
+            self.mark_state_dirty(room_id)
+
+        print(f"[Room] Tick ({cause}) fired for room {room_id}, {len(room.current_inputs)} inputs")
+        self._tick_counts[cause] += 1
+        ticker.last_tick = time.monotonic()
+        consumed = dict(room.current_inputs)
+        applied = None
+        try:
+            applied = await ticker.callback(room_id, consumed, room.bpm, room.density, room.brightness)
+            ticker.errors = 0
+        except Exception as e:
+            ticker.errors += 1
+            print(f"[Room] Tick callback error #{ticker.errors} for room {room_id}: {e}")
+            if ticker.errors >= 3:
+                print(f"[Room] Too many consecutive errors — notifying room {room_id}")
+                await self.broadcast_json(room_id, {
+                    "type": "stream_error",
+                    "message": "Music stream interrupted. Try restarting.",
+                })
+                ticker.errors = 0
+        if applied is False:
+            # The result never reached Lyria (stale, superseded or held): keep the
+            # inputs and retry as an input tick, rate-limited by TICK_MIN_INTERVAL
+            if consumed:
+                ticker.input_pending = True
+            return
+        # Clear consumed inputs so stale ones don't re-trigger Gemini. Inputs that
+        # arrived while the callback was running are kept for the next tick.
+        if consumed:
+            room.current_inputs = {
+                role: payload for role, payload in room.current_inputs.items()
+                if consumed.get(role) is not payload
+            }
+            self.mark_state_dirty(room_id)
+
+
+class _Ticker:
+    """A room's tick state; the timer itself lives on the shared timer wheel."""
+
+    __slots__ = ("callback", "timer", "task", "idle_wait", "last_tick", "input_pending", "errors")
 
-            # Apply energy controller inputs directly to room state
-            energy_input = room.current_inputs.get("energy", {})
-            if "density" in energy_input:
-                room.density = float(energy_input["density"])
-            if "brightness" in energy_input:
-                room.brightness = float(energy_input["brightness"])
-
-            print(f"[Room] Tick fired for room {room_id}, {len(room.current_inputs)} inputs")
-            try:
-                await callback(room_id, room.current_inputs, room.bpm, room.density, room.brightness)
-                consecutive_errors = 0
-            except Exception as e:
-                consecutive_errors += 1
-                print(f"[Room] Tick callback error #{consecutive_errors} for room {room_id}: {e}")
-                if consecutive_errors >= 3:
-                    print(f"[Room] Too many consecutive errors — notifying room {room_id}")
-                    await self.broadcast_json(room_id, {
-                        "type": "stream_error",
-                        "message": "Music stream interrupted. Try restarting.",
-                    })
-                    consecutive_errors = 0
-            # Clear consumed inputs so stale ones don't re-trigger Gemini
-            room.current_inputs = {}
+    def __init__(self, callback):
+        self.callback = callback
+        self.timer: Optional[Timer] = None
+        # The running callback, if a tick is in progress
+        self.task: Optional[asyncio.Task] = None
+        self.idle_wait = TICK_IDLE_INTERVAL
+        self.last_tick = float("-inf")
+        self.input_pending = False
+        self.errors = 0
 
 
 # Singleton
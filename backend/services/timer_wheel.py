@@ -0,0 +1,215 @@
+"""
+Timer Wheel
+One hierarchical timing wheel for all delayed and periodic room work (arbitration
+ticks, connection heartbeats, drop build-ups and vote expiry) instead of one
+sleeping asyncio task per timer. A single driver task advances the wheel every
+TIMER_WHEEL_RESOLUTION seconds while any timer is armed. Scheduling and
+cancelling are O(1); timers are grouped (by room_id, or by connection) so
+destroying a room cancels everything it owns in one call. Periodic timers take a
+jitter fraction so thousands of rooms and sockets don't fire in lockstep.
+"""
+import asyncio
+import math
+import os
+import random
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+TIMER_WHEEL_RESOLUTION = float(os.getenv("TIMER_WHEEL_RESOLUTION", "0.05"))
+
+# 4 levels of 64 slots: 50 ms slots on the first level, ~9.7 days across all four
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+LEVELS = 4
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "args", "group", "interval", "jitter", "cancelled", "_slot", "_wheel")
+
+    def __init__(self, wheel: "TimerWheel", callback: Callable, args: tuple, group: Optional[Hashable], interval: float, jitter: float):
+        self._wheel = wheel
+        self.callback = callback
+        self.args = args
+        self.group = group
+        self.interval = interval
+        self.jitter = jitter
+        self.deadline = 0
+        self.cancelled = False
+        self._slot: Optional[Set["Timer"]] = None
+
+    def cancel(self):
+        if not self.cancelled:
+            self._wheel._remove(self)
+
+
+class TimerWheel:
+    def __init__(self, resolution: float = TIMER_WHEEL_RESOLUTION):
+        self.resolution = resolution
+        self._wheel: List[List[Set[Timer]]] = [[set() for _ in range(SLOTS)] for _ in range(LEVELS)]
+        # group → its armed timers, for cancel_group
+        self._groups: Dict[Hashable, Set[Timer]] = {}
+        self._count = 0
+        self._tick = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._driver: Optional[asyncio.Task] = None
+        # Tasks started by async callbacks, kept referenced until done
+        self._running: Set[asyncio.Task] = set()
+        self.fired = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.max_lag_ms = 0.0
+
+    def call_later(self, delay: float, callback: Callable, *args: Any, group: Optional[Hashable] = None, jitter: float = 0.0) -> Timer:
+        """Run `callback(*args)` once after `delay` seconds (± jitter × delay). Async callbacks run as tasks."""
+        timer = Timer(self, callback, args, group, 0.0, jitter)
+        self._arm(timer, delay)
+        return timer
+
+    def every(self, interval: float, callback: Callable, *args: Any, group: Optional[Hashable] = None, jitter: float = 0.0) -> Timer:
+        """Run `callback(*args)` every `interval` seconds (± jitter × interval) until cancelled."""
+        timer = Timer(self, callback, args, group, interval, jitter)
+        self._arm(timer, interval)
+        return timer
+
+    def cancel_group(self, group: Hashable) -> int:
+        """Cancel every armed timer in `group`; returns how many."""
+        timers = self._groups.pop(group, None)
+        if not timers:
+            return 0
+        for timer in timers:
+            timer.group = None
+            self._remove(timer)
+        return len(timers)
+
+    def _arm(self, timer: Timer, delay: float, after: Optional[int] = None):
+        self._ensure_driver()
+        if timer.jitter:
+            delay *= 1 + random.uniform(-timer.jitter, timer.jitter)
+        if after is not None:
+            # Periodic timers count from their previous slot, so lateness doesn't accumulate
+            timer.deadline = max(self._tick + 1, after + max(1, round(delay / self.resolution)))
+        else:
+            # Rounded up from the loop clock, not the last processed slot: never fire early
+            timer.deadline = max(self._tick + 1, math.ceil((self._loop.time() + delay) / self.resolution))
+        timer.cancelled = False
+        self._insert(timer)
+        self._count += 1
+        if timer.group is not None:
+            self._groups.setdefault(timer.group, set()).add(timer)
+
+    def _insert(self, timer: Timer):
+        delta = timer.deadline - self._tick
+        level = 0
+        while level < LEVELS - 1 and delta >= 1 << (SLOT_BITS * (level + 1)):
+            level += 1
+        slot = self._wheel[level][(timer.deadline >> (SLOT_BITS * level)) & (SLOTS - 1)]
+        slot.add(timer)
+        timer._slot = slot
+
+    def _remove(self, timer: Timer):
+        timer.cancelled = True
+        if timer._slot is not None:
+            timer._slot.discard(timer)
+            timer._slot = None
+            self._count -= 1
+            self.cancelled += 1
+        if timer.group is not None:
+            members = self._groups.get(timer.group)
+            if members is not None:
+                members.discard(timer)
+                if not members:
+                    del self._groups[timer.group]
+
+    def _ensure_driver(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests): start from an empty wheel
+            self._loop = loop
+            for level in self._wheel:
+                for slot in level:
+                    slot.clear()
+            self._groups.clear()
+            self._count = 0
+            self._driver = None
+        if self._driver is None or self._driver.done():
+            self._tick = int(loop.time() / self.resolution)
+            self._driver = loop.create_task(self._drive())
+
+    async def _drive(self):
+        loop = self._loop
+        while self._count:
+            next_at = (self._tick + 1) * self.resolution
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            target = int(loop.time() / self.resolution)
+            self.max_lag_ms = max(self.max_lag_ms, (loop.time() - next_at) * 1000)
+            while self._tick < target and self._count:
+                self._advance()
+
+    def _advance(self):
+        """Move one slot forward: cascade higher levels down, then fire what is due."""
+        self._tick += 1
+        for level in range(LEVELS - 1, 0, -1):
+            if self._tick & ((1 << (SLOT_BITS * level)) - 1) == 0:
+                slot = self._wheel[level][(self._tick >> (SLOT_BITS * level)) & (SLOTS - 1)]
+                due = list(slot)
+                slot.clear()
+                for timer in due:
+                    self._insert(timer)
+        slot = self._wheel[0][self._tick & (SLOTS - 1)]
+        if not slot:
+            return
+        due = list(slot)
+        slot.clear()
+        for timer in due:
+            if timer.deadline > self._tick:
+                self._insert(timer)
+                continue
+            timer._slot = None
+            self._count -= 1
+            if timer.interval:
+                self._arm(timer, timer.interval, after=timer.deadline)
+            elif timer.group is not None:
+                members = self._groups.get(timer.group)
+                if members is not None:
+                    members.discard(timer)
+                    if not members:
+                        del self._groups[timer.group]
+            self._fire(timer)
+
+    def _fire(self, timer: Timer):
+        self.fired += 1
+        try:
+            result = timer.callback(*timer.args)
+        except Exception as e:
+            self.errors += 1
+            print(f"[Timers] Callback {getattr(timer.callback, '__name__', timer.callback)} failed: {e}")
+            return
+        if asyncio.iscoroutine(result):
+            task = self._loop.create_task(result)
+            self._running.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+            print(f"[Timers] Callback task failed: {task.exception()}")
+
+    @property
+    def armed(self) -> int:
+        return self._count
+
+    def stats(self) -> dict:
+        return {
+            "resolution_ms": round(self.resolution * 1000, 1),
+            "armed": self._count,
+            "groups": len(self._groups),
+            "running_callbacks": len(self._running),
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+
+# Singleton
+timer_wheel = TimerWheel()
@@ -0,0 +1,93 @@
+"""
+Benchmark: per-room CPU for producing the audio tiers.
+Each tier is rendered once per frame regardless of listener count; this measures
+that cost per second of audio, and the broadcast cost with listeners spread
+across all tiers.
+Usage: from backend/
+  python tests/bench_audio_tiers.py
+"""
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.audio_buffer import BYTES_PER_SECOND
+from services.audio_framing import AudioFramer, AUDIO_FRAME_MS
+from services.audio_tiers import AUDIO_TIERS, FrameRenditions, mulaw_encode, transcode
+from services.room_service import RoomService
+
+SECONDS = 30
+
+
+class NullSocket:
+    async def send_bytes(self, data):
+        # ASGI websocket.send only accepts bytes
+        assert type(data) is bytes, f"❌ send_bytes got {type(data).__name__}"
+
+    async def send_text(self, text: str):
+        pass
+
+
+def _sanity():
+    # G.711 reference points
+    ref = mulaw_encode(np.array([0, 32767, -32768, 1000, -1000], dtype=np.int16)).tolist()
+    assert ref == [0xFF, 0x80, 0x00, 0xCE, 0x4E], f"❌ μ-law encoding mismatch: {[hex(v) for v in ref]}"
+    stereo = np.array([100, 300, 500, 700], dtype="<i2").tobytes()
+    assert np.frombuffer(transcode("mono24k", stereo), dtype="<i2").tolist() == [400], "❌ Downmix mismatch"
+    renditions = FrameRenditions(_test_frames()[0])
+    for tier in AUDIO_TIERS:
+        for framed in (False, True):
+            assert type(renditions.get(tier, framed)) is bytes, f"❌ {tier} (framed={framed}) rendition is not bytes"
+
+
+def _test_frames() -> list:
+    rng = np.random.default_rng(0)
+    pcm = (rng.standard_normal(SECONDS * BYTES_PER_SECOND // 2) * 6000).astype("<i2").tobytes()
+    framer = AudioFramer()
+    return framer.push(pcm)
+
+
+def _render_cost(frames: list):
+    print(f"{'tier':>8} {'bytes/s':>10} {'CPU ms per s of audio':>24}")
+    for tier in AUDIO_TIERS:
+        start = time.process_time()
+        size = 0
+        for frame in frames:
+            size += len(FrameRenditions(frame).get(tier, False))
+        cpu = time.process_time() - start
+        print(f"{tier:>8} {size // SECONDS:>10} {cpu * 1000 / SECONDS:>24.3f}")
+
+
+async def _broadcast_cost(frames: list, listeners: int):
+    rs = RoomService()
+    room_id = rs.create_room(host_id="host").room_id
+    sockets = [NullSocket() for _ in range(listeners)]
+    for i, ws in enumerate(sockets):
+        rs.connections[room_id].add(ws)
+        rs.set_audio_tier(ws, AUDIO_TIERS[i % len(AUDIO_TIERS)])
+        if i % 2:
+            rs.enable_audio_framing(ws)
+    start = time.process_time()
+    for frame in frames:
+        await rs.broadcast_audio_frame(room_id, frame)
+        await asyncio.sleep(0)
+    cpu = time.process_time() - start
+    print(f"  {listeners:>5} listeners across all tiers: {cpu * 1000 / SECONDS:.3f} ms CPU per s of audio")
+    for ws in sockets:
+        rs.close_outbound(ws)
+
+
+async def _run():
+    _sanity()
+    frames = _test_frames()
+    print(f"{len(frames)} frames of {AUDIO_FRAME_MS} ms ({SECONDS}s of audio)\n")
+    _render_cost(frames)
+    print()
+    for listeners in (3, 30, 300):
+        await _broadcast_cost(frames, listeners)
+
+
+if __name__ == "__main__":
+    asyncio.run(_run())
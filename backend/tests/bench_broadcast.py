@@ -0,0 +1,91 @@
+"""
+Benchmark: state_update broadcast cost at 10, 100 and 1,000 sockets.
+Compares the old path (rebuild the message, json.dumps per socket) with the
+cached snapshot encoded once and queued as pre-encoded text.
+Usage: from backend/
+  python tests/bench_broadcast.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.room_service import RoomService
+from models.schemas import Role, WeightedPrompt
+
+BROADCASTS = 100
+
+
+class NullSocket:
+    """Accepts sends instantly; send_json encodes like Starlette does."""
+
+    async def send_text(self, text: str):
+        pass
+
+    async def send_json(self, message: dict):
+        json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+
+def _busy_room(rs: RoomService, sockets: int) -> str:
+    room_id = rs.create_room(host_id="host", room_name="bench").room_id
+    for i in range(10):
+        rs.join_room(room_id, f"user-{i}", NullSocket(), display_name=f"Player {i}")
+    rs.connections[room_id] = {NullSocket() for _ in range(sockets)}
+    rs.update_input(room_id, Role.GENRE_DJ, {"genre": "lo-fi"})
+    rs.update_input(room_id, Role.VIBE_SETTER, {"mood": "dreamy", "custom_prompt": "rain on a window"})
+    rs.update_after_arbitration(
+        room_id,
+        [WeightedPrompt(text="warm lo-fi groove with dusty vinyl crackle", weight=0.6),
+         WeightedPrompt(text="lazy jazz piano chords over a sleepy bass line", weight=0.4)],
+        bpm=88, density=0.4, brightness=0.6, reasoning="Blended lo-fi with a dreamy mood",
+    )
+    for i in range(30):
+        rs.log_event(room_id, "input", f"drummer → bpm: {80 + i}")
+    return room_id
+
+
+async def _drain(rs: RoomService):
+    while any(q.depth() for q in rs._outbound.values()):
+        await asyncio.sleep(0)
+
+
+async def _legacy(rs: RoomService, room_id: str) -> float:
+    """Pre-cache behaviour: rebuild the dict every call and encode it once per socket."""
+    start = time.process_time()
+    for _ in range(BROADCASTS):
+        message = rs.get_state_update_message(room_id)
+        for ws in rs.connections[room_id]:
+            await ws.send_json(message)
+    return (time.process_time() - start) / BROADCASTS
+
+
+async def _cached(rs: RoomService, room_id: str, dirty: bool) -> float:
+    start = time.process_time()
+    for _ in range(BROADCASTS):
+        if dirty:
+            rs.mark_state_dirty(room_id)
+        await rs.broadcast_state(room_id)
+        await _drain(rs)
+    return (time.process_time() - start) / BROADCASTS
+
+
+async def _run():
+    print(f"{'sockets':>8} {'legacy':>12} {'cached/dirty':>14} {'cached/clean':>14}")
+    for sockets in (10, 100, 1000):
+        rs = RoomService()
+        room_id = _busy_room(rs, sockets)
+        legacy = await _legacy(rs, room_id)
+        dirty = await _cached(rs, room_id, dirty=True)
+        clean = await _cached(rs, room_id, dirty=False)
+        print(f"{sockets:>8} {legacy * 1000:>10.3f}ms {dirty * 1000:>12.3f}ms {clean * 1000:>12.3f}ms")
+        for ws in list(rs._outbound):
+            rs.close_outbound(ws)
+
+
+if __name__ == "__main__":
+    asyncio.run(_run())
@@ -0,0 +1,97 @@
+"""
+Benchmark: audio fan-out at 500+ sockets per room.
+Compares the normal send path (websockets encodes a frame per recipient) with
+SharedFrame direct writes (frame encoded once, written to every transport).
+Sockets emulate uvicorn's websockets protocol, so the per-send work is real.
+Usage: from backend/
+  python tests/bench_fanout.py
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from websockets.frames import Opcode
+from websockets.legacy.framing import Frame
+import services.outbound as outbound
+from services.audio_framing import FRAME_PCM_BYTES
+from services.room_service import RoomService
+
+FRAMES = 50
+
+
+class NullTransport:
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+
+class EmulatedProtocol:
+    """The parts of websockets' protocol that a send touches."""
+
+    def __init__(self):
+        self.transport = NullTransport()
+
+    async def ensure_open(self):
+        pass
+
+    async def drain(self):
+        pass
+
+    async def asgi_send(self, message: dict):
+        data = message.get("bytes")
+        frame = Frame(True, Opcode.BINARY, data) if data is not None else Frame(True, Opcode.TEXT, message["text"].encode())
+        frame.write(self.transport.write, mask=False, extensions=[])
+        await self.drain()
+
+
+class EmulatedWebSocket:
+    def __init__(self):
+        self._send = EmulatedProtocol().asgi_send
+
+    async def send_bytes(self, data):
+        await self._send({"type": "websocket.send", "bytes": bytes(data)})
+
+    async def send_text(self, text: str):
+        await self._send({"type": "websocket.send", "text": text})
+
+
+async def _fanout(sockets: int, direct: bool) -> float:
+    outbound.OUTBOUND_DIRECT_WRITES = direct
+    rs = RoomService()
+    room_id = rs.create_room(host_id="host").room_id
+    clients = [EmulatedWebSocket() for _ in range(sockets)]
+    rs.connections[room_id].update(clients)
+    for ws in clients:
+        rs._outbound_for(ws)
+    payload = b"\x01" * FRAME_PCM_BYTES
+
+    start = time.process_time()
+    for _ in range(FRAMES):
+        await rs.broadcast_bytes(room_id, payload)
+        while any(q.depth() for q in rs._outbound.values()):
+            await asyncio.sleep(0)
+    cpu = (time.process_time() - start) / FRAMES
+
+    assert all(ws._send.__self__.transport.written >= FRAMES * FRAME_PCM_BYTES for ws in clients), "❌ Audio not delivered"
+    direct_writes = rs.get_stats()["outbound"]["direct_writes"]
+    assert (direct_writes > 0) == direct, "❌ Wrong send path used"
+    for ws in clients:
+        rs.close_outbound(ws)
+    return cpu
+
+
+async def _run():
+    print(f"{FRAMES} frames of {FRAME_PCM_BYTES} bytes per run\n")
+    print(f"{'sockets':>8} {'send_bytes':>12} {'shared frame':>14} {'speedup':>9}")
+    for sockets in (500, 1000, 2000):
+        normal = await _fanout(sockets, direct=False)
+        shared = await _fanout(sockets, direct=True)
+        print(f"{sockets:>8} {normal * 1000:>10.2f}ms {shared * 1000:>12.2f}ms {normal / shared:>8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(_run())
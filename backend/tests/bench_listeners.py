@@ -0,0 +1,64 @@
+"""
+Benchmark: memory and broadcast cost of listen-only spectators.
+Listeners hold only a socket and an outbound queue; this reports the bytes each
+one adds and the CPU to fan one audio frame out to all of them.
+Usage: from backend/
+  python tests/bench_listeners.py
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.audio_framing import FRAME_PCM_BYTES
+from services.room_service import RoomService
+
+FRAMES = 20
+
+
+class NullSocket:
+    __slots__ = ()
+
+    async def send_bytes(self, data):
+        pass
+
+    async def send_text(self, text: str):
+        pass
+
+
+async def _run_room(listeners: int):
+    rs = RoomService()
+    room_id = rs.create_room(host_id="host").room_id
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sockets = [NullSocket() for _ in range(listeners)]
+    for ws in sockets:
+        assert rs.add_listener(room_id, ws), "❌ Listener rejected"
+        rs.send_json(ws, rs.get_listener_summary(room_id))
+    await asyncio.sleep(0)
+    per_listener = (tracemalloc.get_traced_memory()[0] - before) / listeners
+    tracemalloc.stop()
+
+    frame = b"\x01" * FRAME_PCM_BYTES
+    start = time.process_time()
+    for _ in range(FRAMES):
+        await rs.broadcast_audio_frame(room_id, frame)
+        while any(q.depth() for q in rs._outbound.values()):
+            await asyncio.sleep(0)
+    cpu = (time.process_time() - start) / FRAMES
+    assert rs.get_rooms_list()[0]["listener_count"] == listeners
+    print(f"{listeners:>9} {per_listener:>14.0f} {cpu * 1000:>16.2f}")
+    for ws in sockets:
+        rs.close_outbound(ws)
+
+
+async def _run():
+    print(f"{'listeners':>9} {'bytes/listener':>14} {'ms CPU per frame':>16}")
+    for listeners in (500, 2000, 5000):
+        await _run_room(listeners)
+
+
+if __name__ == "__main__":
+    asyncio.run(_run())
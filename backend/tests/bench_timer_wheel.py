@@ -0,0 +1,98 @@
+"""
+Benchmark: 10k periodic timers on the shared timer wheel vs one sleeping asyncio
+task per timer (the old per-room tick / per-socket heartbeat pattern). Reports
+memory per timer, CPU per second of wall time, schedule/cancel cost, and the
+largest number of timers firing in one 50 ms slot (the thundering herd).
+Usage: from backend/
+  python tests/bench_timer_wheel.py
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.timer_wheel import TimerWheel
+
+TIMERS = 10_000
+INTERVAL = 1.0
+RUN_SECONDS = 3.0
+SLOT = 0.05
+
+
+async def _tasks():
+    loop = asyncio.get_running_loop()
+    fires = Counter()
+
+    async def tick():
+        while True:
+            await asyncio.sleep(INTERVAL)
+            fires[int(loop.time() / SLOT)] += 1
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(tick()) for _ in range(TIMERS)]
+    schedule_us = (time.perf_counter() - start) / TIMERS * 1e6
+    await asyncio.sleep(0)
+    per_timer = (tracemalloc.get_traced_memory()[0] - before) / TIMERS
+    tracemalloc.stop()
+
+    cpu = time.process_time()
+    await asyncio.sleep(RUN_SECONDS)
+    cpu_per_s = (time.process_time() - cpu) / RUN_SECONDS
+
+    start = time.perf_counter()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    cancel_us = (time.perf_counter() - start) / TIMERS * 1e6
+    return per_timer, cpu_per_s, schedule_us, cancel_us, max(fires.values())
+
+
+async def _wheel(jitter: float):
+    wheel = TimerWheel(resolution=SLOT)
+    loop = asyncio.get_running_loop()
+    fires = Counter()
+
+    def tick():
+        fires[int(loop.time() / SLOT)] += 1
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    timers = [wheel.every(INTERVAL, tick, group=i % 1000, jitter=jitter) for i in range(TIMERS)]
+    schedule_us = (time.perf_counter() - start) / TIMERS * 1e6
+    per_timer = (tracemalloc.get_traced_memory()[0] - before) / TIMERS
+    tracemalloc.stop()
+
+    cpu = time.process_time()
+    await asyncio.sleep(RUN_SECONDS)
+    cpu_per_s = (time.process_time() - cpu) / RUN_SECONDS
+
+    start = time.perf_counter()
+    for timer in timers[:TIMERS // 2]:
+        timer.cancel()
+    for group in range(1000):
+        wheel.cancel_group(group)
+    cancel_us = (time.perf_counter() - start) / TIMERS * 1e6
+    assert wheel.armed == 0, "❌ Timers left armed"
+    return per_timer, cpu_per_s, schedule_us, cancel_us, max(fires.values())
+
+
+def _row(name, per_timer, cpu_per_s, schedule_us, cancel_us, herd):
+    print(f"{name:<22} {per_timer:>10.0f} {cpu_per_s * 100:>10.1f} {schedule_us:>12.2f} {cancel_us:>10.2f} {herd:>10}")
+
+
+def main():
+    print(f"{TIMERS} timers every {INTERVAL:.0f}s, {RUN_SECONDS:.0f}s run")
+    print(f"{'':<22} {'bytes/timer':>10} {'% CPU':>10} {'schedule µs':>12} {'cancel µs':>10} {'max/slot':>10}")
+    _row("asyncio task + sleep", *asyncio.run(_tasks()))
+    _row("timer wheel", *asyncio.run(_wheel(jitter=0.0)))
+    _row("timer wheel, 10% jitter", *asyncio.run(_wheel(jitter=0.1)))
+
+
+if __name__ == "__main__":
+    main()
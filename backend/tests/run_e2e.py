@@ -5,6 +5,7 @@ Run with backend server up: uvicorn main:app --reload (from backend/)
 Usage: from backend/
   python tests/run_e2e.py           # all tests (full_flow needs GEMINI_API_KEY + Lyria)
   python tests/run_e2e.py --skip-full   # skip Lyria/full flow (for CI without API key)
+Offline: start the server with FAKE_BACKENDS=all (no API key) and run everything.
 """
 import sys
 import subprocess
@@ -26,35 +27,42 @@ def main():
     failed = []
 
     # 1. Health
-    print("\n[1/4] Health check (GET /health)")
+    print("\n[1/5] Health check (GET /health)")
     if run("tests/test_health.py") != 0:
         failed.append("test_health")
     else:
-        print("[1/4] OK\n")
+        print("[1/5] OK\n")
 
     # 2. WebSocket room lifecycle
-    print("\n[2/4] WebSocket room lifecycle (create_room, join_room)")
+    print("\n[2/5] WebSocket room lifecycle (create_room, join_room)")
     if run("tests/test_ws.py") != 0:
         failed.append("test_ws")
     else:
-        print("[2/4] OK\n")
+        print("[2/5] OK\n")
 
     # 3. Input update
-    print("\n[3/4] Input update (input_update)")
+    print("\n[3/5] Input update (input_update)")
     if run("tests/test_input_update.py") != 0:
         failed.append("test_input_update")
     else:
-        print("[3/4] OK\n")
+        print("[3/5] OK\n")
 
-    # 4. Full flow (Lyria + Gemini — requires GEMINI_API_KEY)
+    # 4. Listen-only spectators
+    print("\n[4/5] Listen-only spectators (listen)")
+    if run("tests/test_listen.py") != 0:
+        failed.append("test_listen")
+    else:
+        print("[4/5] OK\n")
+
+    # 5. Full flow (Lyria + Gemini — requires GEMINI_API_KEY)
     if SKIP_FULL:
-        print("\n[4/4] Full flow SKIPPED (--skip-full)")
+        print("\n[5/5] Full flow SKIPPED (--skip-full)")
     else:
-        print("\n[4/4] Full flow (start_music, audio chunks, state_update, stop_music)")
+        print("\n[5/5] Full flow (start_music, audio chunks, state_update, stop_music)")
         if run("tests/test_full_flow.py") != 0:
             failed.append("test_full_flow")
         else:
-            print("[4/4] OK\n")
+            print("[5/5] OK\n")
 
     print("=" * 60)
     if failed:
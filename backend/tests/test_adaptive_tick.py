@@ -0,0 +1,110 @@
+"""
+Unit: adaptive tick loop. Inputs fire arbitration after a short debounce instead of
+waiting for a fixed 4-second tick; bursts share one tick; each room is held to a
+maximum tick rate; idle rooms back off exponentially.
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import services.room_service as rs
+from models.schemas import Role
+from services.room_service import room_service
+from services.timer_wheel import timer_wheel
+
+OLD_TICK_INTERVAL = 4.0
+
+
+class Recorder:
+    def __init__(self):
+        self.ticks = []
+
+    async def __call__(self, room_id, inputs, bpm, density, brightness):
+        self.ticks.append((time.monotonic(), dict(inputs)))
+
+
+def _room() -> str:
+    room_id = room_service.create_room(host_id="host").room_id
+    room_service.rooms[room_id].is_playing = True
+    return room_id
+
+
+async def _input_latency():
+    room_id = _room()
+    recorder = Recorder()
+    room_service.start_tick_loop(room_id, recorder)
+    await asyncio.sleep(0.05)
+    sent = time.monotonic()
+    for genre in ("Jazz", "Funk", "House"):
+        room_service.update_input(room_id, Role.GENRE_DJ, {"genre": genre})
+        await asyncio.sleep(0.03)
+    await asyncio.sleep(rs.TICK_DEBOUNCE + 0.1)
+    assert len(recorder.ticks) == 1, f"❌ Burst did not share one tick: {len(recorder.ticks)}"
+    latency = recorder.ticks[0][0] - sent
+    assert recorder.ticks[0][1] == {"genre_dj": {"genre": "House"}}, "❌ Tick did not see the latest input"
+    assert latency < OLD_TICK_INTERVAL / 2, f"❌ Input → tick too slow: {latency:.2f}s"
+    print(f"  ✅ Input → tick {latency * 1000:.0f} ms (fixed 4 s tick: {OLD_TICK_INTERVAL / 2 * 1000:.0f} ms mean, up to 4000 ms); burst of 3 → 1 tick")
+    room_service.destroy_room(room_id)
+
+
+async def _max_rate():
+    room_id = _room()
+    recorder = Recorder()
+    room_service.start_tick_loop(room_id, recorder)
+    duration = 1.5
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        room_service.update_input(room_id, Role.VIBE_SETTER, {"mood": f"Dark {time.monotonic()}"})
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(rs.TICK_MIN_INTERVAL)
+    gaps = [b[0] - a[0] for a, b in zip(recorder.ticks, recorder.ticks[1:])]
+    assert gaps and min(gaps) >= rs.TICK_MIN_INTERVAL - 0.02, f"❌ Max tick rate exceeded: {gaps}"
+    print(f"  ✅ {int(duration / 0.05)} inputs in {duration}s → {len(recorder.ticks)} ticks, min gap {min(gaps) * 1000:.0f} ms")
+    room_service.destroy_room(room_id)
+
+
+async def _idle_backoff():
+    room_id = _room()
+    recorder = Recorder()
+    started = time.monotonic()
+    room_service.start_tick_loop(room_id, recorder)
+    await asyncio.sleep(1.0)
+    times = [t - started for t, _ in recorder.ticks]
+    gaps = [b - a for a, b in zip([0.0] + times, times)]
+    assert len(times) >= 3 and all(b > a * 1.5 for a, b in zip(gaps, gaps[1:-1])), f"❌ No exponential backoff: {gaps}"
+    assert max(gaps) <= rs.TICK_IDLE_MAX + 0.05, f"❌ Backoff above TICK_IDLE_MAX: {gaps}"
+    room_service.update_input(room_id, Role.GENRE_DJ, {"genre": "Jazz"})
+    await asyncio.sleep(rs.TICK_DEBOUNCE + 0.05)
+    assert recorder.ticks[-1][1], "❌ Input during idle backoff did not fire a tick"
+    print(f"  ✅ Idle gaps {[round(g * 1000) for g in gaps]} ms; an input wakes the room at once")
+    room_service.destroy_room(room_id)
+    assert room_id not in room_service._tickers, "❌ Tick state leaked"
+
+    # Wakeups per idle playing room in the first 10 minutes, at the real defaults
+    wakeups, t, wait = 0, 0.0, 4.0
+    while t + wait <= 600:
+        t += wait
+        wakeups += 1
+        wait = min(wait * 2, 60.0)
+    print(f"  ✅ Idle room wakeups in 10 min: {wakeups} (fixed 4 s tick: {int(600 / OLD_TICK_INTERVAL)})")
+
+
+def test_adaptive_tick():
+    print("Testing adaptive tick loop...")
+    timer_wheel.resolution = 0.01  # fine slots for the short test intervals
+    rs.TICK_DEBOUNCE = 0.1
+    rs.TICK_MIN_INTERVAL = 0.3
+    asyncio.run(_input_latency())
+    asyncio.run(_max_rate())
+    rs.TICK_IDLE_INTERVAL = 0.05
+    rs.TICK_IDLE_MAX = 0.4
+    rs.TICK_JITTER = 0.0
+    asyncio.run(_idle_backoff())
+    print(f"  ticks fired: {room_service.get_stats()['ticks']}")
+    print("\n✅ Adaptive tick loop OK\n")
+
+
+if __name__ == "__main__":
+    test_adaptive_tick()
@@ -0,0 +1,109 @@
+"""Unit: concurrent arbitrations from different rooms share one Gemini request and fall back per room on failure."""
+import asyncio
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+import services.gemini_service as gemini_module
+from services.arbitration_batcher import ArbitrationBatcher
+from services.arbitration_cache import ArbitrationCache
+from services.gemini_service import gemini_service
+
+ROOMS = 6
+
+
+def _reply_for(summary: str) -> dict:
+    genre = re.search(r"'genre': '([^']+)'", summary).group(1)
+    return {"prompts": [{"text": f"{genre} groove", "weight": 1.0}], "bpm": 100, "density": 0.5, "brightness": 0.5, "reasoning": genre}
+
+
+class BatchAwareModels:
+    """Answers single-room and multi-room requests like Gemini would. `mode` breaks batches on purpose."""
+
+    def __init__(self, mode: str = "ok"):
+        self.mode = mode
+        self.single_calls = 0
+        self.batch_calls = []
+
+    async def generate_content(self, contents: str, **kwargs):
+        await asyncio.sleep(0.02)
+        if "### Room" not in contents:
+            self.single_calls += 1
+            return SimpleNamespace(text=json.dumps(_reply_for(contents)))
+        parts = dict(re.findall(r"### Room (\S+)\n(.*?)(?=\n### Room |\Z)", contents, re.S))
+        self.batch_calls.append(len(parts))
+        if self.mode == "garbage":
+            return SimpleNamespace(text="not json at all")
+        if self.mode == "slow":
+            await asyncio.sleep(5)
+        rooms = {key: _reply_for(summary) for key, summary in parts.items()}
+        if self.mode == "missing_one":
+            rooms.pop(sorted(rooms)[0])
+        return SimpleNamespace(text=json.dumps({"rooms": rooms}))
+
+
+async def _arbitrate_all(tag: str, genre: str = "genre") -> list:
+    gemini_service.cache = ArbitrationCache()
+    return await asyncio.gather(*[
+        gemini_service.arbitrate(f"{tag}{i}", {"genre_dj": {"genre": f"{genre}{i}"}}, 100, 0.5, 0.5)
+        for i in range(ROOMS)
+    ])
+
+
+def _install(mode: str) -> BatchAwareModels:
+    models = BatchAwareModels(mode)
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    return models
+
+
+async def _run():
+    gemini_service.batcher = ArbitrationBatcher(gemini_service._send_batch, window=0.05, max_size=8)
+
+    models = _install("ok")
+    results = await _arbitrate_all("OK")
+    assert models.batch_calls == [ROOMS] and models.single_calls == 0, f"❌ Expected one batch of {ROOMS}: {vars(models)}"
+    assert [r.reasoning for r in results] == [f"genre{i}" for i in range(ROOMS)], "❌ Batch results routed to the wrong rooms"
+    print(f"  ✅ {ROOMS} rooms arbitrated in one request, results split back per room")
+
+    models = _install("missing_one")
+    results = await _arbitrate_all("MISS")
+    assert models.single_calls == 1, f"❌ Expected one per-room fallback, got {models.single_calls}"
+    assert [r.reasoning for r in results] == [f"genre{i}" for i in range(ROOMS)], "❌ Fallback result wrong"
+    print("  ✅ A room missing from the batch reply falls back to its own call")
+
+    models = _install("garbage")
+    results = await _arbitrate_all("BAD")
+    assert models.single_calls == ROOMS, f"❌ Expected {ROOMS} per-room fallbacks, got {models.single_calls}"
+    assert [r.reasoning for r in results] == [f"genre{i}" for i in range(ROOMS)], "❌ Fallback result wrong"
+    print("  ✅ An unparseable batch falls back to per-room calls")
+
+    models = _install("slow")
+    gemini_module.ARBITRATION_TIMEOUT = 0.2
+    previous = gemini_service._last_results["OK0"]
+    results = await _arbitrate_all("OK", genre="house")
+    assert models.single_calls == 0 and results[0] is previous, "❌ Timed-out batch did not keep previous results"
+    print("  ✅ A timed-out batch keeps each room's previous result (no retry storm)")
+
+    # Max size flushes immediately; batches never exceed it
+    models = _install("ok")
+    gemini_module.ARBITRATION_TIMEOUT = 3.0
+    gemini_service.batcher = ArbitrationBatcher(gemini_service._send_batch, window=10.0, max_size=3)
+    await _arbitrate_all("MAX")
+    assert models.batch_calls == [3, 3], f"❌ Expected two full batches, got {models.batch_calls}"
+    stats = gemini_service.get_stats()
+    print(f"  ✅ Full batches flush without waiting: {stats['batching']}")
+    assert "MAX0" in stats["room_latency_ms"], "❌ Per-room latency not reported"
+
+
+def test_arbitration_batching():
+    print("Testing cross-room arbitration batching...")
+    asyncio.run(_run())
+    print("\n✅ Arbitration batching OK\n")
+
+
+if __name__ == "__main__":
+    test_arbitration_batching()
@@ -0,0 +1,96 @@
+"""Unit: repeated arbitration requests are served from the LRU+TTL cache without calling Gemini."""
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+from services.arbitration_cache import ArbitrationCache, arbitration_key
+from services.gemini_service import gemini_service
+from services.room_service import room_service
+from models.schemas import ArbitrationResult, WeightedPrompt
+
+REPLY = {
+    "prompts": [{"text": "dark trap beat with heavy 808s", "weight": 0.6}, {"text": "eerie synth pads", "weight": 0.4}],
+    "bpm": 110, "density": 0.6, "brightness": 0.4, "reasoning": "leaning into trap",
+}
+
+
+class CountingModels:
+    """Async models API that always answers with the same JSON."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(text=json.dumps(REPLY))
+
+
+def _result(text: str) -> ArbitrationResult:
+    return ArbitrationResult(prompts=[WeightedPrompt(text=text, weight=1.0)], bpm=100, density=0.5, brightness=0.5, reasoning="")
+
+
+def _unit():
+    prev = [WeightedPrompt(text="Warm lo-fi groove", weight=1.0)]
+    a = arbitration_key({"genre_dj": {"genre": "Trap"}, "vibe_setter": {"mood": "dark"}}, 100, 0.5, 0.5, prev)
+    b = arbitration_key({"vibe_setter": {"mood": " dark"}, "genre_dj": {"genre": "trap"}}, 100, 0.501, 0.499, prev)
+    assert a == b, "❌ Key not canonical across order, case, whitespace and rounding"
+    assert a != arbitration_key({"genre_dj": {"genre": "trap"}}, 100, 0.5, 0.5, prev), "❌ Different inputs share a key"
+    assert a != arbitration_key({"genre_dj": {"genre": "trap"}, "vibe_setter": {"mood": "dark"}}, 100, 0.5, 0.5, None), "❌ Previous prompts not in key"
+    print("  ✅ Keys are canonical and cover inputs, state and previous prompts")
+
+    cache = ArbitrationCache(maxsize=2, ttl=0.05)
+    cache.put("a", _result("a"))
+    cache.put("b", _result("b"))
+    assert cache.get("a") is not None  # a is now most recently used
+    cache.put("c", _result("c"))
+    assert cache.get("b") is None and cache.evictions == 1, "❌ LRU did not evict the least recently used entry"
+    time.sleep(0.06)
+    assert cache.get("a") is None and cache.expirations == 1, "❌ Entry outlived its TTL"
+    print(f"  ✅ LRU eviction and TTL expiry: {cache.stats()}")
+
+
+async def _run():
+    models = CountingModels()
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    gemini_service.cache = ArbitrationCache()
+    inputs = {"genre_dj": {"genre": "trap"}, "vibe_setter": {"mood": "dark"}}
+
+    start = time.perf_counter()
+    first = await gemini_service.arbitrate("CACHE1", inputs, 100, 0.5, 0.5)
+    miss_ms = (time.perf_counter() - start) * 1000
+    assert models.calls == 1 and first.bpm == 110
+
+    # Another room, same previous prompts (none) and same inputs: served from cache
+    start = time.perf_counter()
+    second = await gemini_service.arbitrate("CACHE2", {"vibe_setter": {"mood": "Dark"}, "genre_dj": {"genre": "trap"}}, 100, 0.5, 0.5)
+    hit_ms = (time.perf_counter() - start) * 1000
+    assert models.calls == 1 and second is first, "❌ Identical request called Gemini again"
+    assert gemini_service._last_results["CACHE2"] is first, "❌ Cache hit did not become the room's previous result"
+    feed = [e["text"] for e in room_service._timeline.get("CACHE2", []) if e["source"] == "gemini"]
+    assert feed == ["leaning into trap"], f"❌ Cache hit left no reasoning in the timeline: {feed}"
+    print(f"  ✅ Cache hit in {hit_ms:.3f} ms vs {miss_ms:.1f} ms for a Gemini call")
+
+    # Same inputs on a room that is playing different prompts: must ask again
+    gemini_service._last_results["CACHE3"] = _result("warm lo-fi groove")
+    await gemini_service.arbitrate("CACHE3", inputs, 100, 0.5, 0.5)
+    assert models.calls == 2, "❌ Cache ignored the previous prompt set"
+    stats = gemini_service.get_stats()["cache"]
+    assert (stats["hits"], stats["misses"]) == (1, 2), f"❌ Wrong counters: {stats}"
+    print(f"  ✅ Counters: {stats}")
+
+
+def test_arbitration_cache():
+    print("Testing arbitration cache...")
+    _unit()
+    asyncio.run(_run())
+    print("\n✅ Arbitration cache OK\n")
+
+
+if __name__ == "__main__":
+    test_arbitration_cache()
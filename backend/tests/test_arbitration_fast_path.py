@@ -0,0 +1,85 @@
+"""Unit: numeric-only ticks (bpm, density, brightness) are arbitrated locally without calling Gemini."""
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+from services.arbitration_cache import ArbitrationCache
+from services.gemini_service import gemini_service
+
+REPLY = {
+    "prompts": [{"text": "dusty lo-fi groove with jazz piano", "weight": 0.7}, {"text": "vinyl crackle", "weight": 0.3}],
+    "bpm": 90, "density": 0.4, "brightness": 0.5, "reasoning": "settling into lo-fi",
+}
+TICKS = 1000
+
+
+class CountingModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(text=json.dumps(REPLY))
+
+
+async def _run():
+    models = CountingModels()
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    gemini_service.cache = ArbitrationCache()
+    room = "FAST"
+
+    base = await gemini_service.arbitrate(room, {"genre_dj": {"genre": "lofi"}}, 100, 0.5, 0.5)
+    assert models.calls == 1
+
+    # Drummer nudge: prompts kept, BPM applied, no LLM
+    result = await gemini_service.arbitrate(room, {"drummer": {"bpm": 124}}, base.bpm, base.density, base.brightness)
+    assert models.calls == 1, "❌ Drummer-only tick called Gemini"
+    assert result.prompts == base.prompts and result.bpm == 124, f"❌ Fast path result wrong: {result}"
+    print(f"  ✅ Drummer tick → {result.bpm} BPM, prompts unchanged ({result.reasoning})")
+
+    # Energy slider and applause: density/brightness already folded in by the room
+    result = await gemini_service.arbitrate(
+        room,
+        {"energy": {"density": 0.8}, "crowd_energy": {"applause_volume": 0.9, "clap_rate": 0.7, "intensity": 0.8, "zone": "HIGH", "density": 0.8, "brightness": 0.7}},
+        124, 0.8, 0.7,
+    )
+    assert models.calls == 1 and (result.density, result.brightness, result.bpm) == (0.8, 0.7, 124), "❌ Energy tick not applied locally"
+    print("  ✅ Energy + applause tick applied locally")
+
+    # Re-sending the genre that was already arbitrated is not a textual change
+    await gemini_service.arbitrate(room, {"genre_dj": {"genre": "lofi"}, "drummer": {"bpm": 110}}, 124, 0.8, 0.7)
+    assert models.calls == 1, "❌ Unchanged genre re-triggered Gemini"
+
+    # New mood: textual change, goes to the LLM
+    await gemini_service.arbitrate(room, {"vibe_setter": {"mood": "melancholic"}}, 110, 0.8, 0.7)
+    assert models.calls == 2, "❌ Mood change did not reach Gemini"
+    await gemini_service.arbitrate(room, {"instrumentalist": {"custom_prompt": "add a cello"}}, 110, 0.8, 0.7)
+    assert models.calls == 3, "❌ custom_prompt did not reach Gemini"
+    print("  ✅ genre/mood/custom_prompt changes still go to Gemini")
+
+    start = time.perf_counter()
+    for i in range(TICKS):
+        await gemini_service.arbitrate(room, {"drummer": {"bpm": 90 + i % 40}}, 100, 0.5, 0.5)
+    per_tick_us = (time.perf_counter() - start) / TICKS * 1e6
+    assert models.calls == 3
+    assert per_tick_us < 1000, f"❌ Fast path too slow: {per_tick_us:.0f} µs"
+    stats = gemini_service.get_stats()
+    print(f"  ✅ Numeric-only tick: {per_tick_us:.1f} µs ({stats['fast_path_ticks']} fast-path ticks, {stats['llm_calls']} LLM calls)")
+
+    gemini_service.forget_room(room)
+    assert room not in gemini_service._last_results
+
+
+def test_arbitration_fast_path():
+    print("Testing arbitration fast path...")
+    asyncio.run(_run())
+    print("\n✅ Arbitration fast path OK\n")
+
+
+if __name__ == "__main__":
+    test_arbitration_fast_path()
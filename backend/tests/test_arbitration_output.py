@@ -0,0 +1,117 @@
+"""
+Unit: schema-constrained arbitration output. Near-miss replies are repaired locally
+instead of re-calling Gemini; prints how many of them the old parser would have retried.
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+from models.schemas import ArbitrationResult
+from services.arbitration_cache import ArbitrationCache
+from services.arbitration_output import ArbitrationOutputError, parse_result
+from services.gemini_service import gemini_service
+
+VALID = {
+    "prompts": [{"text": "warm lo-fi groove", "weight": 0.6}, {"text": "dusty vinyl crackle", "weight": 0.4}],
+    "bpm": 92, "density": 0.4, "brightness": 0.3, "reasoning": "settling in",
+}
+
+NEAR_MISSES = {
+    "fenced": "```json\n" + json.dumps(VALID) + "\n```",
+    "prose around": "Here is the result:\n" + json.dumps(VALID) + "\nEnjoy!",
+    "trailing commas": json.dumps(VALID).replace("]", ",]").replace("}", ",}", 1),
+    "python quotes": repr(VALID),
+    "truncated": json.dumps(VALID)[:-15],
+    "string prompts": json.dumps({**VALID, "prompts": ["warm lo-fi groove", "dusty vinyl crackle"]}),
+    "level words": json.dumps({**VALID, "density": "High", "brightness": "Low"}),
+    "no reasoning": json.dumps({k: v for k, v in VALID.items() if k != "reasoning"}),
+}
+
+
+def _old_parse(text: str) -> ArbitrationResult:
+    """The parser before schema-constrained output: fence regex, json.loads, dict access."""
+    raw = text.strip()
+    match = re.search(r"```(?:json)?\s*([\s\S]+?)```", raw)
+    if match:
+        raw = match.group(1).strip()
+    data = json.loads(raw)
+    return ArbitrationResult(
+        prompts=data["prompts"], bpm=int(data["bpm"]), density=float(data["density"]),
+        brightness=float(data["brightness"]), reasoning=data.get("reasoning", ""),
+    )
+
+
+class ScriptedModels:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.configs = []
+
+    async def generate_content(self, config=None, **kwargs):
+        self.calls += 1
+        self.configs.append(config)
+        return SimpleNamespace(text=self.replies.pop(0))
+
+
+def _unit():
+    result, repaired = parse_result(json.dumps(VALID))
+    assert not repaired and result.bpm == 92, "❌ Valid reply not parsed in one pass"
+    old_failures = 0
+    for name, text in NEAR_MISSES.items():
+        try:
+            _old_parse(text)
+        except Exception:
+            old_failures += 1
+        result, repaired = parse_result(text)
+        assert repaired and result.prompts and result.prompts[0].text == "warm lo-fi groove", f"❌ Not repaired: {name}"
+    levels, _ = parse_result(NEAR_MISSES["level words"])
+    assert levels.density > 0.5 > levels.brightness, "❌ Level words mapped wrongly"
+    print(f"  ✅ {len(NEAR_MISSES)} near-miss replies repaired locally (old parser would have retried {old_failures})")
+    # literal_eval fails with TypeError (unhashable key) and RecursionError/MemoryError (deep nesting)
+    hostile = ("{[1]: 2}", "[" * 200000 + "]" * 200000)
+    # bpm that float() accepts but round() cannot turn into an int
+    bad_bpm = (json.dumps({**VALID, "bpm": "1e999"}), json.dumps({**VALID, "bpm": "nan"}), json.dumps(VALID).replace("92", "1e999"))
+    for garbage in ("", "I can't help with that", '{"prompts": 5}', *hostile, *bad_bpm):
+        try:
+            parse_result(garbage)
+            raise AssertionError(f"❌ Garbage accepted: {garbage[:40]!r}")
+        except ArbitrationOutputError:
+            pass
+    print("  ✅ Unrepairable replies raise ArbitrationOutputError")
+
+
+async def _run():
+    gemini_service.cache = ArbitrationCache()
+    gemini_service.batcher.window = 0  # one call per arbitration, so calls == round trips
+    replies = list(NEAR_MISSES.values())
+    models = ScriptedModels(replies + ["not json at all", json.dumps(VALID)])
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+
+    before = dict(gemini_service.output_stats)
+    for i in range(len(replies)):
+        await gemini_service.arbitrate(f"OUT{i}", {"genre_dj": {"genre": f"Lofi {i}"}}, 100, 0.5, 0.5)
+    stats = gemini_service.output_stats
+    assert models.calls == len(replies) and stats["retries"] == before["retries"], f"❌ Near-miss replies re-called the model: {stats}"
+    assert stats["repaired"] - before["repaired"] == len(replies), f"❌ Repairs not counted: {stats}"
+    assert models.configs[0].response_schema is ArbitrationResult, "❌ Response schema not requested"
+    assert models.configs[0].response_mime_type == "application/json"
+
+    result = await gemini_service.arbitrate("OUT_RETRY", {"genre_dj": {"genre": "Jazz"}}, 100, 0.5, 0.5)
+    assert result.bpm == 92 and stats["retries"] - before["retries"] == 1, f"❌ Unrepairable reply not retried once: {stats}"
+    print(f"  ✅ {len(replies)} near misses → {len(replies)} calls, 0 retries; garbage → 1 retry; output stats: {gemini_service.get_stats()['output']}")
+
+
+def test_arbitration_output():
+    print("Testing schema-constrained arbitration output...")
+    _unit()
+    asyncio.run(_run())
+    print("\n✅ Arbitration output OK\n")
+
+
+if __name__ == "__main__":
+    test_arbitration_output()
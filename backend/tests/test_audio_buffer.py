@@ -0,0 +1,65 @@
+"""Unit: per-room audio ring buffer keeps the last N seconds in fixed memory and pre-rolls new sockets."""
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.audio_buffer import AudioRingBuffer, BYTES_PER_SECOND, seconds_to_bytes
+from services.audio_framing import HEADER_SIZE, FRAMED_SIZE
+from services.room_service import RoomService
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.audio = bytearray()
+
+    async def send_bytes(self, data: bytes):
+        self.audio += data
+
+    async def send_text(self, text: str):
+        pass
+
+
+def _chunk(index: int, seconds: float = 0.12) -> bytes:
+    """A PCM chunk filled with a recognisable byte so ordering can be checked."""
+    return bytes([index % 256]) * seconds_to_bytes(seconds)
+
+
+async def _run():
+    ring = AudioRingBuffer(BYTES_PER_SECOND)
+    for i in range(40):  # 4.8 s of audio through a 1 s buffer
+        ring.write(_chunk(i))
+    data = ring.read()
+    assert len(ring._buf) == BYTES_PER_SECOND, "❌ Buffer grew past its fixed size"
+    assert len(data) == BYTES_PER_SECOND, f"❌ Expected 1 s buffered, got {len(data)} bytes"
+    assert data[-1] == 39 and data[0] < 39, "❌ Buffer does not end with the newest chunk"
+    assert list(data) == sorted(data), "❌ Buffered audio is out of order after wrap-around"
+    print(f"  ✅ Ring buffer wraps correctly, fixed at {ring.capacity} bytes")
+
+    rs = RoomService()
+    room_id = rs.create_room(host_id="host").room_id
+    for i in range(30):
+        for frame in rs.frame_audio(room_id, _chunk(i)):
+            rs.buffer_audio(room_id, frame)
+    late = RecordingSocket()
+    rs.send_preroll(room_id, late)
+    await asyncio.sleep(0.01)
+    frames = rs._audio_buffers[room_id].preroll_chunks(FRAMED_SIZE)
+    expected = b"".join(f[HEADER_SIZE:] for f in frames)
+    assert bytes(late.audio) == expected, "❌ Pre-roll does not match buffered audio"
+    print(f"  ✅ Late joiner received {len(late.audio) / BYTES_PER_SECOND:.2f}s pre-roll immediately")
+
+    stats = rs.get_stats()["audio_buffers"]
+    assert stats["total_bytes"] == rs._audio_buffers[room_id].capacity, "❌ Buffer memory not reported"
+    print(f"  ✅ Stats report {stats['total_bytes']} bytes of buffer memory")
+    rs.close_outbound(late)
+
+
+def test_audio_buffer():
+    print("Testing audio ring buffer...")
+    asyncio.run(_run())
+    print("\n✅ Audio ring buffer OK\n")
+
+
+if __name__ == "__main__":
+    test_audio_buffer()
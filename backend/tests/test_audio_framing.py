@@ -0,0 +1,42 @@
+"""Unit: Lyria chunks are coalesced into fixed-duration frames with sequence/offset/timestamp headers."""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.audio_buffer import seconds_to_bytes
+from services.audio_framing import AudioFramer, HEADER, HEADER_SIZE, FRAME_PCM_BYTES, FRAME_SAMPLES, pcm_view
+
+
+def test_audio_framing():
+    print("Testing audio framing...")
+    framer = AudioFramer()
+    # Irregular upstream chunk sizes, like Lyria emits
+    sizes = [0.037, 0.25, 0.08, 0.5, 0.013, 0.12]
+    chunks = [bytes([i]) * seconds_to_bytes(s) for i, s in enumerate(sizes)]
+    frames = []
+    for chunk in chunks:
+        frames.extend(framer.push(chunk))
+
+    total = sum(len(c) for c in chunks)
+    assert len(frames) == total // FRAME_PCM_BYTES, f"❌ Expected {total // FRAME_PCM_BYTES} frames, got {len(frames)}"
+    assert all(len(f) == HEADER_SIZE + FRAME_PCM_BYTES for f in frames), "❌ Frames are not fixed-size"
+    print(f"  ✅ {len(chunks)} chunks coalesced into {len(frames)} frames of {FRAME_PCM_BYTES} PCM bytes")
+
+    now = time.time()
+    for i, frame in enumerate(frames):
+        seq, offset, server_time = HEADER.unpack_from(frame)
+        assert seq == i, f"❌ Frame {i} has sequence {seq}"
+        assert offset == i * FRAME_SAMPLES, f"❌ Frame {i} has sample offset {offset}"
+        assert now - 5 < server_time <= now, "❌ Server timestamp out of range"
+    print("  ✅ Sequence numbers, sample offsets and timestamps are consistent")
+
+    payload = b"".join(bytes(pcm_view(f)) for f in frames)
+    assert payload == b"".join(chunks)[:len(payload)], "❌ Frame payloads do not reproduce the input PCM"
+    print("  ✅ Payload is byte-identical to the upstream PCM")
+
+    print("\n✅ Audio framing OK\n")
+
+
+if __name__ == "__main__":
+    test_audio_framing()
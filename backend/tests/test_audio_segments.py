@@ -0,0 +1,87 @@
+"""Unit: HTTP audio segments are written once from the audio callback and served immutable with cache headers."""
+import asyncio
+import io
+import os
+import sys
+import wave
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # clients are never used for real
+
+from fastapi.testclient import TestClient
+from main import app
+from routers.ws import _audio_broadcast_callback
+from services.audio_buffer import SAMPLE_RATE
+from services.audio_segments import AUDIO_SEGMENT_SECONDS, AUDIO_SEGMENT_WINDOW, SEGMENT_PCM_BYTES
+from services.room_service import room_service
+
+CHUNK_SECONDS = 0.12  # roughly what Lyria sends per message
+
+
+def fake_lyria_chunks(seconds: float):
+    """A 440 Hz stereo tone in Lyria's chunk size, standing in for the live session."""
+    samples = int(CHUNK_SECONDS * SAMPLE_RATE)
+    for i in range(int(seconds / CHUNK_SECONDS)):
+        t = (np.arange(samples) + i * samples) / SAMPLE_RATE
+        tone = (np.sin(2 * np.pi * 440 * t) * 8000).astype("<i2")
+        yield np.repeat(tone, 2).tobytes()
+
+
+async def _feed_seconds(room_id: str, seconds: float):
+    """Drive the real audio callback, as the Lyria receive loop would."""
+    for chunk in fake_lyria_chunks(seconds):
+        await _audio_broadcast_callback(room_id, chunk)
+
+
+def test_audio_segments():
+    print("Testing HTTP audio segments...")
+    client = TestClient(app)
+    room_id = room_service.create_room(host_id="host").room_id
+
+    assert client.get("/rooms/NOROOM/audio/manifest").status_code == 404, "❌ Unknown room should 404"
+    manifest = client.get(f"/rooms/{room_id.lower()}/audio/manifest")
+    assert manifest.status_code == 200 and manifest.json()["segments"] == [], "❌ New stream should be empty"
+    assert manifest.headers["cache-control"] == "public, max-age=1", "❌ Manifest cache header missing"
+    print("  ✅ Manifest starts empty with a short cache lifetime")
+
+    asyncio.run(_feed_seconds(room_id, AUDIO_SEGMENT_SECONDS * (AUDIO_SEGMENT_WINDOW + 2) + 0.5))
+
+    manifest = client.get(f"/rooms/{room_id}/audio/manifest").json()
+    segments = manifest["segments"]
+    assert len(segments) == AUDIO_SEGMENT_WINDOW, f"❌ Expected a {AUDIO_SEGMENT_WINDOW}-segment window, got {len(segments)}"
+    assert manifest["first_sequence"] == 2 and manifest["next_sequence"] == AUDIO_SEGMENT_WINDOW + 2, f"❌ Bad sequence range: {manifest}"
+    print(f"  ✅ Window slides: segments {manifest['first_sequence']}..{manifest['next_sequence'] - 1}")
+
+    first = client.get(segments[0]["url"])
+    assert first.status_code == 200, "❌ Listed segment not served"
+    assert "immutable" in first.headers["cache-control"] and first.headers["etag"], "❌ Segment cache headers missing"
+    with wave.open(io.BytesIO(first.content)) as wav:
+        assert (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (SAMPLE_RATE, 2, 2), "❌ Wrong WAV format"
+        assert wav.getnframes() * 4 == SEGMENT_PCM_BYTES, "❌ Wrong segment length"
+    again = client.get(segments[0]["url"])
+    assert again.content == first.content, "❌ Segment changed between requests"
+    print(f"  ✅ Segment is a {AUDIO_SEGMENT_SECONDS}s WAV, immutable and identical on repeat requests")
+
+    stream_id = manifest["stream_id"]
+    for path in (f"/rooms/{room_id}/audio/{stream_id}/0.wav",
+                 f"/rooms/{room_id}/audio/{stream_id}/{manifest['next_sequence']}.wav",
+                 f"/rooms/{room_id}/audio/otherstream/3.wav"):
+        resp = client.get(path)
+        assert resp.status_code == 404 and resp.headers["cache-control"] == "no-store", f"❌ {path} should be an uncached 404"
+    print("  ✅ Evicted, future and foreign-stream segments are uncached 404s")
+
+    # Music stops: the partial segment is dropped but numbering continues
+    room_service.release_audio_buffer(room_id)
+    asyncio.run(_feed_seconds(room_id, AUDIO_SEGMENT_SECONDS + 0.2))
+    resumed = client.get(f"/rooms/{room_id}/audio/manifest").json()
+    assert resumed["next_sequence"] == manifest["next_sequence"] + 1, "❌ Sequence numbers restarted after stop"
+    assert client.get("/stats").json()["segments"]["total_bytes"] > 0, "❌ Segment memory not reported"
+    print("  ✅ Sequence numbers survive stop/start")
+
+    room_service.destroy_room(room_id)
+    assert client.get(segments[-1]["url"]).status_code == 404, "❌ Segments outlived the room"
+    print("\n✅ HTTP audio segments OK\n")
+
+
+if __name__ == "__main__":
+    test_audio_segments()
@@ -0,0 +1,125 @@
+"""
+Unit: offline Gemini and Lyria stand-ins. Fake Lyria streams 48 kHz stereo PCM at
+real-time pace (with jitter, but no drift) and can drop the stream; fake Gemini
+returns arbitration JSON the real parsing path accepts, single-room and batched.
+No API key or network needed.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("FAKE_BACKENDS", "all")  # module singletons need no API key
+
+from google.genai import types as genai_types
+
+from services.audio_buffer import BYTES_PER_SECOND, FRAME_BYTES
+from services.fake_backends import FakeGeminiClient, FakeLyriaClient
+from services.gemini_service import GeminiService
+from services.lyria_service import LyriaService
+
+STREAM_SECONDS = 1.5
+
+
+async def _lyria_pacing():
+    client = FakeLyriaClient(chunk_seconds=0.1, jitter=0.03, connect_latency=0.05, seed=1)
+    service = LyriaService(client=client)
+    received = []
+    started = time.perf_counter()
+
+    async def collect(room_id, data):
+        received.append((time.perf_counter() - started, data))
+
+    service.broadcast_callback = collect
+    await service.start_session("FAKE", initial_bpm=120)
+    await asyncio.sleep(STREAM_SECONDS)
+    await service.stop_session("FAKE")
+
+    total = sum(len(data) for _, data in received)
+    assert all(len(data) % FRAME_BYTES == 0 for _, data in received), "❌ Chunk not frame-aligned"
+    audio_seconds = total / BYTES_PER_SECOND
+    # Played in real time: audio delivered tracks the wall clock (connect + one chunk of lead)
+    assert STREAM_SECONDS - 0.3 <= audio_seconds <= STREAM_SECONDS + 0.1, f"❌ {audio_seconds:.2f}s of audio in {STREAM_SECONDS}s"
+    gaps = [b - a for (a, _), (b, _) in zip(received, received[1:])]
+    assert max(gaps) < 0.1 + 0.03 * 2 + 0.02, f"❌ Chunk gap {max(gaps):.3f}s exceeds jitter"
+    assert any(abs(g - 0.1) > 0.005 for g in gaps), "❌ No delivery jitter"
+    print(f"  ✅ {len(received)} chunks, {audio_seconds:.2f}s of 48 kHz stereo PCM in {STREAM_SECONDS}s; gaps {min(gaps) * 1000:.0f}–{max(gaps) * 1000:.0f} ms")
+
+
+async def _lyria_failures():
+    client = FakeLyriaClient(chunk_seconds=0.05, jitter=0.0, failure_rate=0.2, connect_latency=0.0, seed=3)
+    async with client.aio.live.music.connect(model="models/lyria-realtime-exp") as session:
+        await session.set_music_generation_config(config=genai_types.LiveMusicGenerationConfig(bpm=90))
+        await session.play()
+        chunks = 0
+        try:
+            async for message in session.receive():
+                chunks += message.server_content.audio_chunks[0].data and 1
+        except ConnectionError as e:
+            print(f"  ✅ Stream dropped after {chunks} chunks: {e}")
+        else:
+            raise AssertionError("❌ failure_rate never dropped the stream")
+    assert client.stream_failures == 1 and client.closes == 1
+
+    refused = FakeLyriaClient(connect_latency=0.0, connect_failure_rate=1.0)
+    try:
+        async with refused.aio.live.music.connect(model="models/lyria-realtime-exp"):
+            raise AssertionError("❌ Connect should have failed")
+    except ConnectionError:
+        print("  ✅ Connect failures injected")
+
+
+async def _gemini():
+    client = FakeGeminiClient(latency=0.1, jitter=0.0, seed=1)
+    service = GeminiService(client=client)
+    inputs = {
+        "genre_dj": {"genre": "Lo-fi"},
+        "drummer": {"bpm": 140},
+        "energy": {"density": 0.9, "brightness": 0.2},
+        "vibe_setter": {"mood": "dreamy", "custom_prompt": "rain on a window"},
+    }
+    started = time.perf_counter()
+    result = await service.arbitrate("FAKE-G", inputs, 100, 0.5, 0.5)
+    elapsed = time.perf_counter() - started
+    assert client.calls == 1 and elapsed >= 0.1, "❌ Fake Gemini not called with its latency"
+    assert service.output_stats["valid"] == 1, f"❌ Reply not valid schema output: {service.output_stats}"
+    texts = " ".join(p.text for p in result.prompts)
+    assert "lo-fi" in texts and "rain on a window" in texts, f"❌ Inputs not reflected: {texts}"
+    # Density/brightness move at most 0.15 per tick; bpm is then locked to the drummer by _to_result
+    assert result.density == 0.65 and result.brightness == 0.35, "❌ Continuity steps not applied"
+    assert result.bpm == 140
+    print(f"  ✅ Single room in {elapsed * 1000:.0f} ms: bpm {result.bpm}, prompts {[p.text for p in result.prompts]}")
+
+    batch = json.loads(client.reply("### Room a\n" + service._format_inputs(inputs, 100, 0.5, 0.5)
+                                    + "\n\n### Room b\n" + service._format_inputs({"drummer": {"bpm": 80}}, 100, 0.5, 0.5)))
+    assert set(batch["rooms"]) == {"a", "b"} and batch["rooms"]["b"]["bpm"] == 90, f"❌ Batch reply wrong: {batch}"
+    print("  ✅ Batched reply keyed by room")
+
+    # Input lines literal_eval cannot read (unhashable key, deep nesting) are skipped
+    for payload in ("{[1]: 2}", "{" + "[" * 200000 + "]" * 200000 + "}"):
+        reply = json.loads(client.reply(service._format_inputs(inputs, 100, 0.5, 0.5) + f"\n  - genre_dj: {payload}"))
+        assert "lo-fi" in reply["prompts"][0]["text"], f"❌ Unreadable input line broke the fake reply: {reply}"
+    print("  ✅ Unreadable input lines skipped")
+
+    # Previous prompts in the summary are carried into the next answer
+    evolved = await service.arbitrate("FAKE-G", {**inputs, "instrumentalist": {"instrument": "Cello"}}, 140, 0.65, 0.35)
+    assert evolved.prompts[0].text != result.prompts[0].text and result.prompts[0].text in [p.text for p in evolved.prompts]
+    print(f"  ✅ Evolves from the previous prompts: {[p.text for p in evolved.prompts]}")
+
+    client.failure_rate = 1.0
+    fallback = await service.arbitrate("FAKE-G", {**inputs, "genre_dj": {"genre": "Trap"}}, 140, 0.65, 0.35)
+    assert fallback == evolved and client.failures == 1, "❌ Injected failure did not fall back to the previous result"
+    print("  ✅ Injected Gemini failure falls back to the previous result")
+
+
+def test_fake_backends():
+    print("Testing fake Gemini and Lyria backends...")
+    asyncio.run(_lyria_pacing())
+    asyncio.run(_lyria_failures())
+    asyncio.run(_gemini())
+    print("\n✅ Fake backends OK\n")
+
+
+if __name__ == "__main__":
+    test_fake_backends()
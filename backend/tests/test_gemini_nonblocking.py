@@ -0,0 +1,80 @@
+"""Unit: slow Gemini calls must not stall audio forwarding, and must time out to the previous result."""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+import services.gemini_service as gemini_module
+from services.gemini_service import gemini_service
+from models.schemas import ArbitrationResult, WeightedPrompt
+
+CHUNK_INTERVAL = 0.01  # forward one audio chunk every 10 ms
+WINDOW = 1.5
+
+
+class SlowModels:
+    """Async models API that takes far longer than the arbitration deadline."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def generate_content(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        raise AssertionError("should have timed out")
+
+
+async def _forwarded_chunks(duration: float) -> int:
+    """Simulates _receive_audio_loop forwarding chunks at a fixed pace."""
+    count = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        await asyncio.sleep(CHUNK_INTERVAL)
+        count += 1
+    return count
+
+
+async def _arbitrate_forever(room_id: str):
+    while True:
+        await gemini_service.arbitrate(room_id, {"genre_dj": {"genre": "trap"}}, 100, 0.5, 0.5)
+
+
+async def _run():
+    previous = ArbitrationResult(
+        prompts=[WeightedPrompt(text="warm lo-fi groove", weight=1.0)],
+        bpm=90, density=0.4, brightness=0.6, reasoning="previous tick",
+    )
+    gemini_service._last_results["SLOW"] = previous
+    models = SlowModels(latency=5.0)
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    gemini_module.ARBITRATION_TIMEOUT = 0.3
+
+    baseline = await _forwarded_chunks(WINDOW)
+
+    arbiters = [asyncio.create_task(_arbitrate_forever("SLOW")) for _ in range(4)]
+    under_load = await _forwarded_chunks(WINDOW)
+    for task in arbiters:
+        task.cancel()
+
+    print(f"  chunks forwarded, idle:              {baseline}")
+    print(f"  chunks forwarded, slow arbitration:  {under_load} ({models.calls} Gemini calls in flight/timed out)")
+    assert models.calls >= 4, "❌ Arbitration never ran"
+    assert under_load >= baseline * 0.9, "❌ Audio forwarding slowed down while Gemini was slow"
+
+    result = await gemini_service.arbitrate("SLOW", {"genre_dj": {"genre": "trap"}}, 100, 0.5, 0.5)
+    assert result is previous, "❌ Timeout did not keep the previous result"
+    print("  ✅ Timed-out arbitration kept the previous prompts")
+
+
+def test_gemini_nonblocking():
+    print("Testing non-blocking Gemini arbitration...")
+    asyncio.run(_run())
+    print("\n✅ Gemini arbitration is non-blocking\n")
+
+
+if __name__ == "__main__":
+    test_gemini_nonblocking()
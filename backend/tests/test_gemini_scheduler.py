@@ -0,0 +1,127 @@
+"""
+Unit: the global Gemini scheduler — token-bucket rate limit, in-flight cap,
+round-robin fairness across rooms, stale-job dropping, a deadline that starts at
+dispatch (not while queued) and cancellation.
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.gemini_scheduler import GeminiScheduler, StaleJobError
+
+
+def _call(log: list, name: str, delay: float = 0.0):
+    async def run():
+        log.append((name, time.monotonic()))
+        await asyncio.sleep(delay)
+        return name
+    return run
+
+
+async def _rate_limit():
+    scheduler = GeminiScheduler(rate=20, burst=2, max_in_flight=100)
+    log = []
+    start = time.monotonic()
+    results = await asyncio.gather(*(scheduler.submit(f"room{i}", _call(log, f"room{i}")) for i in range(6)))
+    elapsed = time.monotonic() - start
+    assert results == [f"room{i}" for i in range(6)], f"❌ Wrong results: {results}"
+    # 2 from the burst, then 4 more at 20/s → ≥ 0.2 s
+    assert elapsed >= 0.18, f"❌ Rate limit not applied ({elapsed:.3f}s)"
+    print(f"  ✅ 6 calls at 20 rps with burst 2 took {elapsed * 1000:.0f} ms")
+
+
+async def _in_flight_cap():
+    scheduler = GeminiScheduler(rate=1000, burst=1000, max_in_flight=2)
+    peak = 0
+    running = 0
+
+    def job():
+        async def run():
+            nonlocal peak, running
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+        return run
+
+    await asyncio.gather(*(scheduler.submit(f"room{i}", job()) for i in range(8)))
+    assert peak == 2, f"❌ In-flight cap not honoured (peak {peak})"
+    print("  ✅ Never more than max_in_flight calls at once")
+
+
+async def _fairness():
+    scheduler = GeminiScheduler(rate=1000, burst=1000, max_in_flight=1)
+    log = []
+    # Block the single slot so the rest queue up, then: a busy room re-submits
+    # before the quiet rooms are served, but only keeps one place in the queue
+    blocker = asyncio.create_task(scheduler.submit("blocker", _call(log, "blocker", 0.05)))
+    await asyncio.sleep(0.01)
+    busy = [asyncio.create_task(scheduler.submit("busy", _call(log, f"busy{i}"))) for i in range(5)]
+    quiet = [asyncio.create_task(scheduler.submit(f"quiet{i}", _call(log, f"quiet{i}"))) for i in range(3)]
+    await blocker
+    await asyncio.gather(*quiet)
+    order = [name for name, _ in log]
+    assert order == ["blocker", "busy4", "quiet0", "quiet1", "quiet2"], f"❌ Unfair order: {order}"
+    stale = await asyncio.gather(*busy[:4], return_exceptions=True)
+    assert all(isinstance(e, StaleJobError) for e in stale), f"❌ Superseded jobs not dropped: {stale}"
+    assert await busy[4] == "busy4"
+    assert scheduler.dropped_stale == 4 and scheduler.stats()["dropped_stale"] == 4
+    print(f"  ✅ Round-robin order {order}; 4 superseded jobs dropped without a call")
+
+
+async def _deadline_from_dispatch():
+    scheduler = GeminiScheduler(rate=1000, burst=1000, max_in_flight=1)
+    log = []
+    # Two rooms queue behind a slow call for longer than their timeout; queueing must
+    # not count against it, only a call that is itself slow times out
+    blocker = asyncio.create_task(scheduler.submit("blocker", _call(log, "blocker", 0.15)))
+    await asyncio.sleep(0.01)
+    start = time.monotonic()
+    quick = asyncio.create_task(scheduler.submit("roomA", _call(log, "roomA", 0.02), timeout=0.1))
+    slow = asyncio.create_task(scheduler.submit("roomB", _call(log, "roomB", 0.3), timeout=0.1))
+    assert await quick == "roomA", "❌ Queued call failed"
+    waited = time.monotonic() - start
+    try:
+        await slow
+        raise AssertionError("❌ Slow call did not time out")
+    except asyncio.TimeoutError:
+        pass
+    await blocker
+    assert [name for name, _ in log] == ["blocker", "roomA", "roomB"], f"❌ Wrong order: {log}"
+    assert waited > 0.1 and scheduler.timed_out == 1, f"❌ Queue wait counted against the deadline ({waited:.2f}s)"
+    print(f"  ✅ Served in order; roomA waited {waited * 1000:.0f} ms (> its 100 ms timeout) and still ran, slow roomB timed out")
+
+
+async def _cancellation():
+    scheduler = GeminiScheduler(rate=1000, burst=1000, max_in_flight=1)
+    log = []
+    blocker = asyncio.create_task(scheduler.submit("blocker", _call(log, "blocker", 0.05)))
+    await asyncio.sleep(0.01)
+    try:
+        await asyncio.wait_for(scheduler.submit("late", _call(log, "late")), timeout=0.01)
+        raise AssertionError("❌ Deadline did not fire")
+    except asyncio.TimeoutError:
+        pass
+    assert scheduler.queue_depth == 0, "❌ Timed-out job left in the queue"
+    await blocker
+    await asyncio.sleep(0.02)
+    assert [name for name, _ in log] == ["blocker"], f"❌ Timed-out job still ran: {log}"
+    stats = scheduler.stats()
+    assert stats["cancelled"] == 1 and stats["in_flight"] == 0 and stats["started"] == 1, f"❌ Wrong stats: {stats}"
+    print(f"  ✅ Deadline removes the queued job; stats: {stats}")
+
+
+def test_gemini_scheduler():
+    print("Testing Gemini scheduler...")
+    asyncio.run(_rate_limit())
+    asyncio.run(_in_flight_cap())
+    asyncio.run(_fairness())
+    asyncio.run(_deadline_from_dispatch())
+    asyncio.run(_cancellation())
+    print("\n✅ Gemini scheduler OK\n")
+
+
+if __name__ == "__main__":
+    test_gemini_scheduler()
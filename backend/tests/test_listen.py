@@ -0,0 +1,93 @@
+import asyncio
+import json
+import urllib.request
+import websockets
+import uuid
+
+WS_URL = "ws://localhost:8000/ws"
+API_BASE = "http://localhost:8000"
+
+
+async def _recv(ws) -> dict:
+    """Next message, skipping heartbeat pings."""
+    while True:
+        msg = json.loads(await ws.recv())
+        if msg["type"] != "ping":
+            return msg
+
+
+async def _recv_type(ws, kind: str, timeout: float = 2.0) -> dict:
+    """Next message of type `kind`, skipping anything else."""
+    while True:
+        msg = await asyncio.wait_for(_recv(ws), timeout)
+        if msg["type"] == kind:
+            return msg
+
+
+async def test_listen():
+    print("Testing listen-only spectator connections...")
+    host_id = str(uuid.uuid4())
+
+    async with websockets.connect(WS_URL) as host_ws:
+        await host_ws.send(json.dumps({"type": "create_room", "user_id": host_id}))
+        room_id = (await _recv(host_ws))["room_id"]
+        print(f"  ✅ Room created: {room_id}")
+
+        listeners = [await websockets.connect(WS_URL) for _ in range(15)]
+        try:
+            for ws in listeners:
+                await ws.send(json.dumps({"type": "listen", "room_id": room_id, "audio_tier": "mulaw"}))
+                msg = await _recv(ws)
+                assert msg["type"] == "listening", f"❌ Expected listening, got {msg}"
+                summary = await _recv(ws)
+                assert summary["type"] == "state_summary", f"❌ Expected state_summary, got {summary['type']}"
+            print(f"  ✅ {len(listeners)} listeners joined past the 10-player cap")
+
+            # Listeners must not take roles or show up as participants
+            with urllib.request.urlopen(f"{API_BASE}/rooms", timeout=5) as resp:
+                rooms = {r["room_id"]: r for r in json.loads(resp.read().decode())["rooms"]}
+            assert rooms[room_id]["member_count"] == 1, f"❌ Listeners counted as members: {rooms[room_id]}"
+            assert rooms[room_id]["listener_count"] == len(listeners), "❌ Wrong listener_count"
+            print(f"  ✅ /rooms: member_count=1, listener_count={rooms[room_id]['listener_count']}")
+
+            # Control messages from listeners are ignored
+            await listeners[0].send(json.dumps({
+                "type": "input_update", "user_id": "spectator", "room_id": room_id,
+                "role": "drummer", "payload": {"bpm": 150},
+            }))
+            await asyncio.sleep(0.3)
+            print("  ✅ Listener input_update ignored without error")
+
+            # Play-state messages reach listeners, followed by a fresh summary
+            await host_ws.send(json.dumps({"type": "stop_music", "user_id": host_id, "room_id": room_id}))
+            for ws in listeners[:3]:
+                await _recv_type(ws, "music_stopped")
+                summary = await _recv_type(ws, "state_summary")
+                assert summary["is_playing"] is False, f"❌ Stale summary after stop: {summary}"
+            print("  ✅ music_stopped and an is_playing=false summary reach listeners")
+
+            # A change inside the summary interval is sent when the interval ends, not dropped
+            async with websockets.connect(WS_URL) as player_ws:
+                await player_ws.send(json.dumps({"type": "join_room", "user_id": str(uuid.uuid4()), "room_id": room_id}))
+                await _recv_type(player_ws, "joined")
+                summary = await _recv_type(listeners[0], "state_summary", timeout=7.0)
+                assert summary["participant_count"] == 2, f"❌ Throttled change lost: {summary}"
+            print("  ✅ Throttled summary change delivered at the end of the interval")
+
+            await host_ws.send(json.dumps({"type": "close_room", "user_id": host_id, "room_id": room_id}))
+            for ws in listeners[:3]:
+                closed = await _recv_type(ws, "room_closed")
+                assert closed["message"] == "Host ended the session", f"❌ Unexpected close: {closed}"
+                try:
+                    extra = await _recv_type(ws, "room_closed", timeout=0.5)
+                    raise AssertionError(f"❌ room_closed sent twice: {extra}")
+                except (asyncio.TimeoutError, websockets.ConnectionClosed):
+                    pass
+            print("  ✅ room_closed reaches listeners once on close_room")
+        finally:
+            for ws in listeners:
+                await ws.close()
+
+    print("\n✅ Listen-only connections OK")
+
+asyncio.run(test_listen())
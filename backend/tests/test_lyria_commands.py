@@ -0,0 +1,214 @@
+"""
+Unit: per-room Lyria command actor. Concurrent update_prompts calls are serialised,
+pending updates coalesce into the newest one (superseded callers get False), and
+drop automation outranks applause. A tick result held back by a drop is retried once
+the hold expires, without the room recording it as arbitrated meanwhile.
+Prints upstream RPCs for a burst of updates before and after coalescing.
+"""
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+from google.genai import types as genai_types
+
+import routers.ws as ws
+import services.lyria_service as ls
+import services.room_service as rs
+from models.schemas import Role
+from services.arbitration_cache import ArbitrationCache
+from services.gemini_service import gemini_service
+from services.lyria_service import lyria_service, PRIORITY_DROP
+from services.room_service import room_service
+
+RPC_LATENCY = 0.02
+
+
+class FakeSession:
+    def __init__(self):
+        self.rpcs = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _rpc(self, name, value=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(RPC_LATENCY)
+        self.in_flight -= 1
+        self.rpcs.append((name, value))
+
+    async def reset_context(self):
+        await self._rpc("reset_context")
+
+    async def set_music_generation_config(self, config):
+        await self._rpc("config", (config.bpm, config.density, config.brightness))
+
+    async def set_weighted_prompts(self, prompts):
+        await self._rpc("prompts", [p.text for p in prompts])
+
+    async def stop(self):
+        pass
+
+
+class NullContext:
+    async def __aexit__(self, *exc):
+        pass
+
+
+def _session(room_id: str) -> FakeSession:
+    session = FakeSession()
+    lyria_service._sessions[room_id] = {"session": session, "ctx": NullContext(), "bpm": 100}
+    return session
+
+
+def _prompts(text: str):
+    return [genai_types.WeightedPrompt(text=text, weight=1.0)]
+
+
+async def _coalescing():
+    session = _session("BURST")
+    burst = 20
+    calls = [
+        lyria_service.update_prompts("BURST", _prompts(f"applause {i}"), 100, 0.5 + i / 100, 0.5)
+        for i in range(burst)
+    ]
+    results = await asyncio.gather(*calls)
+    assert results == [False] * (burst - 1) + [True], f"❌ Superseded callers not told: {results}"
+    assert session.max_in_flight == 1, "❌ Lyria RPCs overlapped"
+    prompt_rpcs = [v for name, v in session.rpcs if name == "prompts"]
+    assert prompt_rpcs[-1] == [f"applause {burst - 1}"], f"❌ Newest update did not win: {prompt_rpcs[-1]}"
+    before = burst * 2  # config + prompts per call, uncoalesced
+    print(f"  ✅ {burst} concurrent updates → {len(prompt_rpcs)} sent, {len(session.rpcs)} RPCs (uncoalesced: {before}); newest wins, never overlapping")
+    await lyria_service.stop_session("BURST")
+
+
+async def _bpm_race():
+    session = _session("BPM")
+    await asyncio.gather(*(
+        lyria_service.update_prompts("BPM", _prompts("groove"), 130, 0.5, 0.5) for _ in range(3)
+    ))
+    await lyria_service.update_prompts("BPM", _prompts("groove"), 130, 0.5, 0.5)
+    bpms = [v[0] for name, v in session.rpcs if name == "config"]
+    steps = [b - a for a, b in zip([100] + bpms, bpms)]
+    assert all(0 < s <= ls.LyriaService.MAX_BPM_DELTA for s in steps), f"❌ BPM steps raced: {bpms}"
+    assert lyria_service._sessions["BPM"]["bpm"] == bpms[-1]
+    print(f"  ✅ BPM ramps {[100] + bpms} with one reset_context per step")
+    await lyria_service.stop_session("BPM")
+
+
+async def _priority():
+    ls.LYRIA_PRIORITY_HOLD = 0.2
+    session = _session("DROP")
+    first = asyncio.create_task(lyria_service.update_prompts("DROP", _prompts("groove"), 100, 0.5, 0.5))
+    await asyncio.sleep(0)
+    applause = asyncio.create_task(lyria_service.update_prompts("DROP", _prompts("applause"), 100, 0.7, 0.7))
+    await asyncio.sleep(0)
+    drop = asyncio.create_task(lyria_service.update_prompts("DROP", _prompts("build"), 100, 0.9, 0.9, priority=PRIORITY_DROP))
+    await asyncio.sleep(0)
+    late = await lyria_service.update_prompts("DROP", _prompts("applause 2"), 100, 0.6, 0.6)
+    assert late is False, "❌ Applause replaced a pending drop update"
+    assert await first and await drop, "❌ Updates not applied"
+    assert await applause is False, "❌ Applause replaced by the drop reported as applied"
+    held = await lyria_service.update_prompts("DROP", _prompts("applause 3"), 100, 0.6, 0.6)
+    assert held is False, "❌ Applause overrode the drop inside the hold window"
+    await asyncio.sleep(0.25)
+    assert await lyria_service.update_prompts("DROP", _prompts("after"), 100, 0.6, 0.6), "❌ Hold never expired"
+    sent = [v for name, v in session.rpcs if name == "prompts"]
+    assert sent == [["groove"], ["build"], ["after"]], f"❌ Wrong order: {sent}"
+    print(f"  ✅ Drop outranks applause: sent {sent}; stats {lyria_service.get_stats()['commands']}")
+    await lyria_service.stop_session("DROP")
+
+
+async def _tick_then_applause():
+    # An arbitration update still queued when applause arrives: applause overlays on the
+    # queued prompts, and the tick learns its own update never went out
+    session = _session("CLAP")
+    in_flight = asyncio.create_task(lyria_service.update_prompts("CLAP", _prompts("old groove"), 100, 0.5, 0.5))
+    await asyncio.sleep(0)
+    tick = asyncio.create_task(lyria_service.update_prompts("CLAP", _prompts("arbitrated jazz"), 100, 0.5, 0.5))
+    await asyncio.sleep(0)
+    base = lyria_service.current_prompts("CLAP")
+    assert [p.text for p in base] == ["arbitrated jazz"], f"❌ Applause would overlay stale prompts: {base}"
+    overlay = [genai_types.WeightedPrompt(text="crowd energy", weight=0.9)]
+    applause = await lyria_service.update_prompts("CLAP", overlay + base[:1], 100, 0.7, 0.6)
+    assert await in_flight and applause and await tick is False, "❌ Superseded tick update reported as applied"
+    sent = [v for name, v in session.rpcs if name == "prompts"]
+    assert sent == [["old groove"], ["crowd energy", "arbitrated jazz"]], f"❌ Wrong prompts sent: {sent}"
+    print(f"  ✅ Applause after a queued tick update: tick gets False, applause carries its prompts {sent[-1]}")
+    await lyria_service.stop_session("CLAP")
+
+
+async def _stop_resolves_waiters():
+    _session("STOP")
+    first = asyncio.create_task(lyria_service.update_prompts("STOP", _prompts("a"), 100, 0.5, 0.5))
+    await asyncio.sleep(0)
+    pending = asyncio.create_task(lyria_service.update_prompts("STOP", _prompts("b"), 100, 0.5, 0.5))
+    await asyncio.sleep(0)
+    await lyria_service.stop_session("STOP")
+    assert await pending is False and await first is False, "❌ Queued updates not resolved on stop"
+    assert "STOP" not in lyria_service._commands
+    print("  ✅ Stopping a session resolves queued updates")
+
+
+class JazzModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, contents: str, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(text=json.dumps({
+            "prompts": [{"text": "arbitrated jazz", "weight": 1.0}],
+            "bpm": 100, "density": 0.5, "brightness": 0.5, "reasoning": "jazz",
+        }))
+
+
+async def _held_tick_retried():
+    # A tick result held back by the drop is not recorded as the room's state or as
+    # arbitrated text; the tick loop keeps the input and applies it after the hold
+    ls.LYRIA_PRIORITY_HOLD = 0.3
+    rs.TICK_DEBOUNCE, rs.TICK_MIN_INTERVAL = 0.05, 0.1
+    ws.TWO_PHASE_ARBITRATION = False
+    models = JazzModels()
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    gemini_service.cache = ArbitrationCache()
+    room = room_service.create_room(host_id="host")
+    rid = room.room_id
+    room.is_playing = True
+    session = _session(rid)
+    assert await lyria_service.update_prompts(rid, _prompts("build"), 100, 0.9, 0.9, priority=PRIORITY_DROP)
+    room_service.start_tick_loop(rid, ws._arbitration_tick)
+
+    room_service.update_input(rid, Role.GENRE_DJ, {"genre": "Jazz"})
+    while models.calls == 0:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    assert rid not in gemini_service._last_results, "❌ Held result recorded as the room's last result"
+    assert gemini_service._text_changed(rid, gemini_service._text_inputs(room.current_inputs)), "❌ Held input marked as arbitrated"
+    assert room.current_inputs and room.active_prompts[0].text != "arbitrated jazz", "❌ Held result applied to room state"
+
+    await asyncio.sleep(ls.LYRIA_PRIORITY_HOLD + 0.2)
+    sent = [v for name, v in session.rpcs if name == "prompts"]
+    assert sent[-1] == ["arbitrated jazz"] and room.active_prompts[0].text == "arbitrated jazz", f"❌ Held result never applied: {sent}"
+    assert not room.current_inputs and models.calls == 1, "❌ Retry did not reuse the cached result"
+    print(f"  ✅ Tick result held by a drop is retried after the hold: sent {sent}, {models.calls} Gemini call")
+    room_service.stop_tick_loop(rid)
+    await lyria_service.stop_session(rid)
+    room_service.destroy_room(rid)
+
+
+def test_lyria_commands():
+    print("Testing Lyria command actor...")
+    asyncio.run(_coalescing())
+    asyncio.run(_bpm_race())
+    asyncio.run(_priority())
+    asyncio.run(_tick_then_applause())
+    asyncio.run(_stop_resolves_waiters())
+    asyncio.run(_held_tick_retried())
+    print("\n✅ Lyria command actor OK\n")
+
+
+if __name__ == "__main__":
+    test_lyria_commands()
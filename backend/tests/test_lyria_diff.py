@@ -0,0 +1,85 @@
+"""
+Unit: Lyria parameter diff. Updates only send the calls whose parameters changed
+beyond the epsilon thresholds; prints RPCs for a run of idle ticks before and after.
+"""
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+from google.genai import types as genai_types
+
+from services.lyria_service import lyria_service, LYRIA_CONFIG_EPSILON, LYRIA_WEIGHT_EPSILON
+
+IDLE_TICKS = 10
+
+
+class RecordingSession:
+    def __init__(self):
+        self.rpcs = []
+
+    async def reset_context(self):
+        self.rpcs.append("reset_context")
+
+    async def set_music_generation_config(self, config):
+        self.rpcs.append("config")
+
+    async def set_weighted_prompts(self, prompts):
+        self.rpcs.append("prompts")
+
+
+def _prompts(*pairs):
+    return [genai_types.WeightedPrompt(text=text, weight=weight) for text, weight in pairs]
+
+
+async def _run():
+    session = RecordingSession()
+    lyria_service._sessions["DIFF"] = {"session": session, "ctx": None, "bpm": 100}
+    groove = _prompts(("warm lo-fi groove", 0.6), ("dusty vinyl crackle", 0.4))
+
+    await lyria_service.update_prompts("DIFF", groove, 100, 0.5, 0.5)
+    assert session.rpcs == ["config", "prompts"], f"❌ First update not sent in full: {session.rpcs}"
+
+    # Idle ticks: arbitrate returns the previous result unchanged
+    saved_before = lyria_service.rpcs_saved
+    session.rpcs.clear()
+    for _ in range(IDLE_TICKS):
+        await lyria_service.update_prompts("DIFF", groove, 100, 0.5, 0.5)
+    assert session.rpcs == [], f"❌ Idle ticks re-sent unchanged parameters: {session.rpcs}"
+    saved = lyria_service.rpcs_saved - saved_before
+    print(f"  ✅ {IDLE_TICKS} idle ticks → 0 RPCs (before: {IDLE_TICKS * 2}); {saved} saved")
+
+    # Changes within epsilon are absorbed, beyond it are sent — and only the changed call
+    nudged = _prompts(("warm lo-fi groove", 0.6 + LYRIA_WEIGHT_EPSILON / 2), ("dusty vinyl crackle", 0.4 - LYRIA_WEIGHT_EPSILON / 2))
+    await lyria_service.update_prompts("DIFF", nudged, 100, 0.5 + LYRIA_CONFIG_EPSILON / 2, 0.5)
+    assert session.rpcs == [], f"❌ Sub-epsilon change sent: {session.rpcs}"
+    await lyria_service.update_prompts("DIFF", groove, 100, 0.6, 0.5)
+    assert session.rpcs == ["config"], f"❌ Density change should send only the config: {session.rpcs}"
+    session.rpcs.clear()
+    await lyria_service.update_prompts("DIFF", _prompts(("warm lo-fi groove", 0.7), ("dusty vinyl crackle", 0.3)), 100, 0.6, 0.5)
+    await lyria_service.update_prompts("DIFF", _prompts(("warm lo-fi groove", 0.7), ("a rich cello layer", 0.3)), 100, 0.6, 0.5)
+    assert session.rpcs == ["prompts", "prompts"], f"❌ Prompt changes should send only prompts: {session.rpcs}"
+    session.rpcs.clear()
+    await lyria_service.update_prompts("DIFF", _prompts(("warm lo-fi groove", 0.7), ("a rich cello layer", 0.3)), 110, 0.6, 0.5)
+    assert session.rpcs == ["reset_context", "config"], f"❌ BPM change not sent: {session.rpcs}"
+
+    # Small drifts accumulate against what was last sent, so they are not lost
+    session.rpcs.clear()
+    density = 0.6
+    for _ in range(5):
+        density += LYRIA_CONFIG_EPSILON * 0.6
+        await lyria_service.update_prompts("DIFF", _prompts(("warm lo-fi groove", 0.7), ("a rich cello layer", 0.3)), 110, density, 0.5)
+    assert session.rpcs.count("config") >= 1, "❌ Accumulated drift never sent"
+    print(f"  ✅ Only changed calls sent; sub-epsilon drift absorbed until it adds up; stats {lyria_service.get_stats()['commands']}")
+    lyria_service._sessions.pop("DIFF")
+
+
+def test_lyria_diff():
+    print("Testing Lyria parameter diff...")
+    asyncio.run(_run())
+    print("\n✅ Lyria parameter diff OK\n")
+
+
+if __name__ == "__main__":
+    test_lyria_diff()
@@ -0,0 +1,168 @@
+"""
+Unit: gapless Lyria failover. A stream that drops or stalls is replaced by a session
+primed with the room's prompts and config; the replacement is faded or crossfaded in
+(over the full crossfade window when listeners have audio queued) and the old session
+closed. Prints listener-side silence per recovery, against the
+old restart path (2 s sleep, then a full reconnect).
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("FAKE_BACKENDS", "all")  # module singletons need no API key
+
+from google.genai import types as genai_types
+
+import numpy as np
+
+import services.lyria_service as ls
+from services.audio_buffer import BYTES_PER_SECOND
+from services.audio_crossfade import LYRIA_CROSSFADE_MS, crossfade
+from services.fake_backends import FakeLyriaClient
+from services.lyria_pool import LyriaSessionPool
+from services.lyria_service import LyriaService
+from services.room_service import room_service
+
+CHUNK = 0.1
+CONNECT = 0.15
+OLD_RESTART_WAIT = 2.0  # first _attempt_restart sleep before this change
+
+
+class Listener:
+    """Plays broadcast audio in real time and adds up how long it ran dry."""
+
+    def __init__(self):
+        self.until = None
+        self.silences = []
+
+    async def __call__(self, room_id, data):
+        now = time.monotonic()
+        if self.until is not None and now > self.until:
+            self.silences.append(now - self.until)
+        self.until = max(self.until or now, now) + len(data) / BYTES_PER_SECOND
+
+
+def _service(connect=CONNECT):
+    client = FakeLyriaClient(chunk_seconds=CHUNK, jitter=0.01, connect_latency=connect, rpc_latency=0.01, seed=7)
+    service = LyriaService(client=client)
+    service.pool = LyriaSessionPool(service._open_session, max_size=0)
+    listener = Listener()
+    service.broadcast_callback = listener
+    room = room_service.create_room(host_id="host")
+    room.is_playing = True
+    return service, client, listener, room.room_id
+
+
+async def _settle(service, room_id, seconds=2.0):
+    deadline = time.monotonic() + seconds
+    while (room_id in service._handoffs or service.failovers_started == 0) and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    await asyncio.sleep(4 * CHUNK)
+
+
+async def _stream_error():
+    service, client, listener, room_id = _service()
+    await service.start_session(room_id, initial_bpm=120)
+    await asyncio.sleep(0.5)
+    prompts = [genai_types.WeightedPrompt(text="deep house groove", weight=1.0)]
+    await service.update_prompts(room_id, prompts, 120, 0.7, 0.3)
+    old = service._sessions[room_id]["session"]
+    old.inject_failure()
+    await _settle(service, room_id)
+
+    new = service._sessions[room_id]["session"]
+    assert new is not old, "❌ Session not replaced"
+    assert [p.text for p in new.prompts] == ["deep house groove"], f"❌ Replacement not primed with prompts: {new.prompts}"
+    assert (new.bpm, new.density, new.brightness) == (120, 0.7, 0.3), "❌ Replacement not primed with config"
+    assert new.chunks_sent > 0 and client.closes >= 1, "❌ Replacement not streaming / old session not closed"
+    stats = service.get_stats()["failover"]
+    assert stats["completed"] == 1 and stats["crossfaded"] == 0
+    heard = sum(listener.silences) * 1000
+    before = (OLD_RESTART_WAIT + CONNECT) * 1000
+    assert heard < 500, f"❌ {heard:.0f} ms of silence"
+    print(f"  ✅ Stream error: {heard:.0f} ms silence heard (service measured {stats['silence_ms']['last']:.0f} ms); old restart path ≥ {before:.0f} ms")
+    await service.stop_session(room_id)
+
+
+async def _stall_recovers():
+    # The replacement connects while the old stream is late; the old one recovers, so
+    # both overlap and the switch is a crossfade
+    ls.LYRIA_STALL_GRACE = 0.1
+    service, client, listener, room_id = _service(connect=0.3)
+    await service.start_session(room_id)
+    await asyncio.sleep(0.5)
+    old = service._sessions[room_id]["session"]
+    old.inject_stall(0.3)
+    await _settle(service, room_id)
+
+    stats = service.get_stats()["failover"]
+    assert stats["completed"] == 1 and stats["crossfaded"] == 1, f"❌ Expected a crossfaded handoff: {stats}"
+    assert service._sessions[room_id]["session"] is not old
+    assert len(service._background) == 0 and client.closes >= 1, "❌ Old session not closed"
+    # Listeners ran dry during the stall, so the switch does not wait for more old audio
+    assert 0 < stats["last_crossfade_ms"] <= CHUNK * 1000, f"❌ Unexpected blend: {stats}"
+    print(f"  ✅ Stall: old stream recovered during the handoff, crossfaded over {stats['last_crossfade_ms']:.0f} ms; "
+          f"{sum(listener.silences) * 1000:.0f} ms silence (the stall itself)")
+    await service.stop_session(room_id)
+
+
+async def _warm_pool():
+    service, client, listener, room_id = _service(connect=0.5)
+    service.pool = LyriaSessionPool(service._open_session, min_size=1, max_size=1)
+    service.note_room_created()
+    await service.start_session(room_id)  # cold: the pool is still connecting
+    await asyncio.sleep(0.8)
+    service._sessions[room_id]["session"].inject_failure()
+    await _settle(service, room_id)
+    heard = sum(listener.silences) * 1000
+    assert service.pool.hits == 1 and heard < 250, f"❌ Warm failover: hits {service.pool.hits}, {heard:.0f} ms"
+    print(f"  ✅ Warm pooled replacement: {heard:.0f} ms silence with a 500 ms connect")
+    await service.stop_session(room_id)
+
+
+async def _crossfade_window():
+    # crossfade() blends over at most the shorter input ...
+    old, new = np.full(20, 1000, np.int16).tobytes(), np.full(200, -1000, np.int16).tobytes()
+    mixed = np.frombuffer(crossfade(old, new, 50), np.int16)
+    assert len(mixed) == 200 and (mixed[:20] != -1000).any() and (mixed[20:] == -1000).all(), "❌ Blend ran past the old audio"
+    # ... so with listeners buffered, the handoff collects a full window of the old
+    # stream (several CHUNK-sized chunks) before switching
+    service, client, listener, room_id = _service(connect=0.05)
+    await service.start_session(room_id)
+    await asyncio.sleep(0.3)
+    service._start_failover(room_id, old_alive=True, reason="test")
+    service._audio_until[room_id] = time.monotonic() + 1.0  # a second of audio queued
+    await _settle(service, room_id)
+    stats = service.get_stats()["failover"]
+    assert stats["crossfaded"] == 1 and stats["last_crossfade_ms"] == LYRIA_CROSSFADE_MS, f"❌ Blend cut short: {stats}"
+    print(f"  ✅ Buffered listeners: {stats['last_crossfade_ms']:.0f} ms crossfade from {CHUNK * 1000:.0f} ms chunks")
+    await service.stop_session(room_id)
+
+
+async def _stop_mid_failover():
+    service, client, listener, room_id = _service(connect=0.3)
+    await service.start_session(room_id)
+    await asyncio.sleep(0.3)
+    service._sessions[room_id]["session"].inject_failure()
+    await asyncio.sleep(CHUNK + 0.1)
+    assert room_id in service._handoffs, "❌ Failover not started"
+    await service.stop_session(room_id)
+    await asyncio.sleep(0.5)
+    assert room_id not in service._handoffs and room_id not in service._sessions
+    assert client.connects == client.closes, f"❌ Leaked sessions: {client.connects} opened, {client.closes} closed"
+    print("  ✅ Stopping mid-failover closes the replacement")
+
+
+def test_lyria_failover():
+    print("Testing Lyria failover...")
+    asyncio.run(_stream_error())
+    asyncio.run(_stall_recovers())
+    asyncio.run(_warm_pool())
+    asyncio.run(_crossfade_window())
+    asyncio.run(_stop_mid_failover())
+    print("\n✅ Lyria failover OK\n")
+
+
+if __name__ == "__main__":
+    test_lyria_failover()
@@ -0,0 +1,159 @@
+"""
+Unit: pre-warmed Lyria session pool. start_session takes a connected session from the
+pool instead of paying the connect handshake; the pool follows the room-creation
+rate, recycles sessions nearing the idle limit and falls back to a cold connect.
+Prints time-to-play for warm vs cold starts.
+"""
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+import services.lyria_pool as lp
+from services.lyria_pool import LyriaSessionPool
+from services.lyria_service import lyria_service
+
+CONNECT_LATENCY = 0.3
+RPC_LATENCY = 0.01
+
+
+class FakeSession:
+    def __init__(self):
+        self.playing = False
+        self.closed = False
+        self.broken = False
+
+    async def set_weighted_prompts(self, prompts):
+        await asyncio.sleep(RPC_LATENCY)
+
+    async def set_music_generation_config(self, config):
+        if self.broken:
+            raise ConnectionError("socket closed")
+        await asyncio.sleep(RPC_LATENCY)
+
+    async def play(self):
+        await asyncio.sleep(RPC_LATENCY)
+        self.playing = True
+
+    async def stop(self):
+        self.playing = False
+
+    async def receive(self):
+        while True:
+            await asyncio.sleep(3600)
+            yield None
+
+
+class FakeConnect:
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        await asyncio.sleep(CONNECT_LATENCY)
+        self.client.connects += 1
+        self.session = FakeSession()
+        return self.session
+
+    async def __aexit__(self, *exc):
+        self.session.closed = True
+        self.client.closes += 1
+
+
+class FakeClient:
+    def __init__(self):
+        self.connects = 0
+        self.closes = 0
+        music = type("Music", (), {"connect": lambda _, model: FakeConnect(self)})()
+        self.aio = type("Aio", (), {"live": type("Live", (), {"music": music})()})()
+
+
+async def _warm_vs_cold():
+    client = FakeClient()
+    lyria_service.client = client
+    lyria_service.pool = LyriaSessionPool(lyria_service._open_session, min_size=0, max_size=2)
+    lyria_service._start_ms.clear()
+
+    # No rooms created yet → empty pool, cold start
+    await lyria_service.start_session("COLD")
+    assert lyria_service.pool.misses == 1 and "cold" in lyria_service._start_ms
+
+    # A room is created → the pool warms a session while the host is still in the lobby
+    lyria_service.note_room_created()
+    await asyncio.sleep(CONNECT_LATENCY + 0.1)
+    assert lyria_service.pool.size == 1, f"❌ Pool not warmed: {lyria_service.pool.stats()}"
+    await lyria_service.start_session("WARM")
+    assert lyria_service._sessions["WARM"]["session"].playing, "❌ Warm session not playing"
+
+    start_ms = lyria_service.get_stats()["start_ms"]
+    assert start_ms["warm"] < start_ms["cold"] / 4, f"❌ Warm start not faster: {start_ms}"
+    print(f"  ✅ Time to play: cold {start_ms['cold']:.0f} ms → warm {start_ms['warm']:.0f} ms")
+
+    # A pooled session that died while idle falls back to a cold connect
+    await asyncio.sleep(CONNECT_LATENCY + 0.1)
+    assert lyria_service.pool.size == 1, "❌ Pool not refilled after a hit"
+    lyria_service.pool._idle[0][1].broken = True
+    await lyria_service.start_session("STALE")
+    assert lyria_service._sessions["STALE"]["session"].playing, "❌ Fallback after a dead pooled session failed"
+    assert lyria_service.pool.failures == 1
+    print(f"  ✅ Dead pooled session discarded, cold connect used; pool {lyria_service.pool.stats()}")
+
+    for room_id in ("COLD", "WARM", "STALE"):
+        await lyria_service.stop_session(room_id)
+
+
+async def _sizing_and_recycling():
+    opened = []
+
+    async def open_session():
+        ctx = FakeConnect(FakeClient())
+        session = await ctx.__aenter__()
+        opened.append(session)
+        return session, ctx
+
+    global CONNECT_LATENCY
+    CONNECT_LATENCY = 0.01
+    lp.LYRIA_POOL_RATE_WINDOW = 60.0
+    lp.LYRIA_POOL_HORIZON = 10.0
+    pool = LyriaSessionPool(open_session, min_size=0, max_size=3, idle_ttl=30.0)
+    assert pool.target_size() == 0
+    for _ in range(12):  # 12 rooms/min, 10 s horizon → 2 warm sessions
+        pool.note_room_created()
+    await asyncio.sleep(0.1)
+    assert pool.target_size() == 2 and pool.size == 2, f"❌ Pool not sized from rate: {pool.stats()}"
+    for _ in range(30):
+        pool.note_room_created()
+    await asyncio.sleep(0.1)
+    assert pool.size == 3, "❌ Pool exceeded max_size"
+
+    # Sessions close to the idle limit are replaced with fresh ones
+    pool._idle[0] = (pool._idle[0][0] - 29.0, *pool._idle[0][1:])
+    first = pool._idle[0][1]
+    pool._maintain()
+    await asyncio.sleep(0.1)
+    assert first.closed and pool.size == 3 and pool.recycled == 1, f"❌ Stale session not recycled: {pool.stats()}"
+
+    # An expired session is never handed out
+    pool._idle[0] = (pool._idle[0][0] - 31.0, *pool._idle[0][1:])
+    expired = pool._idle[0][1]
+    session, _ = pool.acquire()
+    await asyncio.sleep(0.01)
+    assert session is not expired and expired.closed, "❌ Expired session handed out"
+
+    # Demand gone → shrink
+    pool._created.clear()
+    pool._maintain()
+    await asyncio.sleep(0.05)
+    assert pool.size == 0 and pool._maintenance is None, f"❌ Pool did not shrink: {pool.stats()}"
+    print(f"  ✅ Sized from creation rate (cap 3), recycles near the idle TTL, shrinks with demand: {pool.stats()}")
+
+
+def test_lyria_pool():
+    print("Testing Lyria session pool...")
+    asyncio.run(_warm_vs_cold())
+    asyncio.run(_sizing_and_recycling())
+    print("\n✅ Lyria session pool OK\n")
+
+
+if __name__ == "__main__":
+    test_lyria_pool()
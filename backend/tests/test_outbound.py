@@ -0,0 +1,77 @@
+"""Unit: a stalled client must not slow down audio broadcast to the rest of the room."""
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.room_service import RoomService
+
+
+class FakeSocket:
+    """Stands in for a WebSocket; `delay` simulates a client on a bad connection."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+        self.closed_with = None
+
+    async def send_bytes(self, data: bytes):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.delay)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def _time_broadcast(rs: RoomService, room_id: str, chunks: int) -> float:
+    """Total time spent inside broadcast_bytes, with chunks paced like a live stream."""
+    spent = 0.0
+    for _ in range(chunks):
+        start = time.perf_counter()
+        await rs.broadcast_bytes(room_id, b"\x00" * 3840)
+        spent += time.perf_counter() - start
+        await asyncio.sleep(0.002)
+    return spent
+
+
+async def _run():
+    rs = RoomService()
+    fast_room = rs.create_room(host_id="host-a").room_id
+    slow_room = rs.create_room(host_id="host-b").room_id
+    fast = [FakeSocket() for _ in range(10)]
+    mixed = [FakeSocket() for _ in range(9)] + [FakeSocket(delay=10.0)]
+    rs.connections[fast_room].update(fast)
+    rs.connections[slow_room].update(mixed)
+
+    chunks = 200
+    t_fast = await _time_broadcast(rs, fast_room, chunks)
+    t_mixed = await _time_broadcast(rs, slow_room, chunks)
+    await asyncio.sleep(0.1)  # let writer tasks drain
+
+    print(f"  all fast clients:       {t_fast * 1000:.2f} ms for {chunks} chunks")
+    print(f"  with one stalled client: {t_mixed * 1000:.2f} ms for {chunks} chunks")
+    assert t_mixed < t_fast * 3 + 0.01, "❌ Broadcast waited on the stalled client"
+    assert all(ws.received == chunks for ws in mixed[:9]), "❌ Healthy clients missed audio"
+
+    stalled = mixed[-1]
+    assert stalled.closed_with is not None, "❌ Stalled client was never disconnected"
+    await rs.broadcast_bytes(slow_room, b"\x00")
+    assert stalled not in rs.connections[slow_room], "❌ Stalled client still in room"
+    print(f"  ✅ Stalled client disconnected (code {stalled.closed_with}), healthy clients unaffected")
+
+    for ws in fast + mixed:
+        rs.close_outbound(ws)
+
+
+def test_outbound():
+    print("Testing per-client outbound queues...")
+    asyncio.run(_run())
+    print("\n✅ Outbound queues OK\n")
+
+
+if __name__ == "__main__":
+    test_outbound()
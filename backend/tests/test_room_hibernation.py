@@ -0,0 +1,162 @@
+"""
+Unit: idle-room hibernation. A playing room whose last socket left (and with no HTTP
+segment consumers) stops its tick loop and releases its Lyria session after
+ROOM_HIBERNATE_GRACE, keeping is_playing and the musical state; the first socket or
+manifest request back resumes generation from that state. Prints the audio generated
+per second while empty, before and after hibernation.
+"""
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("FAKE_BACKENDS", "all")  # module singletons need no API key
+
+from fastapi import Response
+from google.genai import types as genai_types
+
+import services.room_service as rs
+from models.schemas import WeightedPrompt
+from routers import audio, ws
+from services.audio_buffer import BYTES_PER_SECOND
+from services.fake_backends import FakeLyriaClient
+from services.lyria_pool import LyriaSessionPool
+from services.lyria_service import lyria_service
+from services.room_service import room_service
+
+GRACE = 0.3
+SOCKET = object()  # stands in for a WebSocket; only set membership matters here
+
+
+class Meter:
+    def __init__(self):
+        self.bytes = 0
+
+    async def __call__(self, room_id, data):
+        self.bytes += len(data)
+
+
+async def _audio_rate(meter, seconds=0.5):
+    before = meter.bytes
+    await asyncio.sleep(seconds)
+    return (meter.bytes - before) / BYTES_PER_SECOND / seconds
+
+
+async def _playing_room():
+    rs.ROOM_HIBERNATE_GRACE = GRACE
+    client = FakeLyriaClient(chunk_seconds=0.1, jitter=0.0, connect_latency=0.05, rpc_latency=0.01, seed=5)
+    lyria_service.client = client
+    lyria_service.pool = LyriaSessionPool(lyria_service._open_session, max_size=0)
+    meter = Meter()
+    lyria_service.broadcast_callback = meter
+
+    room = room_service.create_room(host_id="host")
+    rid = room.room_id
+    room_service.connections[rid].add(SOCKET)
+    room.is_playing = True
+    await lyria_service.start_session(rid, initial_bpm=room.bpm)
+    room_service.start_tick_loop(rid, ws._arbitration_tick)
+    # Where the crowd had taken the music before everyone left
+    room.bpm, room.density, room.brightness = 124, 0.8, 0.35
+    room.active_prompts = [WeightedPrompt(text="deep house groove", weight=1.0), WeightedPrompt(text="warm pads", weight=0.4)]
+    await lyria_service.update_prompts(rid, [genai_types.WeightedPrompt(text=p.text, weight=p.weight) for p in room.active_prompts], room.bpm, room.density, room.brightness)
+    return client, meter, room, rid
+
+
+def _leave(rid):
+    room_service.connections[rid].discard(SOCKET)
+    ws._left_room(rid)
+
+
+async def _hibernate_and_resume():
+    client, meter, room, rid = await _playing_room()
+    _leave(rid)
+    empty_rate = await _audio_rate(meter, GRACE - 0.1)
+    assert not room_service.is_hibernating(rid), "❌ Hibernated before the grace period"
+    await asyncio.sleep(0.3)
+
+    assert room_service.is_hibernating(rid) and room.is_playing, "❌ Room did not hibernate"
+    assert rid not in lyria_service._sessions and client.connects == client.closes, "❌ Lyria session not released"
+    assert rid not in room_service._tickers, "❌ Tick loop still running"
+    hibernating_rate = await _audio_rate(meter)
+    assert hibernating_rate == 0.0
+    assert room_service.get_stats()["hibernating"] == 1
+    print(f"  ✅ Empty room: {empty_rate:.1f} s/s of audio generated during the grace period → {hibernating_rate:.1f} once hibernated; "
+          f"Lyria sessions open {client.connects - client.closes}, ticker stopped")
+
+    room_service.connections[rid].add(SOCKET)
+    await ws._wake_room(rid)
+    session = lyria_service._sessions[rid]["session"]
+    assert [p.text for p in session.prompts] == ["deep house groove", "warm pads"], f"❌ Resumed from the wrong prompts: {session.prompts}"
+    assert (session.bpm, session.density, session.brightness) == (124, 0.8, 0.35), "❌ Resumed with the wrong config"
+    assert not room_service.is_hibernating(rid) and rid in room_service._tickers, "❌ Tick loop not restarted"
+    assert await _audio_rate(meter) > 0.5, "❌ No audio after resuming"
+    print("  ✅ First socket back resumes from the preserved prompts, bpm, density and brightness")
+
+    await lyria_service.stop_session(rid)
+    room_service.destroy_room(rid)
+
+
+async def _return_within_grace():
+    client, meter, room, rid = await _playing_room()
+    _leave(rid)
+    await asyncio.sleep(GRACE / 2)
+    room_service.connections[rid].add(SOCKET)
+    await ws._wake_room(rid)
+    await asyncio.sleep(GRACE)
+    assert not room_service.is_hibernating(rid) and client.connects == 1 and rid in lyria_service._sessions, "❌ Brief disconnect hibernated the room"
+    print("  ✅ A socket back within the grace period keeps the session running")
+
+    # Stopped rooms never hibernate
+    room_service.stop_tick_loop(rid)
+    await lyria_service.stop_session(rid)
+    room.is_playing = False
+    _leave(rid)
+    await asyncio.sleep(GRACE + 0.1)
+    assert not room_service.is_hibernating(rid)
+    room_service.destroy_room(rid)
+
+
+async def _socket_mid_hibernate():
+    # A socket arriving while the session is being released waits, then restarts it
+    client, meter, room, rid = await _playing_room()
+    _leave(rid)
+    while not room_service.is_hibernating(rid):
+        await asyncio.sleep(0.01)
+    room_service.connections[rid].add(SOCKET)
+    await ws._wake_room(rid)
+    assert rid in lyria_service._sessions and rid in room_service._tickers and not room_service.is_hibernating(rid), "❌ Room left stopped"
+    print("  ✅ Socket arriving mid-hibernate resumes the room once the old session is gone")
+    room_service.stop_tick_loop(rid)
+    await lyria_service.stop_session(rid)
+    room_service.destroy_room(rid)
+
+
+async def _http_audience():
+    # Segment consumers polling the manifest keep an empty room awake, and wake it again
+    client, meter, room, rid = await _playing_room()
+    _leave(rid)
+    for _ in range(int(GRACE * 2 / 0.1)):
+        await audio.audio_manifest(rid, Response())
+        await asyncio.sleep(0.1)
+    assert not room_service.is_hibernating(rid) and rid in lyria_service._sessions, "❌ Hibernated with an HTTP audience"
+    await asyncio.sleep(GRACE + 0.2)
+    assert room_service.is_hibernating(rid), "❌ Did not hibernate once HTTP polling stopped"
+    manifest = await audio.audio_manifest(rid, Response())
+    assert not room_service.is_hibernating(rid) and rid in lyria_service._sessions and manifest["is_playing"], "❌ Manifest did not wake the room"
+    print("  ✅ HTTP manifest/segment consumers count as audience, and a manifest request wakes the room")
+    room_service.stop_tick_loop(rid)
+    await lyria_service.stop_session(rid)
+    room_service.destroy_room(rid)
+
+
+def test_room_hibernation():
+    print("Testing idle-room hibernation...")
+    asyncio.run(_hibernate_and_resume())
+    asyncio.run(_return_within_grace())
+    asyncio.run(_socket_mid_hibernate())
+    asyncio.run(_http_audience())
+    print("\n✅ Room hibernation OK\n")
+
+
+if __name__ == "__main__":
+    test_room_hibernation()
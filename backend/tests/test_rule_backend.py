@@ -0,0 +1,102 @@
+"""Unit: the offline rule-based arbitration backend, as a room's primary engine and as the Gemini fallback."""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # client is never used for real
+
+from services.arbitration_backends import ArbitrationBackend, RuleBasedBackend, CARRY_WEIGHT
+from services.gemini_service import gemini_service, DEFAULT_RESULT
+
+RUNS = 10000
+
+
+class FailingModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError("network down")
+
+
+def _unit():
+    engine = RuleBasedBackend()
+    first = engine.compose("R", {"genre_dj": {"genre": "Trap"}, "vibe_setter": {"mood": "Dark Dreamy"}}, 100, 0.5, 0.5, DEFAULT_RESULT)
+    again = RuleBasedBackend().compose("R", {"genre_dj": {"genre": "Trap"}, "vibe_setter": {"mood": "Dark Dreamy"}}, 100, 0.5, 0.5, DEFAULT_RESULT)
+    assert first == again, "❌ Rule engine is not deterministic"
+    main = first.prompts[0].text
+    assert "trap" in main and "brooding" in main and "hazy" in main, f"❌ Vocabulary not applied: {main}"
+    assert first.prompts[1].text == DEFAULT_RESULT.prompts[0].text and first.prompts[1].weight == CARRY_WEIGHT, "❌ Previous prompt not carried over"
+    print(f"  ✅ Composed: {[(p.text, p.weight) for p in first.prompts]}")
+
+    second = engine.compose("R", {"instrumentalist": {"instrument": "Piano and Cello"}, "drummer": {"bpm": 128}}, 100, 0.8, 0.2, first)
+    assert "trap" in second.prompts[0].text and "cello" in second.prompts[0].text, "❌ Scene did not keep the genre while adding instruments"
+    assert second.prompts[1].text == main, "❌ Adding an instrument hard-cut the previous prompt"
+    assert second.bpm == 128, "❌ Drummer BPM not honoured"
+    assert "dense" in second.prompts[0].text and "muffled" in second.prompts[0].text, "❌ Energy texture missing"
+
+    third = engine.compose("R", {"vibe_setter": {"custom_prompt": "add rain sounds"}}, 128, 0.8, 0.2, second)
+    assert len(third.prompts) <= 3 and third.prompts[-1].text == "add rain sounds", "❌ custom_prompt not woven in"
+    for result in (first, second, third):
+        assert abs(sum(p.weight for p in result.prompts) - 1.0) < 1e-9, "❌ Weights do not sum to 1"
+    print("  ✅ Continuity: genre kept, previous prompt carried, custom prompt woven in, weights sum to 1")
+
+    # Payloads come straight from clients: non-string values are read as text, bad ones skipped
+    odd = RuleBasedBackend().compose("ODD", {
+        "genre_dj": {"genre": 808}, "vibe_setter": {"mood": ["Dark"], "custom_prompt": 42},
+        "instrumentalist": ["Piano"], "drummer": {"bpm": "fast"},
+    }, 100, 0.5, 0.5, None)
+    assert odd.prompts[0].text == "dark, brooding 808 track" and odd.prompts[-1].text == "42" and odd.bpm == 100, f"❌ Non-string payload: {odd}"
+    print(f"  ✅ Non-string payloads handled: {[p.text for p in odd.prompts]}")
+
+    inputs = {"genre_dj": {"genre": "House"}, "instrumentalist": {"instrument": "Synth Pads"}}
+    start = time.perf_counter()
+    for i in range(RUNS):
+        engine.compose("BENCH", inputs, 100, 0.5, 0.5, first)
+    per_call_us = (time.perf_counter() - start) / RUNS * 1e6
+    assert per_call_us < 100, f"❌ Rule engine too slow: {per_call_us:.1f} µs"
+    print(f"  ✅ {per_call_us:.1f} µs per arbitration, no network")
+
+    class Incomplete(ArbitrationBackend):
+        name = "incomplete"
+
+    try:
+        Incomplete()
+        raise AssertionError("❌ Backend without arbitrate() was instantiated")
+    except TypeError:
+        print("  ✅ A backend without arbitrate() fails at construction, not mid-tick")
+
+
+async def _run():
+    models = FailingModels()
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+
+    assert not gemini_service.set_room_backend("RULES", "oracle"), "❌ Unknown backend accepted"
+    assert gemini_service.set_room_backend("RULES", "rules")
+    result = await gemini_service.arbitrate("RULES", {"genre_dj": {"genre": "Jazz"}}, 100, 0.5, 0.5)
+    assert models.calls == 0 and "jazz" in result.prompts[0].text, "❌ Rules-primary room called Gemini"
+    print("  ✅ Rules as primary: no Gemini call")
+
+    gemini_service.set_room_backend("FALLBACK", fallback="rules")
+    result = await gemini_service.arbitrate("FALLBACK", {"genre_dj": {"genre": "Funk"}}, 100, 0.5, 0.5)
+    assert models.calls >= 1 and "funk" in result.prompts[0].text, "❌ Rules fallback not used when Gemini failed"
+    result = await gemini_service.arbitrate("PLAIN", {"genre_dj": {"genre": "Funk"}}, 100, 0.5, 0.5)
+    assert result is DEFAULT_RESULT, "❌ Default fallback changed"
+    print(f"  ✅ Rules as fallback when Gemini fails; other rooms keep the previous result ({gemini_service.get_stats()['backend_calls']})")
+
+    gemini_service.forget_room("RULES")
+    assert "RULES" not in gemini_service._room_backends
+
+
+def test_rule_backend():
+    print("Testing rule-based arbitration backend...")
+    _unit()
+    asyncio.run(_run())
+    print("\n✅ Rule-based backend OK\n")
+
+
+if __name__ == "__main__":
+    test_rule_backend()
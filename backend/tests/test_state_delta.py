@@ -0,0 +1,89 @@
+"""Unit: versioned state_delta protocol for opted-in clients, full state_update for everyone else."""
+import asyncio
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.room_service import RoomService
+from models.schemas import Role
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def send_text(self, text: str):
+        self.messages.append(json.loads(text))
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+
+async def _flush():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _run():
+    rs = RoomService()
+    room_id = rs.create_room(host_id="host").room_id
+    legacy, delta = RecordingSocket(), RecordingSocket()
+    rs.join_room(room_id, "host", legacy)
+    rs.enable_state_deltas(delta)
+    rs.join_room(room_id, "guest", delta)
+
+    # Join → everyone gets a full snapshot
+    await rs.broadcast_state(room_id)
+    await _flush()
+    first = delta.messages[-1]
+    assert first["type"] == "state_update" and "version" in first, f"❌ Expected full snapshot, got {first}"
+    print(f"  ✅ Join: full snapshot at version {first['version']}")
+
+    # Only bpm changes → delta client gets just that key
+    rs.update_after_arbitration(room_id, rs.rooms[room_id].active_prompts, 120, 0.5, 0.5)
+    await rs.broadcast_state(room_id)
+    await _flush()
+    d = delta.messages[-1]
+    assert d["type"] == "state_delta", f"❌ Expected state_delta, got {d['type']}"
+    assert d["version"] == first["version"] + 1, "❌ Version not monotonic"
+    assert d["changes"] == {"bpm": 120}, f"❌ Unexpected changes {d['changes']}"
+    assert legacy.messages[-1]["type"] == "state_update", "❌ Legacy client should keep full messages"
+    print(f"  ✅ BPM change: delta {d['changes']} (v{d['version']}), legacy client got full state_update")
+
+    # Input → changed keys plus appended timeline entry
+    rs.update_input(room_id, Role.GENRE_DJ, {"genre": "jazz"})
+    await rs.broadcast_state(room_id)
+    await _flush()
+    d2 = delta.messages[-1]
+    assert "current_inputs" in d2["changes"], "❌ current_inputs missing from delta"
+    assert len(d2["timeline_append"]) == 1, f"❌ Expected one appended timeline entry, got {d2['timeline_append']}"
+    print(f"  ✅ Input: delta keys {sorted(d2['changes'])}, {len(d2['timeline_append'])} timeline entry appended")
+
+    # Nothing changed → delta client gets nothing, legacy still gets the full snapshot
+    before = len(delta.messages), len(legacy.messages)
+    await rs.broadcast_state(room_id)
+    await _flush()
+    assert len(delta.messages) == before[0], "❌ Delta client got a message for an unchanged state"
+    assert len(legacy.messages) == before[1] + 1, "❌ Legacy client lost its full state_update"
+    print("  ✅ Unchanged state: no delta sent")
+
+    # Resync → full snapshot at the current version
+    rs.send_state(room_id, delta)
+    await _flush()
+    assert delta.messages[-1]["type"] == "state_update", "❌ Resync did not send a full snapshot"
+    assert delta.messages[-1]["version"] == d2["version"], "❌ Resync version mismatch"
+    print("  ✅ Resync: full snapshot at current version")
+
+    rs.close_outbound(legacy)
+    rs.close_outbound(delta)
+
+
+def test_state_delta():
+    print("Testing versioned state_delta protocol...")
+    asyncio.run(_run())
+    print("\n✅ State deltas OK\n")
+
+
+if __name__ == "__main__":
+    test_state_delta()
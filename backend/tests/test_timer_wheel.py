@@ -0,0 +1,81 @@
+"""
+Unit: the hierarchical timer wheel — exact firing across all levels, periodic
+timers, O(1) cancellation, per-room group cancellation and jitter.
+"""
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.timer_wheel import LEVELS, SLOT_BITS, TimerWheel
+
+
+async def _levels():
+    wheel = TimerWheel(resolution=0.01)
+    fired = {}
+    # One timer per level: 1 slot, 100 slots, 5000 slots, 300000 slots ahead
+    delays = {"level0": 1, "level1": 100, "level2": 5000, "level3": 300_000}
+    timers = {name: wheel.call_later(ticks * 0.01, lambda n=name: fired.setdefault(n, wheel._tick)) for name, ticks in delays.items()}
+    wheel._driver.cancel()  # drive by hand: no need to wait 50 minutes
+    deadlines = {name: t.deadline for name, t in timers.items()}
+    while wheel.armed:
+        wheel._advance()
+    assert fired == deadlines, f"❌ Timers fired off their slot: {fired} vs {deadlines}"
+    assert 300_000 >= 1 << (SLOT_BITS * (LEVELS - 1)), "❌ Level-3 case does not reach the top level"
+    print(f"  ✅ Exact firing on all {LEVELS} levels (up to {delays['level3']} slots ahead)")
+
+
+async def _timing_and_cancel():
+    wheel = TimerWheel(resolution=0.01)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    fired = []
+    wheel.call_later(0.1, lambda: fired.append(("once", loop.time() - start)))
+    periodic = wheel.every(0.05, lambda: fired.append(("every", loop.time() - start)))
+    cancelled = wheel.call_later(0.05, lambda: fired.append(("cancelled", 0)))
+    cancelled.cancel()
+
+    async def coro():
+        fired.append(("async", loop.time() - start))
+    wheel.call_later(0.02, coro)
+
+    await asyncio.sleep(0.23)
+    periodic.cancel()
+    await asyncio.sleep(0.1)
+    names = [n for n, _ in fired]
+    assert "cancelled" not in names, "❌ Cancelled timer fired"
+    assert names.count("every") == 4, f"❌ Periodic timer fired {names.count('every')} times"
+    assert "async" in names, "❌ Async callback not run"
+    once = next(t for n, t in fired if n == "once")
+    assert 0.1 <= once < 0.13, f"❌ One-shot fired at {once:.3f}s"
+    assert wheel.armed == 0 and wheel._driver.done(), "❌ Driver still running with no timers"
+    print(f"  ✅ One-shot at {once * 1000:.0f} ms (never early), periodic ×4, async callback, cancel; driver stops when empty")
+
+
+async def _groups_and_jitter():
+    wheel = TimerWheel(resolution=0.01)
+    fired = []
+    for room in ("A", "B"):
+        for delay in (0.05, 0.1, 10.0):
+            wheel.call_later(delay, fired.append, room, group=room)
+    assert wheel.cancel_group("A") == 3 and wheel.cancel_group("A") == 0, "❌ Group cancel count wrong"
+    await asyncio.sleep(0.15)
+    assert fired == ["B", "B"], f"❌ Destroyed room's timers fired: {fired}"
+    assert wheel.stats()["groups"] == 1 and wheel.armed == 1
+
+    deadlines = [wheel.call_later(1.0, lambda: None, jitter=0.2).deadline for _ in range(1000)]
+    spread = max(deadlines) - min(deadlines)
+    assert spread >= 30, f"❌ Jitter did not spread timers (over {spread} slots)"
+    print(f"  ✅ cancel_group drops a room's timers; 1000 jittered 1 s timers spread over {spread} slots ({wheel.stats()})")
+
+
+def test_timer_wheel():
+    print("Testing timer wheel...")
+    asyncio.run(_levels())
+    asyncio.run(_timing_and_cancel())
+    asyncio.run(_groups_and_jitter())
+    print("\n✅ Timer wheel OK\n")
+
+
+if __name__ == "__main__":
+    test_timer_wheel()
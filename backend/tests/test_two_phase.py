@@ -0,0 +1,153 @@
+"""
+Unit: two-phase arbitration. input_update reaches Lyria immediately through a local
+adjustment; the Gemini refinement follows at the tick and never overwrites a newer
+local adjustment. Prints input → Lyria latency for the tick-only path and the local path.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")  # clients are never used for real
+
+import routers.ws as ws
+import services.room_service as rs
+from models.schemas import Role
+from services.arbitration_cache import ArbitrationCache
+from services.gemini_service import gemini_service
+from services.lyria_service import lyria_service
+from services.room_service import room_service
+
+GEMINI_LATENCY = 0.3
+TICK_INTERVAL = 4.0
+
+
+class SlowModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, contents: str, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(GEMINI_LATENCY)
+        genre = next((g for g in ("disco", "funk") if g in contents.lower()), "jazz")
+        return SimpleNamespace(text=json.dumps({
+            "prompts": [{"text": f"refined {genre} groove", "weight": 1.0}],
+            "bpm": 100, "density": 0.5, "brightness": 0.5, "reasoning": f"refined {genre}",
+        }))
+
+
+class LyriaRecorder:
+    def __init__(self):
+        self.updates = []
+
+    async def update_prompts(self, room_id, prompts, bpm, density, brightness):
+        self.updates.append((time.perf_counter(), [p.text for p in prompts]))
+        return True
+
+
+def _input(room_id: str, role: Role, payload: dict) -> float:
+    """What the input_update handler does; returns when the input arrived."""
+    room_service.update_input(room_id, role, payload)
+    ws._queue_local_apply(room_id, role.value, payload)
+    return time.perf_counter()
+
+
+async def _run():
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=SlowModels()))
+    gemini_service.cache = ArbitrationCache()
+    recorder = LyriaRecorder()
+    lyria_service.update_prompts = recorder.update_prompts
+    room_id = room_service.create_room(host_id="host").room_id
+    room = room_service.rooms[room_id]
+    room.is_playing = True
+
+    # Before: tick-only path. Input → (wait for tick) → Gemini → Lyria
+    ws.TWO_PHASE_ARBITRATION = False
+    t0 = _input(room_id, Role.GENRE_DJ, {"genre": "Jazz"})
+    await ws._arbitration_tick(room_id, dict(room.current_inputs), room.bpm, room.density, room.brightness)
+    refine_s = recorder.updates[-1][0] - t0
+    before_s = TICK_INTERVAL / 2 + refine_s
+    room.current_inputs = {}
+
+    # After: the local adjustment reaches Lyria right away
+    ws.TWO_PHASE_ARBITRATION = True
+    sent = len(recorder.updates)
+    t0 = _input(room_id, Role.GENRE_DJ, {"genre": "Funk"})
+    await asyncio.sleep(0.01)
+    assert len(recorder.updates) == sent + 1, "❌ Local adjustment not pushed to Lyria"
+    local_ms = (recorder.updates[-1][0] - t0) * 1000
+    local_prompts = recorder.updates[-1][1]
+    assert any("funk" in text for text in local_prompts), f"❌ Local adjustment missing the new genre: {local_prompts}"
+    assert "refined jazz groove" in local_prompts, "❌ Local adjustment hard-cut the refined prompts"
+    print(f"  input → Lyria, tick only (mean):  {before_s * 1000:.0f} ms  ({TICK_INTERVAL / 2:.1f}s avg tick wait + {refine_s * 1000:.0f} ms Gemini)")
+    print(f"  input → Lyria, local phase:       {local_ms:.2f} ms")
+    assert local_ms < 50, "❌ Local phase too slow"
+
+    # The tick refines Funk; meanwhile the crowd switches mood — the refinement is stale
+    await asyncio.sleep(ws.LOCAL_APPLY_INTERVAL)
+    tick = asyncio.create_task(ws._arbitration_tick(room_id, dict(room.current_inputs), room.bpm, room.density, room.brightness))
+    await asyncio.sleep(GEMINI_LATENCY / 3)
+    _input(room_id, Role.VIBE_SETTER, {"mood": "Dark"})
+    await tick
+    latest = recorder.updates[-1][1]
+    assert "refined funk groove" not in latest[-1:] and any("brooding" in t for t in latest), f"❌ Stale refinement overwrote newer input: {latest}"
+    assert [p.text for p in gemini_service._last_results[room_id].prompts] == latest, "❌ Previous result does not match what is playing"
+    print("  ✅ Stale refinement dropped; newer local adjustment kept")
+
+    # Next tick refines the mood change from what is actually playing
+    room.current_inputs = {"vibe_setter": room.current_inputs["vibe_setter"]}
+    await ws._arbitration_tick(room_id, dict(room.current_inputs), room.bpm, room.density, room.brightness)
+    assert recorder.updates[-1][1] == ["refined funk groove"], f"❌ Refinement not applied: {recorder.updates[-1][1]}"
+    print("  ✅ Refinement applied at the following tick")
+
+    stats = room_service.get_stats()["input_to_lyria_ms"]
+    assert stats["local"]["count"] >= 2 and stats["refined"]["count"] >= 1, f"❌ Latency not recorded: {stats}"
+    print(f"  ✅ /stats input_to_lyria_ms: {stats}")
+    ws._forget_local(room_id)
+    room_service.destroy_room(room_id)
+
+
+async def _refined_after_drop():
+    # The slider moves while Gemini refines a genre change: the refinement is dropped,
+    # and the tick loop refines the genre again rather than treating it as done
+    models = SlowModels()
+    gemini_service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    gemini_service.cache = ArbitrationCache()
+    recorder = LyriaRecorder()
+    lyria_service.update_prompts = recorder.update_prompts
+    rs.TICK_DEBOUNCE, rs.TICK_MIN_INTERVAL = 0.05, 0.1
+    room_id = room_service.create_room(host_id="host").room_id
+    room = room_service.rooms[room_id]
+    room.is_playing = True
+    room_service.start_tick_loop(room_id, ws._arbitration_tick)
+
+    _input(room_id, Role.GENRE_DJ, {"genre": "Disco"})
+    while models.calls == 0:
+        await asyncio.sleep(0.01)
+    _input(room_id, Role.ENERGY, {"density": 0.7})
+    await asyncio.sleep(GEMINI_LATENCY)
+    assert "refined disco groove" not in recorder.updates[-1][1], "❌ Stale refinement applied"
+
+    for _ in range(50):
+        if recorder.updates[-1][1] == ["refined disco groove"]:
+            break
+        await asyncio.sleep(0.05)
+    assert recorder.updates[-1][1] == ["refined disco groove"], f"❌ Genre change never refined: {recorder.updates[-1][1]}"
+    assert models.calls == 2 and not room.current_inputs, f"❌ {models.calls} calls, inputs left {room.current_inputs}"
+    print("  ✅ Genre change dropped mid-refinement is refined at a later tick")
+    room_service.stop_tick_loop(room_id)
+    ws._forget_local(room_id)
+    room_service.destroy_room(room_id)
+
+
+def test_two_phase():
+    print("Testing two-phase arbitration...")
+    asyncio.run(_run())
+    asyncio.run(_refined_after_drop())
+    print("\n✅ Two-phase arbitration OK\n")
+
+
+if __name__ == "__main__":
+    test_two_phase()